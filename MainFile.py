@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-import sqlite3
 import pygame
 import random
 import time
@@ -8,6 +7,18 @@ import io
 import os
 import pygame.freetype
 import math
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from render_cache import TextSurfaceCache, GradientCache, ParticleField, compose_text_surface
+from scene import Scene, Widget
+from stroop_engine import (StroopSession, new_game_stats, record_session, session_config_from_env,
+                           stroop_effect, new_accumulators, add_records, accumulators_to_json,
+                           accumulators_from_json, TRIAL_COLUMNS, TRIALS_SCHEMA)
+from timing import now_ns, NS_PER_MS, TrialTimer
+from stroop_analytics import load_trials, stroop_table, table_rows
+from db_writer import DatabaseWriter
+from camera_service import shutdown_camera_service
+from input_registry import HandlerRegistry
 # Global color list: (Display Text, RGB)
 
 def get_localized_colors():
@@ -206,13 +217,23 @@ class InputMethod:
 # Global state
 current_language = 'english'
 current_input_method = InputMethod.VOICE
+current_participant = os.environ.get('STROOP_PARTICIPANT', 'anonymous')
+# Session length, congruency and inter-trial timing (STROOP_SESSION_MODE and friends)
+session_config = session_config_from_env()
 colors = LANGUAGES[current_language]['colors']
 ui_text = LANGUAGES[current_language]['ui']
 
+# All database writes go through one background writer and connection
+db_writer = DatabaseWriter('stroop_efficiency.db')
+atexit.register(db_writer.close)
+
 def init_db():
     print("[INIT] Initializing database and creating table if not exists...")
-    conn = sqlite3.connect('stroop_efficiency.db')
-    c = conn.cursor()
+    db_writer.start()
+    db_writer.call(_create_tables)
+    db_writer.flush()
+
+def _create_tables(c):
     c.execute('''CREATE TABLE IF NOT EXISTS efficiency (
                     method TEXT,
                     language TEXT,
@@ -221,43 +242,43 @@ def init_db():
                     games_played INTEGER,
                     PRIMARY KEY (method, language)
                 )''')
-    conn.commit()
-    conn.close()
+    # Append-only per-trial log for interference analyses
+    for statement in TRIALS_SCHEMA:
+        c.execute(statement)
+    # All-time reaction-time accumulators (running_stats.RunningStats as JSON)
+    c.execute('''CREATE TABLE IF NOT EXISTS running_stats (
+                    method TEXT,
+                    language TEXT,
+                    stats TEXT NOT NULL,
+                    PRIMARY KEY (method, language)
+                )''')
+
+def log_trials(trials):
+    """Queue a game's trial records (dicts keyed by TRIAL_COLUMNS) for the writer"""
+    _effects_cache['stale'] = True
+    db_writer.executemany(
+        f"INSERT INTO trials ({', '.join(TRIAL_COLUMNS)}) VALUES ({', '.join('?' * len(TRIAL_COLUMNS))})",
+        [tuple(trial[column] for column in TRIAL_COLUMNS) for trial in trials])
 
-# Initialize input handlers
-input_handlers = {}
+# Register input handlers; each is constructed the first time its method is used
+input_handlers = HandlerRegistry()
+# Seconds the menu highlight must rest on a method before its handler is prewarmed
+PREWARM_DWELL = 0.4
 if VOICE_AVAILABLE:
-    input_handlers[InputMethod.VOICE] = AudioRecoVorder()
+    input_handlers.register(InputMethod.VOICE, AudioRecoVorder)
 if CLICK_AVAILABLE:
-    input_handlers[InputMethod.CLICK] = ClickInput()
+    input_handlers.register(InputMethod.CLICK, ClickInput)
 if KEY_AVAILABLE:
-    input_handlers[InputMethod.KEY] = KeyInput()
+    input_handlers.register(InputMethod.KEY, KeyInput)
 if GESTURE_AVAILABLE:
-    input_handlers[InputMethod.GESTURE] = GestureInput()
+    input_handlers.register(InputMethod.GESTURE, GestureInput)
 if CAMERA_AVAILABLE:
-    input_handlers[InputMethod.CAMERA] = CameraInput()
+    input_handlers.register(InputMethod.CAMERA, CameraInput)
 if QR_AVAILABLE:
-    input_handlers[InputMethod.QR] = QRInput()
+    input_handlers.register(InputMethod.QR, QRInput)
 
-# Game statistics
-game_stats = {
-    'english': {
-        'voice': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'click': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'key': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'gesture': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'camera': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'qr': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-    },
-    'hindi': {
-        'voice': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'click': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'key': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'gesture': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'camera': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-        'qr': {'score': 0, 'times': [], 'played': False, 'stroop_conflicts': [], 'non_conflicts': []},
-    }
-}
+# Game statistics per language and input method
+game_stats = new_game_stats()
 
 # Enhanced Font management with better Hindi support
 def load_fonts():
@@ -335,26 +356,16 @@ def load_fonts():
 
 fonts = load_fonts()
 
+# Rendered text surfaces, keyed on (text, size, color, language)
+text_cache = TextSurfaceCache(max_entries=512)
+
+# Static layers: baked gradients and precomputed particle trajectories
+gradient_cache = GradientCache(max_entries=64)
+particle_field = ParticleField(SCREEN_WIDTH, SCREEN_HEIGHT, UI_COLORS['primary'])
+
 def draw_gradient_rect(surface, start_color, end_color, rect, vertical=True):
-    """Draw a gradient rectangle"""
-    if vertical:
-        for y in range(rect.height):
-            ratio = y / rect.height
-            r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
-            g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
-            b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
-            pygame.draw.line(surface, (r, g, b), 
-                           (rect.x, rect.y + y), 
-                           (rect.x + rect.width, rect.y + y))
-    else:
-        for x in range(rect.width):
-            ratio = x / rect.width
-            r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
-            g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
-            b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
-            pygame.draw.line(surface, (r, g, b), 
-                           (rect.x + x, rect.y), 
-                           (rect.x + x, rect.y + rect.height))
+    """Draw a gradient rectangle (baked once per size/colors, then blitted)"""
+    gradient_cache.blit(surface, start_color, end_color, rect, vertical)
 
 def draw_button(surface, text, rect, color, text_color, font_size='medium', hover=False):
     """Draw a modern button with gradient and shadow"""
@@ -379,26 +390,19 @@ def draw_button(surface, text, rect, color, text_color, font_size='medium', hove
 def draw_animated_background(surface, time_offset=0):
     """Draw animated background with particles"""
     surface.fill(UI_COLORS['game_bg'])
-    
-    # Draw floating particles
-    for i in range(20):
-        x = (160 + i * 48 + math.sin(time_offset + i) * 24) % SCREEN_WIDTH
-        y = (160 + i * 48 + math.cos(time_offset + i ) * 24) % SCREEN_HEIGHT
-        size = 3 + math.sin(time_offset + i * 0.3) * 2
-        alpha = int(30 + math.sin(time_offset + i * 0.7) * 24)
-        
-        color = (*UI_COLORS['primary'], alpha)
-        pygame.draw.circle(surface, color[:3], (int(x), int(y)), int(size))
+
+    # Draw floating particles from the precomputed trajectory table
+    particle_field.draw(surface, time_offset)
 
 import csv
 
 def show_efficiency_analysis():
     """Efficiency analysis UI with export notification on screen"""
-    conn = sqlite3.connect('stroop_efficiency.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM efficiency ORDER BY method, language")
-    data = c.fetchall()
-    conn.close()
+    data = db_writer.query("SELECT * FROM efficiency ORDER BY method, language")
+    # The Stroop effects are computed off the UI thread; the column reads
+    # "Computing..." until they arrive
+    pending = stroop_effects_by_method()
+    effects = pending.result() if pending.done() else None
 
     def draw_ui():
         draw_animated_background(screen)
@@ -412,8 +416,8 @@ def show_efficiency_analysis():
         # Table Header
         y = 140
         row_height = 25
-        col_x = [60, 200, 400, 600, 800]
-        col_titles = ["Method", "Language", "Max Efficiency", "Avg Efficiency", "Games Played"]
+        col_x = [40, 150, 270, 410, 550, 680]
+        col_titles = ["Method", "Language", "Max Efficiency", "Avg Efficiency", "Games Played", "Stroop Effect (95% CI)"]
         
         pygame.draw.rect(screen, UI_COLORS['secondary'], (30, y, SCREEN_WIDTH - 100, row_height), border_radius=6)
         for i, title in enumerate(col_titles):
@@ -431,7 +435,8 @@ def show_efficiency_analysis():
                 "English" if lang == 'english' else "Hindi",
                 f"{high:.2f}",
                 f"{avg:.2f}",
-                str(played)
+                str(played),
+                format_stroop_effect(effects.get((method, lang))) if effects is not None else "Computing..."
             ]
 
             for j, val in enumerate(values):
@@ -455,12 +460,17 @@ def show_efficiency_analysis():
     show_export_msg = False
 
     while waiting:
+        if effects is None and pending.done():
+            effects = pending.result()
+            draw_ui()
+            pygame.display.flip()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 waiting = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_e:
-                    export_efficiency_to_csv(data)
+                    effects = pending.result()
+                    export_efficiency_to_csv(data, effects)
                     show_export_msg = True
 
                     # Redraw UI + show export confirmation
@@ -472,55 +482,90 @@ def show_efficiency_analysis():
 
                 else:
                     waiting = False
+        clock.tick(30)
+
+
+# Stroop effects for the efficiency screen: computed on a background thread
+# and reused until log_trials() adds trials
+_effects_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stroop-effects")
+_effects_cache = {'future': None, 'stale': True}
+
+
+def stroop_effects_by_method():
+    """
+    Stroop effect per (method, language) over every logged trial
+
+    Returns:
+        concurrent.futures.Future: (method, language) -> stroop_analytics row dict
+    """
+    if _effects_cache['stale'] or _effects_cache['future'] is None:
+        _effects_cache['stale'] = False
+        _effects_cache['future'] = _effects_pool.submit(_compute_stroop_effects)
+    return _effects_cache['future']
+
+
+def _compute_stroop_effects():
+    try:
+        table = stroop_table(load_trials(db_writer), ('method', 'language'))
+    except Exception as e:
+        print(f"[ANALYTICS] Could not compute Stroop effects: {e}")
+        _effects_cache['stale'] = True
+        return {}
+    return {(row['method'], row['language']): row for row in table_rows(table)}
+
 
+def format_stroop_effect(effect):
+    """Interference in ms with its CI, '-' when a condition has no correct trials"""
+    if effect is None or math.isnan(effect['interference']):
+        return "-"
+    if math.isnan(effect['ci_low']):
+        return f"{effect['interference'] * 1000:+.0f} ms"
+    return (f"{effect['interference'] * 1000:+.0f} ms "
+            f"[{effect['ci_low'] * 1000:+.0f}, {effect['ci_high'] * 1000:+.0f}]")
 
-def export_efficiency_to_csv(data):
+
+def export_efficiency_to_csv(data, effects=None):
     """Exports efficiency data to CSV"""
+    effects = effects or {}
     filename = "efficiency_export.csv"
     with open(filename, mode='w', newline='', encoding='utf-8') as file:
         writer = csv.writer(file)
-        writer.writerow(["Method", "Language", "Max Efficiency", "Avg Efficiency", "Games Played"])
+        writer.writerow(["Method", "Language", "Max Efficiency", "Avg Efficiency", "Games Played",
+                         "Stroop Effect (s)", "CI Low (s)", "CI High (s)", "Median Stroop Effect (s)",
+                         "IES Stroop Effect (s)"])
         for row in data:
             method, lang, high, avg, played = row
-            writer.writerow([method.capitalize(), lang.capitalize(), f"{high:.2f}", f"{avg:.2f}", played])
+            effect = effects.get((method, lang), {})
+            writer.writerow([method.capitalize(), lang.capitalize(), f"{high:.2f}", f"{avg:.2f}", played] +
+                            [f"{effect[name]:.4f}" if name in effect and not math.isnan(effect[name]) else ""
+                             for name in ('interference', 'ci_low', 'ci_high', 'median_interference',
+                                          'ies_interference')])
     print(f"Efficiency data exported to {filename}")
 
 
 def render_text(text, size, color):
-    """Render Hindi-English mixed text with proper fonts"""
-    import re
+    """Render Hindi-English mixed text with proper fonts (cached)"""
+    color = tuple(color)
+    key = (text, size, color, current_language)
+    cached = text_cache.get(key)
+    if cached is not None:
+        return cached
+
     hindi_font = fonts.get(f'hindi_{size}', fonts["english_medium"])
     english_font = fonts.get(f'english_{size}', fonts["english_medium"])
-    
-    # Split into Hindi and English parts
-    segments = re.findall(r'[A-Za-z0-9]+|[^A-Za-z0-9]+', text)
-    
-    rendered_segments = []
-    for segment in segments:
-        if re.match(r'[A-Za-z0-9]', segment):
-            surf = english_font.render(segment, True, color)
-        else:
-            surf = hindi_font.render(segment, True, color)
-        rendered_segments.append(surf)
-    
-    # Combine all segments horizontally
-    total_width = sum(s.get_width() for s in rendered_segments)
-    max_height = max(s.get_height() for s in rendered_segments)
-    final_surface = pygame.Surface((total_width, max_height), pygame.SRCALPHA)
-    
-    x_offset = 0
-    for seg in rendered_segments:
-        final_surface.blit(seg, (x_offset, 0))
-        x_offset += seg.get_width()
-    
-    return final_surface
+    surface = compose_text_surface(text, english_font, hindi_font, color)
+    text_cache.put(key, surface)
+    return surface
 
 def update_language(lang):
     """Update language with proper text refresh"""
-    global current_language, colors, ui_text
+    global current_language, colors, ui_text, fonts
     current_language = lang
     colors = LANGUAGES[lang]['colors']
     ui_text = LANGUAGES[lang]['ui']
+    # Fonts depend on the language, so cached text surfaces are stale now
+    fonts = load_fonts()
+    text_cache.clear()
     print(f"[LANG] Language changed to: {lang}")
 
 def get_available_methods():
@@ -536,7 +581,8 @@ def get_available_methods():
     }
     
     for method, (name, available_flag) in method_names.items():
-        if available_flag:
+        # Methods whose handler failed to initialise drop out of the menu
+        if available_flag and method in input_handlers:
             available.append((method, name))
     
     return available
@@ -564,8 +610,15 @@ def select_input_method():
     
     selected_index = 0
     animation_time = 0
+    # Build the highlighted handler in the background while the menu is up, once
+    # the highlight has rested on it (scrolling past a method does not build it)
+    highlighted_at = time.perf_counter()
+    prewarmed = False
     
     while True:
+        if not prewarmed and time.perf_counter() - highlighted_at >= PREWARM_DWELL:
+            input_handlers.prewarm([available_methods[selected_index][0]])
+            prewarmed = True
         animation_time += 0.1
         draw_animated_background(screen, animation_time)
         
@@ -637,8 +690,10 @@ def select_input_method():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_UP:
                     selected_index = (selected_index - 1) % len(available_methods)
+                    highlighted_at, prewarmed = time.perf_counter(), False
                 elif event.key == pygame.K_DOWN:
                     selected_index = (selected_index + 1) % len(available_methods)
+                    highlighted_at, prewarmed = time.perf_counter(), False
                 elif event.key == pygame.K_RETURN:
                     current_input_method = available_methods[selected_index][0]
                     return True
@@ -649,6 +704,7 @@ def select_input_method():
                     update_language(new_lang)
                     available_methods = get_available_methods()
                     selected_index = min(selected_index, len(available_methods) - 1)
+                    highlighted_at, prewarmed = time.perf_counter(), False
                 elif event.key == pygame.K_t:
                     show_efficiency_analysis()
         
@@ -660,7 +716,9 @@ def test_input_method():
     if current_input_method not in input_handlers:
         return False
     
-    handler = input_handlers[current_input_method]
+    handler = input_handlers.get(current_input_method)
+    if handler is None:
+        return False
     
     # Enhanced test screen with animated background
     animation_time = 0
@@ -760,14 +818,17 @@ def test_input_method():
     screen.blit(hint_text, hint_rect)
     
     pygame.display.flip()
+    timer = TrialTimer()
+    timer.mark_onset()
+    if hasattr(handler, 'set_stimulus_onset'):
+        handler.set_stimulus_onset(timer.onset_ns)
     
     # Test the input method
-    start_time = time.time()
     result = handler.get_input(colors, screen, ui_text, fonts)
-    end_time = time.time()
+    timer.mark_response(result)
     
     # Enhanced results screen
-    response_time = end_time - start_time
+    response_time = timer.latency()
     
     # Results background
     draw_animated_background(screen, animation_time + 2)
@@ -867,198 +928,225 @@ def test_input_method():
     return True
 
 
-def play_game():
-    """Main game loop with enhanced UI"""
-    if current_input_method not in input_handlers:
-        return False
+def build_game_scene(total_questions):
+    """Build the retained-mode question screen used by play_game"""
+    scene = Scene((SCREEN_WIDTH, SCREEN_HEIGHT), draw_animated_background)
     
-    handler = input_handlers[current_input_method]
+    def draw_status_bar(surface, rect, state):
+        draw_gradient_rect(surface, UI_COLORS['dark_bg'], UI_COLORS['primary'], rect)
     
-    question_count = 0
-    total_questions = 5
-    score = 0
-    response_times = []
-    animation_time = 0
+    def draw_progress(surface, rect, state):
+        pygame.draw.rect(surface, UI_COLORS['white'], rect, border_radius=15)
+        fill_width = int((state['question'] / total_questions) * rect.width)
+        if fill_width > 0:
+            fill_rect = pygame.Rect(rect.x, rect.y, fill_width, rect.height)
+            pygame.draw.rect(surface, UI_COLORS['accent'], fill_rect, border_radius=15)
     
-    # Get current stats
-    current_stats = game_stats[current_language][current_input_method]
+    def draw_question(surface, rect, state):
+        surface.blit(render_text(state['text'], 'medium', UI_COLORS['white']), rect.topleft)
     
-    # Game start animation
-    for frame in range(90):  # 1.5 second countdown
-        animation_time += 0.1
-        draw_animated_background(screen, animation_time)
-        
-        # Main container
-        container_rect = pygame.Rect(200, 200, SCREEN_WIDTH - 400, SCREEN_HEIGHT - 400)
-        draw_gradient_rect(screen, UI_COLORS['primary'], UI_COLORS['secondary'], container_rect)
-        pygame.draw.rect(screen, UI_COLORS['white'], container_rect, 3, border_radius=20)
-        
-        # Countdown number
-        countdown_num = 3 - (frame // 30)
-        if countdown_num > 0:
-            countdown_text = render_text(str(countdown_num), 'title', UI_COLORS['accent'])
-            countdown_rect = countdown_text.get_rect(center=container_rect.center)
-            screen.blit(countdown_text, countdown_rect)
-        else:
-            ready_text = render_text("Let's Play!", 'large', UI_COLORS['white'])
-            ready_rect = ready_text.get_rect(center=container_rect.center)
-            screen.blit(ready_text, ready_rect)
-        
-        # Game info
-        info_text = render_text(f"Method: {current_input_method.capitalize()} | Language: {current_language.capitalize()}", 
-                               'medium', UI_COLORS['white'])
-        info_rect = info_text.get_rect(center=(container_rect.centerx, container_rect.centery + 80))
-        screen.blit(info_text, info_rect)
-        
-        pygame.display.flip()
-        clock.tick(60)
+    def draw_score(surface, rect, state):
+        pygame.draw.rect(surface, UI_COLORS['accent'], rect, border_radius=25)
+        score_text = render_text(state['text'], 'medium', UI_COLORS['text'])
+        surface.blit(score_text, score_text.get_rect(center=rect.center))
     
-    while question_count < total_questions:
-        animation_time += 0.1
-        
-        # Enhanced game interface
-        draw_animated_background(screen, animation_time)
-        
-        # Top status bar
-        status_bar = pygame.Rect(0, 0, SCREEN_WIDTH, 80)
-        draw_gradient_rect(screen, UI_COLORS['dark_bg'], UI_COLORS['primary'], status_bar)
-        
-        # Progress indicators
-        progress_width = 300
-        progress_x = SCREEN_WIDTH//2 - progress_width//2
-        progress_rect = pygame.Rect(progress_x, 25, progress_width, 30)
-        pygame.draw.rect(screen, UI_COLORS['white'], progress_rect, border_radius=15)
-        
-        # Fill progress
-        fill_width = int((question_count / total_questions) * progress_width)
-        if fill_width > 0:
-            fill_rect = pygame.Rect(progress_rect.x, progress_rect.y, fill_width, 30)
-            pygame.draw.rect(screen, UI_COLORS['accent'], fill_rect, border_radius=15)
-        
-        # Question counter
-        question_text = render_text(f"Question {question_count + 1}/{total_questions}", 'medium', UI_COLORS['white'])
-        screen.blit(question_text, (50, 25))
-        
-        # Score with animated background
-        score_bg = pygame.Rect(SCREEN_WIDTH - 200, 15, 150, 50)
-        pygame.draw.rect(screen, UI_COLORS['accent'], score_bg, border_radius=25)
-        
-        score_text = render_text(f"Score: {score}", 'medium', UI_COLORS['text'])
-        score_rect = score_text.get_rect(center=score_bg.center)
-        screen.blit(score_text, score_rect)
-        
-        # Input method badge
-        method_badge = pygame.Rect(20, SCREEN_HEIGHT - 100, 200, 40)
-        pygame.draw.rect(screen, UI_COLORS['secondary'], method_badge, border_radius=20)
-        
-        method_text = render_text(f" {current_input_method.capitalize()}", 'small', UI_COLORS['white'])
-        method_text_rect = method_text.get_rect(center=method_badge.center)
-        screen.blit(method_text, method_text_rect)
-        
-        # Choose random word and color
-        word_index = random.randint(0, len(colors) - 1)
-        color_index = random.randint(0, len(colors) - 1)
-        is_stroop_conflict = (word_index != color_index)
-        
-        word_name = colors[word_index][0]
-        color_rgb = colors[color_index][1]
-        
-        # Main word display with enhanced styling
-        word_container = pygame.Rect(SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2 - 120, 400, 200)
+    def draw_badge(surface, rect, state):
+        pygame.draw.rect(surface, UI_COLORS['secondary'], rect, border_radius=20)
+        method_text = render_text(f" {state['method'].capitalize()}", 'small', UI_COLORS['white'])
+        surface.blit(method_text, method_text.get_rect(center=rect.center))
+    
+    def draw_word(surface, rect, state):
+        color_rgb = state['color']
+        word_container = pygame.Rect(rect.x, rect.y, rect.width - 8, rect.height - 8)
         
         # Shadow effect
-        shadow_container = pygame.Rect(word_container.x + 8, word_container.y + 8, 
+        shadow_container = pygame.Rect(word_container.x + 8, word_container.y + 8,
                                       word_container.width, word_container.height)
-        pygame.draw.rect(screen, (50, 50, 50), shadow_container, border_radius=20)
-
+        pygame.draw.rect(surface, (50, 50, 50), shadow_container, border_radius=20)
+        
         # Main container
-        pygame.draw.rect(screen, UI_COLORS['white'], word_container, border_radius=20)
-        pygame.draw.rect(screen, color_rgb, word_container, 5, border_radius=20)
+        pygame.draw.rect(surface, UI_COLORS['white'], word_container, border_radius=20)
+        pygame.draw.rect(surface, color_rgb, word_container, 5, border_radius=20)
         
         # Stroop conflict indicator
-        if is_stroop_conflict:
+        if state['conflict']:
             conflict_indicator = pygame.Rect(word_container.x + 10, word_container.y + 10, 30, 30)
-            pygame.draw.circle(screen, UI_COLORS['warning'], conflict_indicator.center, 15)
+            pygame.draw.circle(surface, UI_COLORS['warning'], conflict_indicator.center, 15)
             conflict_text = render_text("!", 'small', UI_COLORS['white'])
-            conflict_text_rect = conflict_text.get_rect(center=conflict_indicator.center)
-            screen.blit(conflict_text, conflict_text_rect)
+            surface.blit(conflict_text, conflict_text.get_rect(center=conflict_indicator.center))
         
         # Display the word with glow effect
-        word_surface = render_text(word_name, 'title', color_rgb)
+        word_surface = render_text(state['word'], 'title', color_rgb)
         word_rect = word_surface.get_rect(center=word_container.center)
-        
-        # Glow effect
+        glow_surface = render_text(state['word'], 'title', tuple(min(255, c + 50) for c in color_rgb))
         for offset in [(2, 2), (-2, -2), (2, -2), (-2, 2)]:
-            glow_surface = render_text(word_name, 'title', tuple(min(255, c + 50) for c in color_rgb))
-            glow_rect = word_surface.get_rect(center=(word_container.center[0] + offset[0], 
-                                                     word_container.center[1] + offset[1]))
-            screen.blit(glow_surface, glow_rect)
-        
-        screen.blit(word_surface, word_rect)
-        
-        # Instruction panel with animation
-        instruction_panel = pygame.Rect(100, SCREEN_HEIGHT//2 + 120, SCREEN_WIDTH - 200, 100)
-        panel_alpha = int(200 + 55 * math.sin(animation_time * 2))
-        instruction_color = (*UI_COLORS['background'], panel_alpha)
-        
-        pygame.draw.rect(screen, instruction_color[:3], instruction_panel, border_radius=15)
-        pygame.draw.rect(screen, UI_COLORS['primary'], instruction_panel, 3, border_radius=15)
+            surface.blit(glow_surface, word_rect.move(offset))
+        surface.blit(word_surface, word_rect)
+    
+    def draw_instruction(surface, rect, state):
+        pygame.draw.rect(surface, UI_COLORS['background'], rect, border_radius=15)
+        pygame.draw.rect(surface, UI_COLORS['primary'], rect, 3, border_radius=15)
         
         # Main instruction
         instruction_text = render_text(" " + ui_text['instruction'], 'large', UI_COLORS['text'])
-        instruction_rect = instruction_text.get_rect(center=(instruction_panel.centerx, instruction_panel.centery - 15))
-        screen.blit(instruction_text, instruction_rect)
+        surface.blit(instruction_text, instruction_text.get_rect(center=(rect.centerx, rect.centery - 15)))
         
         # Hint text
         hint_text = render_text("(Ignore the word, focus on the COLOR)", 'small', UI_COLORS['light_text'])
-        hint_rect = hint_text.get_rect(center=(instruction_panel.centerx, instruction_panel.centery + 20))
-        screen.blit(hint_text, hint_rect)
-        
-        pygame.display.flip()
-        
-        # Wait a moment with animated loading
-        for i in range(30):  # 0.5 second
-            # Add subtle loading animation
-            loading_dots = "." * ((i // 10) + 1)
-            loading_text = render_text(f"Get ready{loading_dots}", 'small', UI_COLORS['light_text'])
-            loading_rect = loading_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 50))
-            
-            # Clear just the loading area
-            clear_rect = pygame.Rect(loading_rect.x - 50, loading_rect.y - 10, 
-                                   loading_rect.width + 100, loading_rect.height + 20)
-            pygame.draw.rect(screen, UI_COLORS['game_bg'], clear_rect)
-            screen.blit(loading_text, loading_rect)
+        surface.blit(hint_text, hint_text.get_rect(center=(rect.centerx, rect.centery + 20)))
+    
+    def draw_get_ready(surface, rect, state):
+        loading_text = render_text(state['text'], 'small', UI_COLORS['light_text'])
+        surface.blit(loading_text, loading_text.get_rect(center=rect.center))
+    
+    progress_width = 300
+    scene.add(Widget('status_bar', (0, 0, SCREEN_WIDTH, 80), draw_status_bar))
+    scene.add(Widget('progress', (SCREEN_WIDTH//2 - progress_width//2, 25, progress_width, 30),
+                     draw_progress, question=0))
+    scene.add(Widget('question', (50, 25, 220, 40), draw_question, text=""))
+    scene.add(Widget('score', (SCREEN_WIDTH - 200, 15, 150, 50), draw_score, text=""))
+    scene.add(Widget('badge', (20, SCREEN_HEIGHT - 100, 200, 40), draw_badge, method=current_input_method))
+    scene.add(Widget('word', (SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2 - 120, 408, 208), draw_word,
+                     word="", color=UI_COLORS['text'], conflict=False))
+    scene.add(Widget('instruction', (100, SCREEN_HEIGHT//2 + 120, SCREEN_WIDTH - 200, 100), draw_instruction))
+    scene.add(Widget('get_ready', (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT - 70, 300, 40), draw_get_ready,
+                     visible=False, text=""))
+    return scene
+
+class PygameRenderer:
+    """Draws a StroopSession in the game window"""
+    
+    def __init__(self, config):
+        """
+        Args:
+            config: Session settings (see stroop_engine.SESSION_CONFIG)
+        """
+        self.config = config
+        self.scene = None
+        self.animation_time = 0
+    
+    def _run_for(self, duration_ms, draw_frame=None):
+        """
+        Keep the window responsive for duration_ms, on the frame clock
+        
+        Keys pressed meanwhile are discarded so they cannot answer the next trial.
+        
+        Args:
+            duration_ms: How long to wait
+            draw_frame: Optional callback(progress 0..1) that draws and flips a frame
             
-            pygame.display.update(clear_rect)
+        Returns:
+            False if the player closed the window or pressed Escape
+        """
+        started = now_ns()
+        duration_ns = duration_ms * NS_PER_MS
+        while now_ns() - started < duration_ns:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (
+                    event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    return False
+            if draw_frame:
+                draw_frame((now_ns() - started) / duration_ns)
             clock.tick(60)
+        return True
+    
+    def start(self, session):
+        """Countdown before the first trial"""
+        def draw_countdown(progress):
+            self.animation_time += 0.1
+            draw_animated_background(screen, self.animation_time)
+            
+            # Main container
+            container_rect = pygame.Rect(200, 200, SCREEN_WIDTH - 400, SCREEN_HEIGHT - 400)
+            draw_gradient_rect(screen, UI_COLORS['primary'], UI_COLORS['secondary'], container_rect)
+            pygame.draw.rect(screen, UI_COLORS['white'], container_rect, 3, border_radius=20)
+            
+            # Countdown number
+            countdown_num = 3 - int(progress * 3)
+            if countdown_num > 0:
+                countdown_text = render_text(str(countdown_num), 'title', UI_COLORS['accent'])
+                countdown_rect = countdown_text.get_rect(center=container_rect.center)
+                screen.blit(countdown_text, countdown_rect)
+            else:
+                ready_text = render_text("Let's Play!", 'large', UI_COLORS['white'])
+                ready_rect = ready_text.get_rect(center=container_rect.center)
+                screen.blit(ready_text, ready_rect)
+            
+            # Game info
+            info_text = render_text(f"Method: {session.method.capitalize()} | Language: {session.language.capitalize()}", 
+                                   'medium', UI_COLORS['white'])
+            info_rect = info_text.get_rect(center=(container_rect.centerx, container_rect.centery + 80))
+            screen.blit(info_text, info_rect)
+            
+            pygame.display.flip()
         
-        # Get input
-        start_time = time.time()
-        result = handler.get_input(colors, screen, ui_text, fonts)
-        end_time = time.time()
-        
-        # Handle quit
-        if not result['success'] and result['message'] == 'quit':
+        if not self._run_for(self.config['countdown_ms'], draw_countdown):
             return False
         
-        # Calculate response time
-        response_time = end_time - start_time
-        response_times.append(response_time)
+        self.scene = build_game_scene(session.total_questions)
+        self.scene.draw_background = lambda surface: draw_animated_background(surface, self.animation_time)
+        return True
+    
+    def show_trial(self, session, trial):
+        """Show the word; returns the onset timestamp of the frame that first showed it"""
+        self.animation_time += 0.1
+        scene = self.scene
+        word_name = session.colors[trial['word_index']][0]
+        color_rgb = session.colors[trial['ink_index']][1]
+        
+        # Only the widgets whose state changed get redrawn
+        scene['progress'].set(question=session.question_count)
+        scene['question'].set(text=f"Question {session.question_count + 1}/{session.total_questions}")
+        scene['score'].set(text=f"Score: {session.score}")
+        scene['word'].set(word=word_name, color=color_rgb, conflict=not trial['congruent'])
+        scene['get_ready'].hide()
+        scene.render(screen)
+        # Reaction time runs from the flip that first showed the word
+        onset_ns = session.timer.mark_onset()
         
-        # Track stroop conflicts
-        if is_stroop_conflict:
-            current_stats['stroop_conflicts'].append(response_time)
-        else:
-            current_stats['non_conflicts'].append(response_time)
+        # Wait a moment with animated loading
+        ready_ns = self.config['ready_ms'] * NS_PER_MS
+        if ready_ns > 0:
+            scene['get_ready'].show()
+        while now_ns() - onset_ns < ready_ns:
+            # An early answer (or quit) goes straight to the handler so its timestamp stays accurate
+            if pygame.event.peek([pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.QUIT]):
+                break
+            # Add subtle loading animation
+            dots = 1 + min(2, 3 * (now_ns() - onset_ns) // ready_ns)
+            scene['get_ready'].set(text=f"Get ready{'.' * dots}")
+            scene.render(screen)
+            clock.tick(60)
+        return onset_ns
+    
+    def show_feedback(self, session, record):
+        """Result screen for one answer, then the inter-trial interval"""
+        # The handler and the result screen paint over the whole game screen
+        self.scene.invalidate()
+        if self.config['feedback_ms'] > 0 and not self._show_result(session, record):
+            return False
+        if self.config['iti_ms'] > 0 and not session.finished:
+            return self._show_fixation()
+        return True
+    
+    def _show_fixation(self):
+        """Fixation cross for the inter-trial interval"""
+        draw_animated_background(screen, self.animation_time)
+        cross = render_text("+", 'title', UI_COLORS['white'])
+        screen.blit(cross, cross.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
+        pygame.display.flip()
+        return self._run_for(self.config['iti_ms'])
+    
+    def _show_result(self, session, record):
+        """Correct/wrong screen with the reaction time"""
         
-        # Check answer
-        if result['success'] and result.get('color_index') is not None:
-            is_correct = result['color_index'] == color_index
-        else:
-            is_correct = False
+        is_correct = record['correct']
+        response_time = record['latency']
+        word_name = session.colors[record['word_index']][0]
+        color_rgb = session.colors[record['ink_index']][1]
         
         # Enhanced result display
-        draw_animated_background(screen, animation_time)
+        draw_animated_background(screen, self.animation_time)
         
         # Result container
         result_container = pygame.Rect(150, 150, SCREEN_WIDTH - 300, SCREEN_HEIGHT - 300)
@@ -1066,12 +1154,9 @@ def play_game():
         if is_correct:
             result_color = UI_COLORS['success']
             result_text = "" + ui_text['correct']
-            result_icon = ""
-            score += 1
         else:
             result_color = UI_COLORS['error']
             result_text = " " + ui_text['wrong']
-            result_icon = ""
         
         # Shadow
         shadow_rect = pygame.Rect(result_container.x + 5, result_container.y + 5, 
@@ -1104,9 +1189,10 @@ def play_game():
         # Answer details
         details_y = result_container.y + 200
         
-        if not is_correct and result['color_index'] is not None and 0 <= result['color_index'] < len(colors):
-            user_answer = colors[result['color_index']][0]
-            correct_answer = colors[color_index][0]
+        answer_index = record['answer_index']
+        if not is_correct and answer_index is not None and 0 <= answer_index < len(session.colors):
+            user_answer = session.colors[answer_index][0]
+            correct_answer = session.colors[record['ink_index']][0]
             
             # Your answer
             user_card = pygame.Rect(result_container.x + 50, details_y, 
@@ -1135,43 +1221,74 @@ def play_game():
         # Color code based on response time
         if response_time < 2.0:
             time_color = UI_COLORS['success']
-            time_icon = ""
         elif response_time < 4.0:
             time_color = UI_COLORS['warning']
-            time_icon = ""
         else:
             time_color = UI_COLORS['error']
-            time_icon = ""
         
         pygame.draw.rect(screen, time_color, time_card, border_radius=10)
         
-        time_text = render_text(f"{time_icon} Time: {response_time:.2f}s", 'medium', UI_COLORS['white'])
+        time_text = render_text(f" Time: {response_time:.2f}s", 'medium', UI_COLORS['white'])
         time_text_rect = time_text.get_rect(center=time_card.center)
         screen.blit(time_text, time_text_rect)
         
         pygame.display.flip()
-        time.sleep(2.5)
-        
-        question_count += 1
+        return self._run_for(self.config['feedback_ms'])
+
+class HandlerInput:
+    """Feeds a StroopSession from one of the input handlers"""
+    
+    def __init__(self, handler):
+        self.handler = handler
+    
+    def get_response(self, session, trial):
+        # Handlers that buffer input (the voice stream) read it from the stimulus onset
+        if hasattr(self.handler, 'set_stimulus_onset'):
+            self.handler.set_stimulus_onset(session.timer.onset_ns)
+        return self.handler.get_input(session.colors, screen, ui_text, fonts)
+
+def play_game():
+    """Main game loop with enhanced UI"""
+    if current_input_method not in input_handlers:
+        return False
+    
+    handler = input_handlers.get(current_input_method)
+    if handler is None:
+        return False
+    
+    session = StroopSession(colors, current_input_method, current_language,
+                            participant=current_participant,
+                            total_questions=session_config['total_questions'],
+                            congruent_ratio=session_config['congruent_ratio'],
+                            renderer=PygameRenderer(session_config), input_adapter=HandlerInput(handler),
+                            on_record=lambda record: log_trials([record]))
+    # Each trial is queued for the trials table as soon as it is recorded
+    finished = session.run()
+    
+    # Completed trials count towards the reaction-time stats even if the game was quit
+    if session.records:
+        update_running_stats_db(current_input_method, current_language, session.records)
+    if not finished:
+        add_records(game_stats[current_language][current_input_method], session.records)
+        return False
     
     # Update stats
-    current_stats['score'] = score
-    current_stats['times'] = response_times
-    current_stats['played'] = True
+    record_session(game_stats, session)
+    summary = session.summary()
+    # Refresh the efficiency screen's Stroop effects while the results are shown
+    stroop_effects_by_method()
     
     # Show final results
-    show_final_results(score, response_times)
+    show_final_results(summary)
     
     # Calculate and store efficiency
-    if response_times:
-        avg_time = sum(response_times) / len(response_times)
-        efficiency = score / avg_time if avg_time > 0 else 0
-        update_efficiency_db(current_input_method, current_language, efficiency)
+    if session.records:
+        update_efficiency_db(current_input_method, current_language, summary['efficiency'])
     
     return True
 
-def show_final_results(score, response_times):
-    """Show final game results"""
+def show_final_results(summary):
+    """Show final game results from a StroopSession summary"""
     screen.fill((255, 255, 255))
     
     # Title
@@ -1180,37 +1297,33 @@ def show_final_results(score, response_times):
     screen.blit(title_text, title_rect)
     
     # Score
-    score_text = render_text(f"{score}/5", 'large', (0, 0, 0))
+    score_text = render_text(f"{summary['score']}/{summary['total']}", 'large', (0, 0, 0))
     score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, 180))
     screen.blit(score_text, score_rect)
     
     # Accuracy
-    accuracy = (score / 5) * 100
+    accuracy = summary['accuracy']
     accuracy_text = render_text(f"{ui_text['accuracy']}: {accuracy:.1f}%", 'medium', (0, 0, 0))
     accuracy_rect = accuracy_text.get_rect(center=(SCREEN_WIDTH//2, 240))
     screen.blit(accuracy_text, accuracy_rect)
     
     # Average time
-    if response_times:
-        avg_time = sum(response_times) / len(response_times)
+    if summary['trials']:
+        avg_time = summary['avg_time']
         time_text = render_text(f"{ui_text['avg_time']}: {avg_time:.2f}s", 'medium', (0, 0, 0))
         time_rect = time_text.get_rect(center=(SCREEN_WIDTH//2, 290))
         screen.blit(time_text, time_rect)
         
         # Efficiency
-        efficiency = score / avg_time if avg_time > 0 else 0
-        eff_text = render_text(f"{ui_text['efficiency']}: {efficiency:.2f}", 'medium', (0, 100, 0))
+        eff_text = render_text(f"{ui_text['efficiency']}: {summary['efficiency']:.2f}", 'medium', (0, 100, 0))
         eff_rect = eff_text.get_rect(center=(SCREEN_WIDTH//2, 340))
         screen.blit(eff_text, eff_rect)
     
     # Stroop effect analysis
     current_stats = game_stats[current_language][current_input_method]
-    if current_stats['stroop_conflicts'] and current_stats['non_conflicts']:
-        conflict_avg = sum(current_stats['stroop_conflicts']) / len(current_stats['stroop_conflicts'])
-        non_conflict_avg = sum(current_stats['non_conflicts']) / len(current_stats['non_conflicts'])
-        stroop_effect = conflict_avg - non_conflict_avg
-        
-        stroop_text = render_text(f"{ui_text['stroop_effect']}: +{stroop_effect:.2f}s", 'medium', (200, 0, 0))
+    effect = stroop_effect(current_stats['stroop_conflicts'], current_stats['non_conflicts'])
+    if effect is not None:
+        stroop_text = render_text(f"{ui_text['stroop_effect']}: +{effect:.2f}s", 'medium', (200, 0, 0))
         stroop_rect = stroop_text.get_rect(center=(SCREEN_WIDTH//2, 390))
         screen.blit(stroop_text, stroop_rect)
     
@@ -1254,7 +1367,6 @@ def show_final_results(score, response_times):
                     return True
         
         clock.tick(60)
-    update_efficiency_db(current_input_method, current_language, efficiency)
 
     return True
 
@@ -1279,20 +1391,16 @@ def show_comparison():
         for method in ['voice', 'click', 'key', 'gesture', 'camera', 'qr']:
             stats = game_stats[lang][method]
             if stats['played']:
-                # Calculate metrics
-                avg_time = sum(stats['times']) / len(stats['times']) if stats['times'] else 0
-                accuracy = (stats['score'] / 5) * 100 if stats['score'] > 0 else 0
-                efficiency = stats['score'] / avg_time if avg_time > 0 else 0
+                # Score and times are the last session's; the Stroop effect covers every session
+                avg_time = stats['avg_time'] or 0
+                median_time = stats['median_time'] or 0
+                accuracy = (stats['score'] / stats['total']) * 100 if stats['total'] else 0
                 
                 # Calculate stroop effect
-                stroop_effect = 0
-                if stats['stroop_conflicts'] and stats['non_conflicts']:
-                    conflict_avg = sum(stats['stroop_conflicts']) / len(stats['stroop_conflicts'])
-                    non_conflict_avg = sum(stats['non_conflicts']) / len(stats['non_conflicts'])
-                    stroop_effect = conflict_avg - non_conflict_avg
+                effect = stroop_effect(stats['stroop_conflicts'], stats['non_conflicts']) or 0
                 
                 # Display stats
-                method_text = f"  {method.capitalize()}: Score={stats['score']}/5, Avg Time={avg_time:.2f}s, Accuracy={accuracy:.1f}%, Stroop Effect=+{stroop_effect:.2f}s"
+                method_text = f"  {method.capitalize()}: Score={stats['score']}/{stats['total']}, Avg Time={avg_time:.2f}s, Median={median_time:.2f}s, Accuracy={accuracy:.1f}%, Stroop Effect=+{effect:.2f}s"
                 
                 # Color code based on performance
                 color = (0, 150, 0) if accuracy >= 80 else (150, 150, 0) if accuracy >= 60 else (150, 0, 0)
@@ -1323,9 +1431,10 @@ def show_comparison():
     
     return True
 def update_efficiency_db(method, language, efficiency):
-    conn = sqlite3.connect('stroop_efficiency.db')
-    c = conn.cursor()
-    
+    """Queue an efficiency update; the writer thread applies it"""
+    db_writer.call(_update_efficiency, method, language, efficiency)
+
+def _update_efficiency(c, method, language, efficiency):
     # Fetch existing row
     c.execute("SELECT highest_efficiency, average_efficiency, games_played FROM efficiency WHERE method=? AND language=?", 
               (method, language))
@@ -1340,9 +1449,18 @@ def update_efficiency_db(method, language, efficiency):
     else:
         c.execute("INSERT INTO efficiency VALUES (?, ?, ?, ?, ?)", 
                   (method, language, efficiency, efficiency, 1))
-    
-    conn.commit()
-    conn.close()
+
+def update_running_stats_db(method, language, records):
+    """Queue adding a session's reaction times to the stored accumulators"""
+    db_writer.call(_update_running_stats, method, language, records)
+
+def _update_running_stats(c, method, language, records):
+    c.execute("SELECT stats FROM running_stats WHERE method=? AND language=?", (method, language))
+    row = c.fetchone()
+    accumulators = accumulators_from_json(row[0]) if row else new_accumulators()
+    add_records(accumulators, records)
+    c.execute("INSERT OR REPLACE INTO running_stats VALUES (?, ?, ?)",
+              (method, language, accumulators_to_json(accumulators)))
 
 def show_start_screen():
     """Show the start screen"""
@@ -1401,53 +1519,62 @@ def show_start_screen():
 def main():
     """Main game loop"""
     global current_language, current_input_method
-    init_db()
-    # Initial setup
-    if not select_input_method():
-        return
-    
-    running = True
-    game_state = 'menu'  # 'menu', 'playing', 'results'
+    try:
+        init_db()
+        # Initial setup
+        if not select_input_method():
+            return
+    
+        running = True
+        game_state = 'menu'  # 'menu', 'playing', 'results'
    
 
-    while running:
-        if game_state == 'menu':
-            show_start_screen()
+        while running:
+            if game_state == 'menu':
+                show_start_screen()
             
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
-                        game_state = 'playing'
-                    elif event.key == pygame.K_ESCAPE:
+                # Handle events
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
                         running = False
-                    elif event.key == pygame.K_l:
-                        new_lang = 'hindi' if current_language == 'english' else 'english'
-                        update_language(new_lang)
-                    elif event.key == pygame.K_m:
-                        if select_input_method():
-                            continue
-                        else:
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_SPACE:
+                            game_state = 'playing'
+                        elif event.key == pygame.K_ESCAPE:
                             running = False
-                    elif event.key == pygame.K_c:
-                        show_comparison()
-        
-        elif game_state == 'playing':
-            if play_game():
-                game_state = 'menu'
-            else:
-                running = False
+                        elif event.key == pygame.K_l:
+                            new_lang = 'hindi' if current_language == 'english' else 'english'
+                            update_language(new_lang)
+                        elif event.key == pygame.K_m:
+                            if select_input_method():
+                                continue
+                            else:
+                                running = False
+                        elif event.key == pygame.K_c:
+                            show_comparison()
+        
+            elif game_state == 'playing':
+                if play_game():
+                    game_state = 'menu'
+                else:
+                    running = False
         
-        clock.tick(60)
-   
-    # Cleanup
-    for handler in input_handlers.values():
-        if hasattr(handler, 'cleanup'):
-            handler.cleanup()
-    
-    pygame.quit()
+            clock.tick(60)
+    finally:
+        # Runs on every exit path, so prewarmed handlers, the landmark worker
+        # and the camera are released even when the first menu is closed
+        print(f"[CACHE] Text surfaces: {text_cache.stats()}")
+        print(f"[INPUT] Handlers: {input_handlers.stats()}")
+        _effects_pool.shutdown(wait=False, cancel_futures=True)
+        # Commit everything still queued before the process exits
+        db_writer.close()
+        input_handlers.shutdown()
+        for handler in input_handlers.values():
+            if hasattr(handler, 'cleanup'):
+                handler.cleanup()
+        shutdown_camera_service()
+    
+        pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
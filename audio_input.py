@@ -7,9 +7,12 @@ import os
 import sys
 import subprocess
 import json
-import tempfile
 import wave
 import io
+from timing import now_ns, estimate_speech_onset_ns
+from speech_backends import build_recognizer_chain
+from color_matcher import get_color_matcher
+from voice_stream import STREAM_AVAILABLE, MicrophoneStream, EnergyEndpointer, listen_for_utterance, audio_data_from_pcm
 
 # Ensure UTF-8 encoding for stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.detach(), encoding='utf-8')
@@ -24,7 +27,6 @@ print("=== Checking Available Audio Methods ===")
 try:
     import sounddevice as sd
     import numpy as np
-    import scipy.io.wavfile as wavfile
     audio_methods['sounddevice'] = True
     print("  Method 1: SoundDevice - Available")
 except ImportError as e:
@@ -108,19 +110,37 @@ def load_fonts():
 class AudioRecoVorder:
     """Audio recording class with multiple fallback methods"""
     def __init__(self):
-     self.temp_dir = tempfile.mkdtemp()
      self.sample_rate = 16000
      self.recording_duration = 8  # Reduced from 15 to 8 seconds
      self.microphone = None
+     self.stimulus_onset_ns = None  # set per trial by set_stimulus_onset()
      self.recognizer = recognizer
-     self.init_microphone()
-
-    def __del__(self):
-        try:
-            import shutil
-            shutil.rmtree(self.temp_dir, ignore_errors=True)
-        except:
-            pass
+     # Offline/online recognizers; models load here, not on the first trial
+     self.speech = build_recognizer_chain(self.recognizer)
+     self.speech.preload()
+     # Always-on microphone stream with VAD endpointing; the VAD tracks the
+     # noise floor continuously, so no per-trial ambient calibration is needed
+     self.endpointer = EnergyEndpointer()
+     self.stream = MicrophoneStream(sample_rate=self.sample_rate) if STREAM_AVAILABLE else None
+     if self.stream is not None and not self.stream.start():
+         self.stream = None
+     if self.stream is None:
+         self.init_microphone()
+
+    def set_stimulus_onset(self, onset_ns):
+        """
+        Onset of the stimulus the next get_input() answers
+
+        The streaming path reads the microphone buffer from this time, so
+        speech that starts before get_input() is called is not lost.
+        """
+        self.stimulus_onset_ns = onset_ns
+
+    def cleanup(self):
+        """Close the microphone stream and report per-backend recognition latency"""
+        if self.stream is not None:
+            self.stream.stop()
+        print(f"[SPEECH] Recognition latency: {self.speech.stats()}")
 
     def init_microphone(self):
         try:
@@ -159,48 +179,17 @@ class AudioRecoVorder:
         pygame.display.flip()
 
     def match_color(self, text, colors):
-        text_lower = text.lower().strip()
-        for i, color_data in enumerate(colors):
-            if isinstance(color_data, (list, tuple)):
-                color_name = color_data[0].lower()
-                if color_name in text_lower or text_lower in color_name:
-                    return i
-                if len(color_data) > 2 and isinstance(color_data[2], list):
-                    for alt in color_data[2]:
-                        if alt.lower() in text_lower or text_lower in alt.lower():
-                            return i
-            else:
-                if isinstance(color_data, str) and color_data.lower() in text_lower:
-                    return i
-        return None
+        """Colour index for recognised text (None if it names no colour)"""
+        index, confidence = get_color_matcher(colors).match(text)
+        return index
 
-    def get_input(self, colors, screen, ui_text, fonts):
-     fonts = load_fonts()  # Add this line
-     try:
-        # Fix fonts parameter - ensure it's a dictionary
-        if not isinstance(fonts, dict):
-            print(f"Warning: fonts parameter is not a dictionary: {type(fonts)}")
-            # Create default fonts if the parameter is invalid
-            fonts = {
-                'large': pygame.font.Font(None, 48),
-                'medium': pygame.font.Font(None, 36),
-                'small': pygame.font.Font(None, 24)
-            }
-        
-        # Ensure required font keys exist
-        # Ensure required font keys exist
-        if 'large' not in fonts:
-           fonts['large'] = pygame.font.Font(None, 48)
-        if 'medium' not in fonts:
-         fonts['medium'] = pygame.font.Font(None, 36)
-        if 'small' not in fonts:
-         fonts['small'] = pygame.font.Font(None, 24)
-        if not self.microphone:
-            self.init_microphone()
-            if not self.microphone:
-                return {'success': False, 'color_index': None, 'message': 'microphone_init_failed'}
-        
-        # Phase 1: Show "Get Ready" message
+    def _listen_once(self, screen, ui_text, fonts):
+        """
+        Fallback capture through sr.Microphone when no audio stream is available
+
+        Returns:
+            tuple: (audio, response_ns, None) or (None, None, failure result dict)
+        """
         # Phase 1: Show "Get Ready" message
         screen.fill((255, 255, 255)) 
         ready_text = fonts['large'].render("Get Ready!", True, (255, 100, 0))
@@ -232,51 +221,69 @@ class AudioRecoVorder:
                     timeout=3,  # Wait up to 3 seconds for speech to start
                     phrase_time_limit=self.recording_duration  # Allow full recording duration
                 )
+                capture_end_ns = now_ns()
                 print("Audio captured successfully!")
                 
             except sr.WaitTimeoutError:
                 print("Timeout - no speech detected")
-                return {'success': False, 'color_index': None, 'message': 'timeout'}
+                return None, None, {'success': False, 'color_index': None, 'message': 'timeout'}
             except Exception as e:
                 print(f"Error during audio capture: {e}")
-                return {'success': False, 'color_index': None, 'message': f'capture_error_{str(e)}'}
+                return None, None, {'success': False, 'color_index': None, 'message': f'capture_error_{str(e)}'}
+        
+        return audio, estimate_speech_onset_ns(capture_end_ns, audio, self.recognizer), None
+
+    def get_input(self, colors, screen, ui_text, fonts):
+     fonts = load_fonts()  # Add this line
+     try:
+        # Fix fonts parameter - ensure it's a dictionary
+        if not isinstance(fonts, dict):
+            print(f"Warning: fonts parameter is not a dictionary: {type(fonts)}")
+            # Create default fonts if the parameter is invalid
+            fonts = {
+                'large': pygame.font.Font(None, 48),
+                'medium': pygame.font.Font(None, 36),
+                'small': pygame.font.Font(None, 24)
+            }
+        
+        # Ensure required font keys exist
+        # Ensure required font keys exist
+        if 'large' not in fonts:
+           fonts['large'] = pygame.font.Font(None, 48)
+        if 'medium' not in fonts:
+         fonts['medium'] = pygame.font.Font(None, 36)
+        if 'small' not in fonts:
+         fonts['small'] = pygame.font.Font(None, 24)
+        # Build the colour grammar now rather than after the participant speaks
+        self.speech.warm_up(colors)
+        
+        if self.stream is not None:
+            # Streaming path: the microphone is already open and calibrated
+            self.show_recording_screen(screen, ui_text, fonts)
+            start_ns, self.stimulus_onset_ns = self.stimulus_onset_ns, None
+            utterance = listen_for_utterance(self.stream, self.endpointer, timeout=3,
+                                             phrase_time_limit=self.recording_duration, start_ns=start_ns)
+            if utterance is None:
+                print("Timeout - no speech detected")
+                return {'success': False, 'color_index': None, 'message': 'timeout'}
+            audio = utterance.audio
+            response_ns = utterance.onset_ns
+            print(f"Utterance endpointed {(now_ns() - utterance.end_ns) / 1e6:.0f} ms ago")
+        else:
+            if not self.microphone:
+                self.init_microphone()
+                if not self.microphone:
+                    return {'success': False, 'color_index': None, 'message': 'microphone_init_failed'}
+            audio, response_ns, failure = self._listen_once(screen, ui_text, fonts)
+            if failure:
+                return failure
         
         # Phase 4: Show processing screen
         self.show_processing_screen(screen, ui_text, fonts)
         
         # Recognition phase
-        recognized_text = None
-        recognition_methods = [
-            ('google', 'en-US'),
-            ('google', 'en-IN'),
-            ('google', 'en-GB'),
-        ]
-        
-        for method, language in recognition_methods:
-            try:
-                print(f"Trying recognition with {method} ({language})...")
-                if method == 'google':
-                    recognized_text = self.recognizer.recognize_google(
-                        audio,
-                        language=language,
-                        show_all=False
-                    )
-                elif method == 'sphinx':
-                    recognized_text = self.recognizer.recognize_sphinx(audio)
-                
-                if recognized_text:
-                    print(f"Recognition successful with {method} ({language}): '{recognized_text}'")
-                    break
-                    
-            except sr.UnknownValueError:
-                print(f"Could not understand audio with {method} ({language})")
-                continue
-            except sr.RequestError as e:
-                print(f"Recognition service error with {method}: {e}")
-                continue
-            except Exception as e:
-                print(f"Recognition error with {method}: {e}")
-                continue
+        recognized_text, backend_name = self.speech.recognize(
+            audio, colors, matcher=get_color_matcher(colors))
         
         if not recognized_text:
             return {'success': False, 'color_index': None, 'message': 'recognition_failed'}
@@ -284,12 +291,13 @@ class AudioRecoVorder:
         print(f"Final recognized text: '{recognized_text}'")
         
         # Color matching
-        color_index = self.match_color(recognized_text, colors)
+        color_index, confidence = get_color_matcher(colors).match(recognized_text)
         
         if color_index is not None:
             color_name = colors[color_index][0] if isinstance(colors[color_index], (list, tuple)) else str(colors[color_index])
             print(f"Successfully matched '{recognized_text}' to color '{color_name}' (index: {color_index})")
-            return {'success': True, 'color_index': color_index, 'message': f'recognized_{recognized_text}'}
+            return {'success': True, 'color_index': color_index, 'message': f'recognized_{recognized_text}',
+                    'response_ns': response_ns, 'confidence': confidence}
         else:
             print(f"No color match found for '{recognized_text}'")
             return {'success': False, 'color_index': None, 'message': f'no_match_{recognized_text}'}
@@ -300,6 +308,15 @@ class AudioRecoVorder:
         print(f"Audio input error: {e}")
         return {'success': False, 'color_index': None, 'message': f'error_{str(e)}'}
     
+    def record_stream(self):
+        """Cut the next utterance out of the running microphone stream (VAD endpointed)"""
+        if self.stream is None:
+            return None
+        print("Listening on microphone stream...")
+        utterance = listen_for_utterance(self.stream, self.endpointer, timeout=3,
+                                         phrase_time_limit=self.recording_duration)
+        return utterance.audio if utterance else None
+
     def record_sounddevice(self):
         """Record audio using SoundDevice library"""
         if not audio_methods.get('sounddevice'):
@@ -321,21 +338,9 @@ class AudioRecoVorder:
                 print("SoundDevice: Recording appears to be silence")
                 return None
             
-            # Save to temporary file
-            temp_file = os.path.join(self.temp_dir, "temp_sounddevice.wav")
-            wavfile.write(temp_file, self.sample_rate, recording)
-            
-            # Verify file was created and has content
-            if not os.path.exists(temp_file) or os.path.getsize(temp_file) < 1000:
-                print("SoundDevice: Audio file too small or doesn't exist")
-                return None
-            
-            print(f"SoundDevice: Created audio file of {os.path.getsize(temp_file)} bytes")
-            
-            # Read and return audio data
-            with sr.AudioFile(temp_file) as source:
-                audio = recognizer.record(source)
-                return audio
+            # Hand the int16 buffer to the recognizer directly (no WAV file)
+            print(f"SoundDevice: Captured {recording.nbytes} bytes")
+            return audio_data_from_pcm(recording, self.sample_rate)
                 
         except Exception as e:
             print(f"SoundDevice recording failed: {e}")
@@ -379,96 +384,49 @@ class AudioRecoVorder:
             return None
 
     def record_system(self):
-        """Record audio using system commands"""
+        """Record audio using system commands (raw PCM read from the command's stdout)"""
         try:
-            temp_file = os.path.join(self.temp_dir, "temp_system.wav")
-            
-            # Remove existing file
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-            
             print(f"Recording with system command for {self.recording_duration} seconds...")
+            duration = self.recording_duration
+            rate = self.sample_rate
             
-            # Try different system commands based on OS
+            # Every command writes signed 16-bit mono PCM to stdout, so nothing touches the disk
             if sys.platform.startswith('win'):
-                # Windows - use SoundRecorder or PowerShell
-                cmd = f'powershell -Command "Add-Type -AssemblyName System.Speech; $synth = New-Object System.Speech.Synthesis.SpeechSynthesizer; $synth.SetOutputToWaveFile(\'{temp_file}\'); $synth.Speak(\' \'); $synth.Dispose()"'
-                # Alternative: Use ffmpeg if available
-                cmd_ffmpeg = f'ffmpeg -f dshow -i audio="Microphone" -t {self.recording_duration} -ar {self.sample_rate} -ac 1 "{temp_file}"'
-                
-                try:
-                    result = subprocess.run(cmd_ffmpeg, shell=True, capture_output=True, timeout=self.recording_duration+5)
-                    if result.returncode == 0:
-                        cmd = cmd_ffmpeg
-                except:
-                    # Fallback to basic recording
-                    cmd = f'echo "Windows system recording not fully implemented" && timeout {self.recording_duration}'
-                
+                commands_to_try = [
+                    f'ffmpeg -loglevel error -f dshow -i audio="Microphone" -t {duration} -ar {rate} -ac 1 -f s16le -'
+                ]
             elif sys.platform.startswith('darwin'):  # macOS
-                # Use sox if available, otherwise try afplay/afrecord
-                cmd = f'sox -d -r {self.sample_rate} -c 1 -b 16 "{temp_file}" trim 0 {self.recording_duration}'
-                if subprocess.run(['which', 'sox'], capture_output=True).returncode != 0:
-                    # Fallback to ffmpeg
-                    cmd = f'ffmpeg -f avfoundation -i ":0" -t {self.recording_duration} -ar {self.sample_rate} -ac 1 "{temp_file}"'
-                
+                commands_to_try = [
+                    f'sox -q -d -r {rate} -c 1 -b 16 -e signed-integer -t raw - trim 0 {duration}',
+                    f'ffmpeg -loglevel error -f avfoundation -i ":0" -t {duration} -ar {rate} -ac 1 -f s16le -'
+                ]
             else:  # Linux
-                # Try multiple Linux audio recording methods
                 commands_to_try = [
-                    f'arecord -f S16_LE -r {self.sample_rate} -c 1 -d {self.recording_duration} "{temp_file}"',
-                    f'sox -d -r {self.sample_rate} -c 1 -b 16 "{temp_file}" trim 0 {self.recording_duration}',
-                    f'ffmpeg -f alsa -i default -t {self.recording_duration} -ar {self.sample_rate} -ac 1 "{temp_file}"',
-                    f'parecord --format=s16le --rate={self.sample_rate} --channels=1 --record-time={self.recording_duration} "{temp_file}"'
+                    f'arecord -q -f S16_LE -r {rate} -c 1 -d {duration} -t raw',
+                    f'sox -q -d -r {rate} -c 1 -b 16 -e signed-integer -t raw - trim 0 {duration}',
+                    f'ffmpeg -loglevel error -f alsa -i default -t {duration} -ar {rate} -ac 1 -f s16le -',
+                    f'parecord --raw --format=s16le --rate={rate} --channels=1 --record-time={duration}'
                 ]
-                
-                for cmd in commands_to_try:
-                    try:
-                        print(f"Trying: {cmd}")
-                        result = subprocess.run(cmd, shell=True, capture_output=True, timeout=self.recording_duration+5)
-                        if result.returncode == 0 and os.path.exists(temp_file) and os.path.getsize(temp_file) > 1000:
-                            print(f"Success with: {cmd}")
-                            break
-                    except Exception as e:
-                        print(f"Command failed: {e}")
-                        continue
-                else:
-                    print("All Linux recording commands failed")
-                    return None
             
-            if not sys.platform.startswith('linux'):  # For Windows and macOS
+            for cmd in commands_to_try:
                 try:
-                    print(f"Executing: {cmd}")
-                    result = subprocess.run(cmd, shell=True, capture_output=True, timeout=self.recording_duration+5)
-                    if result.returncode != 0:
-                        print(f"System command failed with return code: {result.returncode}")
-                        print(f"Error: {result.stderr.decode() if result.stderr else 'No error message'}")
-                        return None
+                    print(f"Trying: {cmd}")
+                    result = subprocess.run(cmd, shell=True, capture_output=True, timeout=duration + 5)
                 except subprocess.TimeoutExpired:
                     print("System recording command timed out")
-                    return None
+                    continue
                 except Exception as e:
-                    print(f"System command execution failed: {e}")
-                    return None
-            
-            # Check if file was created and has reasonable size
-            if not os.path.exists(temp_file):
-                print("System recording: Output file doesn't exist")
-                return None
-            
-            file_size = os.path.getsize(temp_file)
-            if file_size < 1000:  # Less than 1KB is probably empty
-                print(f"System recording: File too small ({file_size} bytes)")
-                return None
-            
-            print(f"System recording: Created file of {file_size} bytes")
+                    print(f"Command failed: {e}")
+                    continue
+                
+                # Less than 1KB is probably empty
+                if result.returncode == 0 and len(result.stdout) > 1000:
+                    print(f"System recording: Captured {len(result.stdout)} bytes with: {cmd}")
+                    return audio_data_from_pcm(result.stdout, rate)
+                print(f"System command failed with return code: {result.returncode}")
             
-            # Try to read the audio file
-            try:
-                with sr.AudioFile(temp_file) as source:
-                    audio = recognizer.record(source)
-                    return audio
-            except Exception as e:
-                print(f"Failed to read recorded audio file: {e}")
-                return None
+            print("All system recording commands failed")
+            return None
                 
         except Exception as e:
             print(f"System recording failed: {e}")
@@ -540,26 +498,13 @@ class AudioRecoVorder:
                 print("No audio data recorded")
                 return None
             
-            # Save to temporary file
-            temp_file = os.path.join(self.temp_dir, "temp_direct_pyaudio.wav")
-            wf = wave.open(temp_file, 'wb')
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(audio_interface.get_sample_size(FORMAT))
-            wf.setframerate(RATE)
-            wf.writeframes(b''.join(frames))
-            wf.close()
-            
-            # Verify file
-            if not os.path.exists(temp_file) or os.path.getsize(temp_file) < 1000:
-                print("Direct PyAudio: File too small or doesn't exist")
+            audio = audio_data_from_pcm(frames, RATE, audio_interface.get_sample_size(FORMAT))
+            if len(audio.frame_data) < 1000:
+                print("Direct PyAudio: Recording too short")
                 return None
             
-            print(f"Direct PyAudio: Created file of {os.path.getsize(temp_file)} bytes")
-            
-            # Read and return audio data
-            with sr.AudioFile(temp_file) as source:
-                audio = recognizer.record(source)
-                return audio
+            print(f"Direct PyAudio: Captured {len(audio.frame_data)} bytes")
+            return audio
                 
         except Exception as e:
             print(f"Direct PyAudio recording failed: {e}")
@@ -572,9 +517,14 @@ class AudioRecoVorder:
         else:
             # Try methods in order of reliability
             methods_to_try = ['pyaudio', 'sounddevice', 'direct_pyaudio', 'system']
+            # The always-on stream returns as soon as speech ends, so prefer it
+            if self.stream is not None:
+                methods_to_try.insert(0, 'stream')
         
         for method_name in methods_to_try:
-            if method_name == 'direct_pyaudio':
+            if method_name == 'stream':
+                pass
+            elif method_name == 'direct_pyaudio':
                 # Always try direct PyAudio if PyAudio is available
                 if not audio_methods.get('pyaudio'):
                     continue
@@ -584,7 +534,9 @@ class AudioRecoVorder:
             try:
                 print(f"\n--- Trying {method_name} ---")
                 
-                if method_name == 'sounddevice':
+                if method_name == 'stream':
+                    audio = self.record_stream()
+                elif method_name == 'sounddevice':
                     audio = self.record_sounddevice()
                 elif method_name == 'pyaudio':
                     audio = self.record_pyaudio()
@@ -608,97 +560,43 @@ class AudioRecoVorder:
         print("All recording methods failed!")
         return None, None
 
-# Create global audio recorder instance
-audio_recorder = AudioRecoVorder()
+# Global audio recorder instance, created on first use so importing this
+# module does not calibrate the microphone or load speech models
+audio_recorder = None
+
+def get_audio_recorder():
+    global audio_recorder
+    if audio_recorder is None:
+        audio_recorder = AudioRecoVorder()
+    return audio_recorder
 
 def match_color_hindi(spoken_text, colors):
-    """Enhanced Hindi color matching with better alternatives"""
-    spoken_lower = spoken_text.lower().strip()
-    print(f"Trying to match Hindi text: '{spoken_text}'")
-    
-    for i, color_data in enumerate(colors):
-        if len(color_data) >= 3:
-            color_name = color_data[0]
-            alternatives = color_data[2]
-            
-            # Check each alternative
-            for alt in alternatives:
-                alt_lower = alt.lower()
-                # Check if alternative is in spoken text or vice versa
-                if alt_lower in spoken_lower or spoken_lower in alt_lower:
-                    print(f"Matched '{spoken_text}' with '{color_name}' using alternative '{alt}'")
-                    return i
-                
-                # Also check for partial matches for Hindi
-                if len(alt_lower) >= 3 and len(spoken_lower) >= 3:
-                    if alt_lower[:3] in spoken_lower or spoken_lower[:3] in alt_lower:
-                        print(f"Partial match: '{spoken_text}' with '{color_name}' using alternative '{alt}'")
-                        return i
-    
-    print(f"No Hindi match found for: '{spoken_text}'")
-    return None
+    """Hindi color matching: exact words, transliterations, fuzzy and phonetic spellings"""
+    index, confidence = get_color_matcher(colors).match(spoken_text)
+    if index is None:
+        print(f"No Hindi match found for: '{spoken_text}'")
+    else:
+        print(f"Matched '{spoken_text}' with '{colors[index][0]}' (confidence {confidence:.2f})")
+    return index
 
 def match_color_english(spoken_text, colors):
-    spoken_lower = spoken_text.lower().strip()
-    for i, color_data in enumerate(colors):
-        if isinstance(color_data, (list, tuple)):
-            color_name = color_data[0]
-        else:
-            color_name = str(color_data)
-        if color_name.lower() in spoken_lower or spoken_lower in color_name.lower():
-            print(f"Matched '{spoken_text}' with '{color_name}'")
-            return i
-    return None
+    index, confidence = get_color_matcher(colors).match(spoken_text)
+    if index is not None:
+        print(f"Matched '{spoken_text}' with '{colors[index][0]}' (confidence {confidence:.2f})")
+    return index
 
 def record_and_recognize_audio(current_language, colors):
     global selected_method
     try:
-        audio, method_used = audio_recorder.record_audio(selected_method)
+        audio, method_used = get_audio_recorder().record_audio(selected_method)
         if not audio:
             print("Recording failed - no audio data")
             return None, "Recording failed - no audio captured"
         
         print("Audio recorded successfully, starting recognition...")
-        recognized_text = None
-        recognition_error = None
-        
-        if current_language == 'hindi':
-            recognition_configs = [
-                ('hi-IN', 'Google Hindi'),
-        ('en-IN', 'Google English-India'),  # Try English-India first for mixed words
-        ('hi', 'Google Hindi Short'),
-        ('en-US', 'Google US English'),
-            ]
-        else:
-            recognition_configs = [
-                ('en-US', 'Google US English'),
-                ('en-IN', 'Google English-India'),
-                ('en-GB', 'Google UK English'),
-            ]
-        
-        # Rest of the function remains the same...
-        for lang_code, desc in recognition_configs:
-            try:
-                print(f"Trying {desc} recognition...")
-                recognized_text = recognizer.recognize_google(
-                    audio,
-                    language=lang_code,
-                    show_all=False
-                )
-                print(f"  {desc} recognition successful: '{recognized_text}'")
-                break
-            except sr.UnknownValueError:
-                print(f"  {desc}: Could not understand audio")
-                recognition_error = "Could not understand speech"
-                continue
-            except sr.RequestError as e:
-                print(f"  {desc}: Request failed - {e}")
-                recognition_error = f"Recognition service error: {e}"
-                continue
-            except Exception as e:
-                print(f"  {desc}: Unexpected error - {e}")
-                recognition_error = f"Recognition error: {e}"
-                continue
+        # Locales run concurrently; the first whose text maps to a colour wins
+        recognized_text, recognition_error = audio_recorder.speech.recognize(
+            audio, colors, current_language, matcher=get_color_matcher(colors))
         if recognized_text:
             print(f"Final recognized text: '{recognized_text}'")
             if current_language == 'hindi':
@@ -783,7 +681,7 @@ def get_voice_input_with_visual_feedback(screen, ui_text, current_language, colo
     thread.start()
 
     # Show recording feedback with countdown
-    recording_duration = audio_recorder.recording_duration
+    recording_duration = get_audio_recorder().recording_duration
     
     while time.time() - recording_start < recording_duration:
         screen.fill((255, 100, 100))
@@ -853,7 +751,7 @@ def recording_thread():
     thread.start()
 
     # Show recording feedback and countdown
-    while time.time() - recording_start < audio_recorder.recording_duration:
+    while time.time() - recording_start < get_audio_recorder().recording_duration:
         screen.fill((255, 100, 100))
 
         # Show recording indicator
@@ -862,7 +760,7 @@ def recording_thread():
         screen.blit(recording_text, recording_rect)
 
         # Show countdown
-        remaining = audio_recorder.recording_duration - (time.time() - recording_start)
+        remaining = get_audio_recorder().recording_duration - (time.time() - recording_start)
         countdown_text = pygame.font.Font(None, 32).render(f"Time remaining: {remaining:.1f}s", True, (255, 255, 255))
         countdown_rect = countdown_text.get_rect(center=(screen.get_width()//2, screen.get_height()//2 + 50))
         screen.blit(countdown_text, countdown_rect)
@@ -1029,9 +927,7 @@ def set_selected_method(method):
     selected_method = method
 
 def initialize_audio():
-    global audio_recorder
-    if not audio_recorder:
-        audio_recorder = AudioRecoVorder()
+    get_audio_recorder()
     return True
 
 __all__ = [
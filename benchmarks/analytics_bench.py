@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Stroop analytics over a large trial history.
+
+Writes a synthetic trials table (ex-Gaussian RTs with an interference cost,
+fewer correct answers on incongruent trials) with the game's own schema and
+indexes (stroop_engine.TRIALS_SCHEMA) to a temporary SQLite file, then times load_trials() and stroop_tables() per participant and per
+method and language, with and without bootstrap CIs, and checks the
+recovered Stroop effect against the one simulated.
+
+Run from the repository root:
+    python benchmarks/analytics_bench.py [trials] [participants]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stroop_analytics import ANALYTICS_CONFIG, load_trials, stroop_tables
+from stroop_engine import LANGUAGES, METHODS, TRIAL_COLUMNS, TRIALS_SCHEMA
+
+INTERFERENCE = 0.08
+
+
+def write_history(path, trials, participants, seed=1):
+    rng = np.random.default_rng(seed)
+    per_session = 20
+    num_colors = 5
+    sessions = np.arange(trials) // per_session
+    congruent = rng.random(trials) < 0.5
+    rt = rng.normal(0.55, 0.08, trials) + rng.exponential(0.15, trials) + INTERFERENCE * ~congruent
+    correct = rng.random(trials) < np.where(congruent, 0.97, 0.9)
+    participant = rng.integers(0, participants, sessions[-1] + 1)[sessions]
+    method = sessions % len(METHODS)
+    language = (sessions // len(METHODS)) % len(LANGUAGES)
+    word = rng.integers(0, num_colors, trials)
+    ink = np.where(congruent, word, (word + rng.integers(1, num_colors, trials)) % num_colors)
+    answer = np.where(correct, ink, (ink + 1) % num_colors)
+    latency = np.maximum(rt, 0.15)
+    onset_ns = (np.arange(trials) * 3e9).astype(np.int64)
+    ts = 1.7e9 + np.arange(trials) * 3.0
+
+    # Same columns and indexes the game's init_db() creates
+    columns = {
+        'session_id': [f"s{s}" for s in sessions.tolist()],
+        'participant': [f"P{p:04d}" for p in participant.tolist()],
+        'method': [METHODS[m] for m in method.tolist()],
+        'language': [LANGUAGES[l] for l in language.tolist()],
+        'trial_number': (np.arange(trials) % per_session + 1).tolist(),
+        'word_index': word.tolist(),
+        'ink_index': ink.tolist(),
+        'congruent': congruent.astype(int).tolist(),
+        'answer_index': answer.tolist(),
+        'correct': correct.astype(int).tolist(),
+        'onset_ns': onset_ns.tolist(),
+        'response_ns': (onset_ns + (latency * 1e9).astype(np.int64)).tolist(),
+        'latency': latency.tolist(),
+        'ts': ts.tolist()
+    }
+    conn = sqlite3.connect(path)
+    for statement in TRIALS_SCHEMA:
+        conn.execute(statement)
+    conn.executemany(f"INSERT INTO trials ({', '.join(TRIAL_COLUMNS)}) "
+                     f"VALUES ({', '.join('?' * len(TRIAL_COLUMNS))})",
+                     zip(*(columns[column] for column in TRIAL_COLUMNS)))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    participants = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        write_history(path, trials, participants)
+
+        started = time.perf_counter()
+        data = load_trials(path)
+        loaded = time.perf_counter()
+        stroop_tables(data, config={'bootstrap': 0})
+        measured = time.perf_counter()
+        tables = stroop_tables(data)
+        done = time.perf_counter()
+
+    by_participant = tables[('participant',)]
+    resamples = ANALYTICS_CONFIG['bootstrap']
+    print(f"{trials} trials, {len(by_participant['keys'])} participants, "
+          f"{len(tables[('method', 'language')]['keys'])} method/language pairs")
+    print(f"  load_trials              {(loaded - started) * 1000:7.0f} ms")
+    print(f"  stroop_tables, no CIs    {(measured - loaded) * 1000:7.0f} ms "
+          f"(whole history: {(measured - started) * 1000:.0f} ms)")
+    print(f"  stroop_tables with CIs   {(done - measured) * 1000:7.0f} ms "
+          f"({resamples} resamples, {(done - measured) / (resamples * trials) * 1e9:.1f} ns per trial per resample)")
+
+    covered = np.mean((by_participant['ci_low'] <= INTERFERENCE) & (INTERFERENCE <= by_participant['ci_high']))
+    print(f"  simulated effect {INTERFERENCE * 1000:.0f} ms: mean per participant "
+          f"{np.nanmean(by_participant['interference']) * 1000:.1f} ms, "
+          f"95% CI covers it for {covered * 100:.1f}% of participants")
+
+
+if __name__ == '__main__':
+    main()
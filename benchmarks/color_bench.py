@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Frames/sec comparison for CameraInput.detect_color.
+
+Compares the original full-frame HSV conversion with one cv2.inRange pass per
+colour range against the ROI crop plus HSV lookup table classifier, and checks
+that both pick the same colour on every frame.
+
+Run from the repository root:  python benchmarks/color_bench.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from color_input import CameraInput
+
+FRAMES = 300
+WIDTH = 640
+HEIGHT = 480
+
+
+def legacy_detect_color(camera_input, frame):
+    """Original detect_color: full-frame cvtColor, inRange per range, np.sum per colour"""
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    height, width, _ = frame.shape
+
+    center_size = min(height, width) // 3
+    center_y = height // 2
+    center_x = width // 2
+
+    y1 = max(0, center_y - center_size // 2)
+    y2 = min(height, center_y + center_size // 2)
+    x1 = max(0, center_x - center_size // 2)
+    x2 = min(width, center_x + center_size // 2)
+
+    center_region = hsv[y1:y2, x1:x2]
+    total_pixels = center_region.shape[0] * center_region.shape[1]
+
+    color_ratios = {}
+    for color_name, color_info in camera_input.color_ranges.items():
+        total_mask = np.zeros(center_region.shape[:2], dtype=np.uint8)
+        for hsv_range in color_info['hsv_ranges']:
+            mask = cv2.inRange(center_region, hsv_range[0], hsv_range[1])
+            total_mask = cv2.bitwise_or(total_mask, mask)
+        color_ratios[color_name] = np.sum(total_mask > 0) / total_pixels
+
+    max_ratio = max(color_ratios.values())
+    if max_ratio >= camera_input.detection_threshold:
+        return max(color_ratios, key=color_ratios.get)
+    return None
+
+
+def make_frames(count):
+    """Noisy frames with a coloured patch of varying hue in the centre"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        frame = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+        hsv_patch = np.full((120, 120, 3), (i * 7 % 180, 80 + i % 176, 90 + i % 166), dtype=np.uint8)
+        patch = cv2.cvtColor(hsv_patch, cv2.COLOR_HSV2BGR)
+        frame[HEIGHT // 2 - 60:HEIGHT // 2 + 60, WIDTH // 2 - 60:WIDTH // 2 + 60] = patch
+        frames.append(frame)
+    return frames
+
+
+def time_frames(detect, frames):
+    results = []
+    start = time.perf_counter()
+    for frame in frames:
+        results.append(detect(frame))
+    return len(frames) / (time.perf_counter() - start), results
+
+
+def main():
+    started = time.perf_counter()
+    camera_input = CameraInput()
+    lut_build = time.perf_counter() - started
+    frames = make_frames(FRAMES)
+
+    legacy_fps, legacy_results = time_frames(lambda f: legacy_detect_color(camera_input, f), frames)
+    lut_fps, lut_results = time_frames(camera_input.detect_color, frames)
+
+    mismatches = sum(a != b for a, b in zip(legacy_results, lut_results))
+    detected = sum(r is not None for r in lut_results)
+    print(f"Lookup table built in {lut_build * 1000:.0f} ms")
+    print(f"Legacy inRange : {legacy_fps:8.0f} frames/s")
+    print(f"LUT classifier : {lut_fps:8.0f} frames/s  ({lut_fps / legacy_fps:.1f}x)")
+    print(f"{detected}/{FRAMES} frames detected a colour, {mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Headless StroopSession throughput.
+
+Plays simulated sessions (NullRenderer + SimulatedInput) across every
+method and language in one process and reports trials per second, plus the
+Stroop effect the simulated participants produced as a sanity check.
+
+Run from the repository root:
+    python benchmarks/engine_bench.py [sessions] [trials_per_session]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stroop_engine import LANGUAGES, METHODS, run_simulated_sessions, stroop_effect
+
+COLORS = [("red", (255, 0, 0)), ("green", (0, 255, 0)), ("blue", (0, 0, 255)),
+          ("yellow", (255, 255, 0)), ("pink", (255, 20, 147))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    total_questions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    started = time.perf_counter()
+    sessions, game_stats = run_simulated_sessions(count, COLORS, total_questions=total_questions, seed=1)
+    elapsed = time.perf_counter() - started
+
+    trials = sum(len(session.records) for session in sessions)
+    print(f"{count} sessions, {trials} trials in {elapsed:.2f}s: "
+          f"{trials / elapsed:,.0f} trials/s, {count / elapsed:,.0f} sessions/s")
+    for lang in LANGUAGES:
+        for method in METHODS:
+            stats = game_stats[lang][method]
+            effect = stroop_effect(stats['stroop_conflicts'], stats['non_conflicts'])
+            if effect is not None:
+                print(f"  {lang:<8} {method:<8} Stroop effect {effect * 1000:+6.0f} ms "
+                      f"over {stats['times'].count} trials, median RT {stats['times'].median * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Gesture confirmation latency vs false accepts on landmark traces.
+
+Replays landmark traces through the original rule (10 identical raw finger
+counts in a row) and through One-Euro smoothing + GestureStateMachine at
+several confirm thresholds. For every labelled gesture it reports the time
+from the gesture change to its confirmation, and every confirmation of a
+count that was not being shown counts as a false accept.
+
+Traces are .npz files written with STROOP_GESTURE_RECORD=path (see
+gesture_filter.save_trace). Traces without per-frame labels are labelled
+offline with a centred 15-frame median of the raw counts. With no files
+given, synthetic left- and right-hand traces with rotation, jitter, half-bent
+fingers, glitch frames and dropouts are used.
+
+Run from the repository root:
+    python benchmarks/gesture_filter_bench.py [trace.npz ...]
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gesture_filter import GESTURE_FILTER_CONFIG, GestureStateMachine, OneEuroFilter, load_trace
+from hand_landmarks import count_extended_fingers
+from timing import NS_PER_MS, NS_PER_SECOND
+
+FPS = 30
+REQUIRED_STABLE_FRAMES = 10  # Original rule
+THRESHOLDS = [0.8, 0.9, 0.95, 0.99]
+ONE_EURO_SETTINGS = [(1.5, 0.5), (8.0, 50.0)]  # (min_cutoff, beta)
+
+# Fingers extended for each count: 1 = index ... 4 = + pinky, 5 = + thumb
+FINGER_ORDER = [1, 2, 3, 4, 0]
+KNUCKLES = [(0.045, -0.18), (0.015, -0.19), (-0.015, -0.185), (-0.045, -0.17)]  # index..pinky, from the wrist
+FINGER_BONES = (0.07, 0.045, 0.035)
+THUMB_BASE, THUMB_BONES = (0.03, -0.03), (0.05, 0.04, 0.035)
+
+
+def _chain(start, direction, bones, curls):
+    """Landmarks along a finger: each bone turns by the next curl (degrees)"""
+    points, point = [], np.array(start, dtype=np.float32)
+    for bone, curl in zip(bones, curls):
+        direction += curl
+        point = point + bone * np.array([np.sin(np.radians(direction)), -np.cos(np.radians(direction))])
+        points.append(point)
+    return points
+
+
+def synthetic_hand(count, slack=0.0, rotation=0.0, left=False):
+    """
+    (21, 3) landmarks of a hand showing count fingers
+
+    slack (0..1) moves every joint angle towards the extended/folded boundary,
+    the way a relaxed hand does; rotation (degrees) turns the hand about the
+    wrist and left mirrors it.
+    """
+    hand = np.zeros((21, 3), dtype=np.float32)
+    extended = set(FINGER_ORDER[:count])
+
+    # Thumb: nearly straight, or folded across the palm
+    curls = [5 + 20 * slack] * 3 if 0 in extended else [-30, -50, -(60 - 15 * slack)]
+    hand[1, :2] = THUMB_BASE
+    hand[2:5, :2] = _chain(THUMB_BASE, 50.0, THUMB_BONES, curls)
+    for finger, knuckle in zip(range(1, 5), KNUCKLES):
+        base = 1 + 4 * finger
+        curls = [5 + 25 * slack] * 3 if finger in extended else [60, 100 - 40 * slack, 100 - 40 * slack]
+        hand[base, :2] = knuckle
+        hand[base + 1:base + 4, :2] = _chain(knuckle, 0.0, FINGER_BONES, curls)
+
+    angle = np.radians(rotation)
+    turn = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]], dtype=np.float32)
+    hand[:, :2] = hand[:, :2] @ turn.T
+    if left:
+        hand[:, 0] = -hand[:, 0]
+    hand[:, :2] += (0.5, 0.75)
+    return hand
+
+
+def synthetic_trace(rng, seconds=60, jitter=0.008, glitch_rate=0.05, dropout_rate=0.03, transition_frames=5,
+                    left=False):
+    """Random gesture sequence with transitions; labels are -1 during transitions"""
+    previous = synthetic_hand(0, left=left)
+    frames, labels = [previous] * FPS, [0] * FPS
+    while len(frames) < seconds * FPS:
+        count = int(rng.integers(0, 6))
+        target = synthetic_hand(count, slack=rng.uniform(0.0, 0.8), rotation=rng.uniform(-35, 35), left=left)
+        for step in range(1, transition_frames + 1):
+            frames.append(previous + (target - previous) * step / (transition_frames + 1))
+            labels.append(-1)
+        for _ in range(int(rng.uniform(1.0, 2.0) * FPS)):
+            frames.append(target.copy())
+            labels.append(count)
+        previous = target
+
+    landmarks = np.stack(frames) + rng.normal(0, jitter, (len(frames), 21, 3)).astype(np.float32)
+    for t in np.flatnonzero(rng.random(len(frames)) < glitch_rate):
+        tip = int(rng.choice([4, 8, 12, 16, 20]))
+        landmarks[t, tip, :2] += rng.normal(0, 0.12, 2)
+    landmarks[rng.random(len(frames)) < dropout_rate] = np.nan
+    frame_ns = np.arange(len(frames), dtype=np.int64) * (NS_PER_SECOND // FPS)
+    return frame_ns, landmarks.astype(np.float32), np.array(labels), 1.0
+
+
+def raw_counts(landmarks, aspect):
+    return count_extended_fingers(landmarks, aspect)
+
+
+def median_labels(landmarks, aspect, radius=7):
+    counts = raw_counts(landmarks, aspect)
+    padded = np.pad(counts, radius, mode='edge')
+    return np.array([int(np.median(padded[t:t + 2 * radius + 1])) for t in range(len(counts))])
+
+
+def replay_original(frame_ns, landmarks, aspect):
+    """Confirmation frames of the original 10-identical-frames rule"""
+    confirmations = []
+    stable_count, stable_frames, current = 0, 0, 0
+    for t, count in enumerate(raw_counts(landmarks, aspect)):
+        if count == stable_count:
+            stable_frames += 1
+        else:
+            stable_count, stable_frames = count, 0
+        if stable_frames >= REQUIRED_STABLE_FRAMES and count != current:
+            current = count
+            confirmations.append((t, count))
+    return confirmations
+
+
+def replay_filtered(frame_ns, landmarks, aspect, **config):
+    """Confirmation frames of (optional) smoothing + GestureStateMachine, as GestureInput runs them"""
+    config = dict(GESTURE_FILTER_CONFIG, **config)
+    landmark_filter = OneEuroFilter(config['min_cutoff'], config['beta']) if config['min_cutoff'] else None
+    machine = GestureStateMachine(config['stay_probability'], config['observation_accuracy'],
+                                  config['confirm_threshold'])
+    confirmations = []
+    for t, (frame, ns) in enumerate(zip(landmarks, frame_ns)):
+        if np.isnan(frame).any():
+            if landmark_filter is not None:
+                landmark_filter.reset()
+            count = 0
+        elif landmark_filter is not None:
+            count = int(count_extended_fingers(landmark_filter.filter(frame, ns / NS_PER_SECOND), aspect))
+        else:
+            count = int(count_extended_fingers(frame, aspect))
+        if machine.update(count, int(ns)):
+            confirmations.append((t, machine.confirmed))
+    return confirmations
+
+
+def score(frame_ns, labels, confirmations):
+    """
+    Returns:
+        tuple: (latencies in ms, gestures missed, false accepts)
+    """
+    # Segments of constant label; a transition (-1) belongs to the segment after it
+    segments = []
+    start = 0
+    for t in range(1, len(labels) + 1):
+        if t == len(labels) or (labels[t] != labels[t - 1] and labels[t - 1] != -1):
+            label = labels[t - 1]
+            segments.append((start, t, label))
+            start = t
+    confirmed_at = dict(confirmations)
+
+    latencies, missed, false_accepts = [], 0, 0
+    previous_label = None
+    for start, end, label in segments:
+        hit = None
+        for t in range(start, end):
+            count = confirmed_at.get(t)
+            if count is None:
+                continue
+            if count == label:
+                hit = t if hit is None else hit
+            elif not (labels[t] == -1 and count == previous_label):
+                false_accepts += 1
+        if label != previous_label:
+            if hit is None:
+                missed += 1
+            else:
+                latencies.append((frame_ns[hit] - frame_ns[start]) / NS_PER_MS)
+        previous_label = label
+    return latencies, missed, false_accepts
+
+
+def report(name, results, minutes):
+    latencies = [latency for result in results for latency in result[0]]
+    missed = sum(result[1] for result in results)
+    false_accepts = sum(result[2] for result in results)
+    print(f"{name:<36} {np.mean(latencies):8.0f} {np.percentile(latencies, 90):8.0f} "
+          f"{missed:7d} {false_accepts / minutes:12.2f}")
+
+
+def main():
+    if len(sys.argv) > 1:
+        traces = []
+        for path in sys.argv[1:]:
+            frame_ns, landmarks, labels, aspect = load_trace(path)
+            if labels is None:
+                labels = median_labels(landmarks, aspect)
+            traces.append((frame_ns, landmarks, labels, aspect))
+    else:
+        rng = np.random.default_rng(7)
+        traces = [synthetic_trace(rng, left=i % 2 == 1) for i in range(6)]
+    minutes = sum((trace[0][-1] - trace[0][0]) / NS_PER_SECOND / 60 for trace in traces)
+    gestures = sum(score(trace[0], trace[2], [])[1] for trace in traces)  # all missed with no confirmations
+    print(f"{len(traces)} traces, {minutes:.1f} min, {gestures} gesture changes")
+    print(f"{'rule':<36} {'mean ms':>8} {'p90 ms':>8} {'missed':>7} {'false/min':>12}")
+
+    report(f"original ({REQUIRED_STABLE_FRAMES} identical frames)",
+           [score(f, l, replay_original(f, lm, a)) for f, lm, l, a in traces], minutes)
+    for threshold in THRESHOLDS:
+        report(f"posterior >= {threshold}, raw",
+               [score(f, l, replay_filtered(f, lm, a, confirm_threshold=threshold, min_cutoff=None))
+                for f, lm, l, a in traces], minutes)
+        for min_cutoff, beta in ONE_EURO_SETTINGS:
+            report(f"posterior >= {threshold}, 1-euro {min_cutoff}/{beta}",
+                   [score(f, l, replay_filtered(f, lm, a, confirm_threshold=threshold,
+                                                min_cutoff=min_cutoff, beta=beta))
+                    for f, lm, l, a in traces], minutes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+QR decode latency and hit rate: full-frame detectAndDecode vs QRScanner.
+
+Frames come from a folder of recorded images (read in name order, as a
+stream) or, with no folder, from a synthetic clip: the reference codes in
+qrs/ moving, rotating and blurred over a textured 640x480 background, with
+gaps where no code is shown. For recorded frames the payload either method
+decoded is taken as ground truth.
+
+Run from the repository root:
+    python benchmarks/qr_bench.py [frames_folder]
+"""
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_scanner import QRScanner
+
+QR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'qrs')
+COLORS = ['red', 'green', 'blue', 'yellow', 'pink']
+WIDTH, HEIGHT = 640, 480
+
+
+def synthetic_clip(rng, frames_per_code=60, gap_frames=20):
+    """(frame, expected payload or '') pairs"""
+    background = cv2.GaussianBlur(rng.integers(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8), (21, 21), 0)
+    clip = []
+    for color in COLORS:
+        code = cv2.imread(os.path.join(QR_DIR, f"qr_{color}.jpg"))
+        if code is None:
+            continue
+        size = int(rng.integers(110, 200))
+        start = rng.uniform((0, 0), (WIDTH - size * 1.5, HEIGHT - size * 1.5))
+        velocity = rng.uniform(-2.0, 2.0, 2)
+        for i in range(frames_per_code):
+            x, y = np.clip(start + velocity * i, 0, (WIDTH - size * 1.5, HEIGHT - size * 1.5))
+            angle = 8 * np.sin(i / 10)
+            scaled = cv2.resize(code, (size, size))
+            matrix = cv2.getRotationMatrix2D((size / 2, size / 2), angle, 1.0)
+            matrix[:, 2] += (x, y)
+            frame = background.copy()
+            cv2.warpAffine(scaled, matrix, (WIDTH, HEIGHT), dst=frame, borderMode=cv2.BORDER_TRANSPARENT)
+            frame = cv2.GaussianBlur(frame, (3, 3), 0)
+            noise = rng.normal(0, 6, frame.shape)
+            clip.append((np.clip(frame + noise, 0, 255).astype(np.uint8), color))
+        clip.extend((background.copy(), '') for _ in range(gap_frames))
+    return clip
+
+
+def recorded_clip(folder):
+    paths = sorted(glob.glob(os.path.join(folder, '*.jpg')) + glob.glob(os.path.join(folder, '*.png')))
+    return [(cv2.imread(path), None) for path in paths]
+
+
+def run(clip, decode):
+    """Per-frame (seconds, payload) for a decode function"""
+    results = []
+    for frame, _ in clip:
+        started = time.perf_counter()
+        payload = decode(frame)
+        results.append((time.perf_counter() - started, payload.strip().lower()))
+    return results
+
+
+def main():
+    if len(sys.argv) > 1:
+        clip = recorded_clip(sys.argv[1])
+    else:
+        clip = synthetic_clip(np.random.default_rng(5))
+    if not clip:
+        print("No frames")
+        return
+
+    detector = cv2.QRCodeDetector()
+    scanner = QRScanner()
+    methods = {
+        'full-frame detectAndDecode': run(clip, lambda frame: detector.detectAndDecode(frame)[0]),
+        'QRScanner (downscale + ROI)': run(clip, lambda frame: scanner.scan(frame)[0])
+    }
+
+    # Ground truth: known payloads, or for recorded frames whatever either method read
+    truth = [expected if expected is not None else next((r[i][1] for r in methods.values() if r[i][1]), '')
+             for i, (_, expected) in enumerate(clip)]
+    with_code = sum(1 for payload in truth if payload)
+    print(f"{len(clip)} frames, {with_code} showing a code")
+    print(f"{'method':<30} {'mean ms':>8} {'p90 ms':>8} {'hit rate':>9} {'wrong':>6}")
+    for name, results in methods.items():
+        times = np.array([seconds for seconds, _ in results]) * 1000
+        hits = sum(1 for (_, payload), expected in zip(results, truth) if expected and payload == expected)
+        wrong = sum(1 for (_, payload), expected in zip(results, truth) if payload and payload != expected)
+        print(f"{name:<30} {times.mean():8.2f} {np.percentile(times, 90):8.2f} "
+              f"{hits / max(with_code, 1):9.1%} {wrong:6d}")
+    print(f"Scanner: {scanner.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Frame-time comparison for the game screen background layers.
+
+Compares the original per-row gradient drawing and per-frame particle trig
+against the baked gradient cache and the precomputed particle table.
+
+Run from the repository root:  python benchmarks/render_bench.py
+"""
+import math
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from render_cache import GradientCache, ParticleField
+
+SCREEN_WIDTH = 1000
+SCREEN_HEIGHT = 600
+PRIMARY = (70, 130, 180)
+SECONDARY = (100, 149, 237)
+DARK_BG = (30, 30, 50)
+GAME_BG = (245, 245, 250)
+FRAMES = 300
+
+
+def legacy_gradient_rect(surface, start_color, end_color, rect, vertical=True):
+    """Original draw_gradient_rect: one draw.line per pixel row"""
+    if vertical:
+        for y in range(rect.height):
+            ratio = y / rect.height
+            r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
+            g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
+            b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
+            pygame.draw.line(surface, (r, g, b), (rect.x, rect.y + y), (rect.x + rect.width, rect.y + y))
+    else:
+        for x in range(rect.width):
+            ratio = x / rect.width
+            r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
+            g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
+            b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
+            pygame.draw.line(surface, (r, g, b), (rect.x + x, rect.y), (rect.x + x, rect.y + rect.height))
+
+
+def legacy_background(surface, time_offset):
+    """Original draw_animated_background: trig for 20 particles per frame"""
+    surface.fill(GAME_BG)
+    for i in range(20):
+        x = (160 + i * 48 + math.sin(time_offset + i) * 24) % SCREEN_WIDTH
+        y = (160 + i * 48 + math.cos(time_offset + i) * 24) % SCREEN_HEIGHT
+        size = 3 + math.sin(time_offset + i * 0.3) * 2
+        pygame.draw.circle(surface, PRIMARY, (int(x), int(y)), int(size))
+
+
+LAYER_RECTS = [
+    (pygame.Rect(0, 0, SCREEN_WIDTH, 80), DARK_BG, PRIMARY),                    # status bar
+    (pygame.Rect(0, 15, SCREEN_WIDTH, 100), PRIMARY, SECONDARY),                # menu title
+    (pygame.Rect(200, 200, SCREEN_WIDTH - 400, SCREEN_HEIGHT - 400), PRIMARY, SECONDARY),  # countdown
+    (pygame.Rect(100, 100, SCREEN_WIDTH - 200, SCREEN_HEIGHT - 200), (255, 255, 255), (240, 248, 255)),
+]
+
+
+def run_legacy(screen):
+    t = 0.0
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        t += 0.1
+        legacy_background(screen, t)
+        for rect, start_color, end_color in LAYER_RECTS:
+            legacy_gradient_rect(screen, start_color, end_color, rect)
+    return (time.perf_counter() - start) / FRAMES
+
+
+def run_cached(screen):
+    build_start = time.perf_counter()
+    gradients = GradientCache()
+    particles = ParticleField(SCREEN_WIDTH, SCREEN_HEIGHT, PRIMARY)
+    for rect, start_color, end_color in LAYER_RECTS:
+        gradients.get(start_color, end_color, rect.size)
+    build_time = time.perf_counter() - build_start
+
+    t = 0.0
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        t += 0.1
+        screen.fill(GAME_BG)
+        particles.draw(screen, t)
+        for rect, start_color, end_color in LAYER_RECTS:
+            gradients.blit(screen, start_color, end_color, rect)
+    return (time.perf_counter() - start) / FRAMES, build_time
+
+
+def check_identical(screen):
+    """Baked gradients must match the per-row version pixel for pixel"""
+    reference = pygame.Surface(screen.get_size())
+    baked = pygame.Surface(screen.get_size())
+    gradients = GradientCache()
+    for vertical in (True, False):
+        for rect, start_color, end_color in LAYER_RECTS:
+            inner = pygame.Rect(0, 0, rect.width, rect.height)
+            legacy_gradient_rect(reference, start_color, end_color, inner, vertical)
+            gradients.blit(baked, start_color, end_color, inner, vertical)
+            for x, y in ((0, 0), (inner.width // 2, inner.height // 2), (inner.width - 1, inner.height - 1)):
+                if reference.get_at((x, y)) != baked.get_at((x, y)):
+                    return False
+    return True
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    legacy = run_legacy(screen)
+    cached, build_time = run_cached(screen)
+
+    print(f"Frames per run:          {FRAMES}")
+    print(f"Legacy frame time:       {legacy * 1000:.3f} ms")
+    print(f"Cached frame time:       {cached * 1000:.3f} ms")
+    print(f"Speed-up:                {legacy / cached:.1f}x")
+    print(f"One-off layer bake time: {build_time * 1000:.2f} ms")
+    print(f"Gradients identical:     {check_identical(screen)}")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
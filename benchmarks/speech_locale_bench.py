@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Recognition latency with sequential vs concurrent locale fallback.
+
+Uses StandInRecognizer in place of the Google Web Speech API, so it runs
+offline: each locale answers after a fixed delay, and only some of them
+return a colour word. The sequential loop is the original
+record_and_recognize_audio behaviour; the concurrent one is GoogleBackend.
+
+Run from the repository root:  python benchmarks/speech_locale_bench.py
+"""
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+from color_matcher import ColorMatcher
+from speech_backends import GOOGLE_LOCALES, GoogleBackend, StandInRecognizer
+
+TRIALS = 10
+HINDI_COLORS = ["लाल", "हरा", "नीला", "पीला", "गुलाबी"]
+
+# (text, seconds) per locale; typical mis-hearings first, the colour word last
+SCENARIOS = {
+    'hindi, colour only understood by en-US': {
+        'hi-IN': (None, 0.45), 'en-IN': ("kneel a", 0.40), 'hi': (None, 0.35), 'en-US': ("नीला", 0.50)
+    },
+    'hindi, first locale succeeds': {
+        'hi-IN': ("नीला", 0.45), 'en-IN': ("neela", 0.40), 'hi': (None, 0.35), 'en-US': (None, 0.50)
+    },
+}
+
+
+MATCHER = ColorMatcher(HINDI_COLORS)
+
+
+def sequential(recognizer, audio):
+    """Original loop: one locale after another until one returns text"""
+    for locale in GOOGLE_LOCALES['hindi']:
+        try:
+            text = recognizer.recognize_google(audio, language=locale)
+            if MATCHER.match(text)[0] is not None:
+                return text
+        except sr.UnknownValueError:
+            continue
+    return None
+
+
+def main():
+    audio = sr.AudioData(b'\0\0' * 1600, 16000, 2)
+    for name, responses in SCENARIOS.items():
+        recognizer = StandInRecognizer(responses)
+        backend = GoogleBackend(recognizer)
+
+        started = time.perf_counter()
+        for _ in range(TRIALS):
+            sequential(recognizer, audio)
+        sequential_ms = (time.perf_counter() - started) / TRIALS * 1000
+
+        started = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for _ in range(TRIALS):
+                backend.recognize(audio, 'hindi', HINDI_COLORS, MATCHER)
+        concurrent_ms = (time.perf_counter() - started) / TRIALS * 1000
+
+        print(f"{name}")
+        print(f"  sequential : {sequential_ms:6.0f} ms/trial")
+        print(f"  concurrent : {concurrent_ms:6.0f} ms/trial")
+        for locale, entry in backend.stats()['locales'].items():
+            print(f"    {locale:6s} {entry['mean_ms']:6.0f} ms  match rate {entry['match_rate']:.2f}  {entry['histogram']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Camera preview drawn inside the game window.
+
+Detection loops hand their newest frame, plus what to draw over it, to
+CameraPreview.update(), which only keeps a reference. The pygame loop calls
+draw(), which converts a frame at most max_fps times a second: one
+cv2.resize and one cv2.cvtColor into a preallocated RGB buffer that a pygame
+Surface wraps through pygame.image.frombuffer, so pygame never copies the
+pixels. This replaces the separate OpenCV HighGUI window and the
+imshow/waitKey pair it needed on every detection frame.
+"""
+import cv2
+import numpy as np
+import pygame
+
+from hand_landmarks import HAND_CONNECTIONS
+from timing import now_ns, NS_PER_SECOND
+
+
+class CameraPreview:
+    """Latest camera frame shown in a corner of the pygame screen"""
+
+    def __init__(self, size=(240, 180), max_fps=15):
+        """
+        Args:
+            size: (width, height) of the preview on screen
+            max_fps: Highest rate at which a new frame is converted
+        """
+        self.size = tuple(size)
+        self.min_interval_ns = NS_PER_SECOND // max_fps
+        width, height = self.size
+        self._scaled = np.empty((height, width, 3), dtype=np.uint8)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self._surface = pygame.image.frombuffer(self._rgb, self.size, 'RGB')  # shares self._rgb
+        self._pending = None
+        self._overlay = None
+        self._text = []
+        self._has_frame = False
+        self._last_refresh_ns = 0
+        self._font = None
+
+        # Diagnostics
+        self.frames_offered = 0
+        self.frames_shown = 0
+
+    def update(self, frame, overlay=None):
+        """
+        Offer a new frame; cheap enough to call from a detection thread
+
+        Args:
+            frame: BGR frame; must not be modified afterwards
+            overlay: Optional dict with any of
+                'box': ((x1, y1, x2, y2) in 0..1 frame fractions, rgb)
+                'polygon': ([(x, y), ...] in 0..1 frame fractions, rgb)
+                'landmarks': (21, 3) normalised hand landmarks
+                'lines': [(text, rgb), ...] drawn top-left
+        """
+        self._pending = (frame, overlay)
+        self.frames_offered += 1
+
+    def clear(self):
+        """Forget the shown frame (e.g. when the camera stops)"""
+        self._pending = None
+        self._has_frame = False
+
+    def default_position(self, screen, margin=10):
+        """Top-right corner of the screen"""
+        return (screen.get_width() - self.size[0] - margin, margin)
+
+    def draw(self, screen, position=None):
+        """
+        Blit the preview, converting the newest frame if the refresh interval has passed
+
+        Args:
+            screen: Pygame screen
+            position: Top-left corner (defaults to the top-right of the screen)
+
+        Returns:
+            pygame.Rect: Area drawn (for pygame.display.update), or None before the first frame
+        """
+        pending = self._pending
+        now = now_ns()
+        if pending is not None and now - self._last_refresh_ns >= self.min_interval_ns:
+            self._pending = None
+            frame, self._overlay = pending
+            cv2.resize(frame, self.size, dst=self._scaled, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._scaled, cv2.COLOR_BGR2RGB, dst=self._rgb)
+            self._text = self._render_lines(self._overlay)
+            self._last_refresh_ns = now
+            self._has_frame = True
+            self.frames_shown += 1
+
+        if not self._has_frame:
+            return None
+        rect = screen.blit(self._surface, position or self.default_position(screen))
+        if self._overlay:
+            self._draw_overlay(screen, rect, self._overlay)
+        for i, text_surface in enumerate(self._text):
+            screen.blit(text_surface, (rect.x + 4, rect.y + 4 + i * 16))
+        pygame.draw.rect(screen, (0, 0, 0), rect, 2)
+        return rect
+
+    def _render_lines(self, overlay):
+        if not overlay or not overlay.get('lines'):
+            return []
+        if self._font is None:
+            self._font = pygame.font.Font(None, 20)
+        return [self._font.render(text, True, color, (0, 0, 0)) for text, color in overlay['lines']]
+
+    def _draw_overlay(self, screen, rect, overlay):
+        def point(x, y):
+            return (rect.x + int(x * rect.width), rect.y + int(y * rect.height))
+
+        if overlay.get('box'):
+            (x1, y1, x2, y2), color = overlay['box']
+            pygame.draw.rect(screen, color, pygame.Rect(point(x1, y1), (int((x2 - x1) * rect.width),
+                                                                        int((y2 - y1) * rect.height))), 2)
+        if overlay.get('polygon'):
+            points, color = overlay['polygon']
+            if len(points) >= 3:
+                pygame.draw.polygon(screen, color, [point(x, y) for x, y in points], 2)
+        landmarks = overlay.get('landmarks')
+        if landmarks is not None and len(landmarks):
+            points = [point(x, y) for x, y, _ in landmarks]
+            for start, end in HAND_CONNECTIONS:
+                pygame.draw.line(screen, (224, 224, 224), points[start], points[end], 2)
+            for p in points:
+                pygame.draw.circle(screen, (255, 0, 0), p, 2)
+
+    def stats(self):
+        return {'frames_offered': self.frames_offered, 'frames_shown': self.frames_shown}
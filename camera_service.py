@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import deque
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+from timing import now_ns
+
+
+class CameraService:
+    """
+    Process-wide webcam capture shared by the gesture, colour and QR handlers
+
+    The device is opened once per session. A grabber thread keeps the most
+    recent frames in a small ring buffer and every detector reads from its own
+    subscription. Frames are handed out without copying, so subscribers must
+    treat them as read-only (cv2.flip/cvtColor already return new arrays).
+    """
+
+    def __init__(self, camera_indices=(0, 1, 2, -1), width=640, height=480, fps=30, buffer_size=4):
+        self.camera_indices = camera_indices
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.camera_index = None
+
+        self._cap = None
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._frames = deque(maxlen=buffer_size)  # (sequence, frame_ns, frame)
+        self._sequence = 0
+        self._subscribers = 0
+
+        # Diagnostics
+        self.start_time = None
+        self.frames_grabbed = 0
+        self.read_failures = 0
+
+    def start(self):
+        """Open the camera and start the grabber thread (no-op if already running)"""
+        if not CV2_AVAILABLE:
+            print("[CAMERA] OpenCV not available")
+            return False
+
+        with self._start_lock:
+            if self._running:
+                return True
+            return self._start()
+
+    def _start(self):
+        started = time.perf_counter()
+        cap = None
+        for index in self.camera_indices:
+            cap = self._open(index)
+            if cap is not None:
+                self.camera_index = index
+                break
+
+        if cap is None:
+            print("[CAMERA] ERROR: No working camera found!")
+            return False
+
+        with self._lock:
+            self._cap = cap
+            self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, name="camera-grabber", daemon=True)
+        self._thread.start()
+
+        self.start_time = time.perf_counter() - started
+        print(f"[CAMERA] Camera {self.camera_index} started in {self.start_time:.2f}s")
+        return True
+
+    def _open(self, index):
+        """Open one camera index and check that it delivers a frame"""
+        try:
+            cap = cv2.VideoCapture(index)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            if cap.isOpened():
+                # Some drivers need a few reads before the first frame arrives
+                for _ in range(10):
+                    ret, frame = cap.read()
+                    if ret and frame is not None and frame.size > 0:
+                        return cap
+                    time.sleep(0.05)
+            print(f"[CAMERA] Camera {index} failed to deliver frames")
+            cap.release()
+        except Exception as e:
+            print(f"[CAMERA] Error opening camera {index}: {e}")
+        return None
+
+    def _grab_loop(self):
+        cap = self._cap
+        consecutive_failures = 0
+        while self._running:
+            ret, frame = cap.read()
+            frame_ns = now_ns()
+            if not ret or frame is None:
+                self.read_failures += 1
+                consecutive_failures += 1
+                if consecutive_failures >= 50:
+                    print("[CAMERA] Too many consecutive read failures, stopping")
+                    break
+                time.sleep(0.02)
+                continue
+
+            consecutive_failures = 0
+            with self._new_frame:
+                self._sequence += 1
+                self._frames.append((self._sequence, frame_ns, frame))
+                self.frames_grabbed += 1
+                self._new_frame.notify_all()
+
+        # Release the device on the way out (also when giving up after read
+        # failures), unless stop() has already taken it
+        with self._new_frame:
+            self._running = False
+            owned = self._cap is cap
+            if owned:
+                self._cap = None
+            self._new_frame.notify_all()
+        if owned:
+            cap.release()
+
+    def _release_cap(self):
+        with self._lock:
+            cap, self._cap = self._cap, None
+        if cap is not None:
+            cap.release()
+
+    def is_available(self):
+        """
+        Check for a working camera without starting the grabber
+
+        Returns True at once when the service is running; otherwise opens the
+        first camera index that answers and releases it again.
+        """
+        if not CV2_AVAILABLE:
+            return False
+        if self._running:
+            return True
+        with self._start_lock:
+            for index in self.camera_indices:
+                cap = cv2.VideoCapture(index)
+                try:
+                    if cap.isOpened():
+                        return True
+                finally:
+                    cap.release()
+        return False
+
+    def is_running(self):
+        return self._running
+
+    def latest(self):
+        """Return (sequence, frame_ns, frame) for the newest frame, or None"""
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def wait_for_frame(self, after_sequence, timeout=1.0):
+        """Block until a frame newer than after_sequence exists and return it"""
+        with self._new_frame:
+            self._new_frame.wait_for(
+                lambda: not self._running or (self._frames and self._frames[-1][0] > after_sequence),
+                timeout)
+            if self._frames and self._frames[-1][0] > after_sequence:
+                return self._frames[-1]
+        return None
+
+    def subscribe(self):
+        """Return a new subscription, starting the camera if needed"""
+        if not self.start():
+            return None
+        with self._lock:
+            self._subscribers += 1
+        return CameraSubscription(self)
+
+    def _unsubscribe(self):
+        with self._lock:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    def stop(self):
+        """Stop grabbing and release the device (end of session)"""
+        self._running = False
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        self._release_cap()
+        self._frames.clear()
+
+    def stats(self):
+        return {
+            'camera_index': self.camera_index,
+            'start_time': self.start_time,
+            'frames_grabbed': self.frames_grabbed,
+            'read_failures': self.read_failures,
+            'subscribers': self._subscribers
+        }
+
+
+class CameraSubscription:
+    """A detector's view of the shared camera, read like a cv2.VideoCapture"""
+
+    def __init__(self, service):
+        self.service = service
+        self.last_sequence = 0
+        self.closed = False
+
+    def isOpened(self):
+        return not self.closed and self.service.is_running()
+
+    def read_with_time(self, timeout=1.0):
+        """Return (ret, frame, frame_ns) for the next frame this subscriber has not seen"""
+        if self.closed:
+            return False, None, None
+        entry = self.service.wait_for_frame(self.last_sequence, timeout)
+        if entry is None:
+            return False, None, None
+        self.last_sequence, frame_ns, frame = entry
+        return True, frame, frame_ns
+
+    def read(self, timeout=1.0):
+        ret, frame, _ = self.read_with_time(timeout)
+        return ret, frame
+
+    def release(self):
+        """Close this subscription; the camera itself stays open for the session"""
+        if not self.closed:
+            self.closed = True
+            self.service._unsubscribe()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_camera_service():
+    """Return the process-wide CameraService"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CameraService()
+        return _service
+
+
+def shutdown_camera_service():
+    """Release the shared camera if it was ever started"""
+    with _service_lock:
+        if _service is not None:
+            _service.stop()
@@ -2,6 +2,7 @@ import pygame
 import pygame.freetype
 import time
 import os
+from timing import event_time_ns
 
 # Test script to check Hindi font rendering capability
 def test_hindi_font_rendering():
@@ -221,10 +222,11 @@ class ClickInput:
                     if event.key == pygame.K_ESCAPE:
                         return {'success': False, 'color_index': None, 'message': 'quit'}
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = event.pos
                     color_index = self._get_clicked_color(mouse_pos)
                     if color_index is not None:
-                        return {'success': True, 'color_index': color_index, 'message': 'success'}
+                        return {'success': True, 'color_index': color_index, 'message': 'success',
+                                'response_ns': event_time_ns(event)}
 
             remaining_time = timeout - (current_time - start_time)
             if remaining_time <= 3:
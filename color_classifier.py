@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import cv2
+import numpy as np
+
+
+class HSVColorClassifier:
+    """
+    Per-pixel colour labelling through precomputed (H, S, V) lookup tables
+
+    Each pixel gets a bitmask with one bit per colour, so a pixel inside
+    several colours' ranges counts for each of them, exactly like running
+    cv2.inRange once per colour. Every HSV range is an axis-aligned box, so
+    the (H, S, V) -> label table factors into one 256-entry table per channel
+    (bit set = value inside that box on that channel) and a box -> colour
+    table. That is the same labelling as a full 180x256x256 table, but it stays
+    in cache and runs as a few cv2.LUT passes and one histogram.
+    """
+
+    def __init__(self, color_ranges):
+        """
+        Args:
+            color_ranges: {name: {'hsv_ranges': [(lower, upper), ...], ...}} as used by CameraInput
+        """
+        self.names = list(color_ranges)
+        boxes = [(bit, lower, upper)
+                 for bit, name in enumerate(self.names)
+                 for lower, upper in color_ranges[name]['hsv_ranges']]
+        if len(boxes) > 8:
+            raise ValueError("HSVColorClassifier supports at most 8 HSV ranges")
+
+        # channel_luts[c][value] has bit i set if value is inside box i on channel c
+        values = np.arange(256)
+        self.channel_luts = [np.zeros(256, dtype=np.uint8) for _ in range(3)]
+        for box, (_, lower, upper) in enumerate(boxes):
+            for channel in range(3):
+                # inRange bounds are inclusive on every channel
+                inside = (values >= lower[channel]) & (values <= upper[channel])
+                self.channel_luts[channel] |= inside.astype(np.uint8) << box
+
+        # Box bitmask -> colour bitmask
+        self.box_to_color = np.zeros(256, dtype=np.uint8)
+        for code in range(256):
+            for box, (bit, _, _) in enumerate(boxes):
+                if code >> box & 1:
+                    self.box_to_color[code] |= 1 << bit
+
+        # For each colour bitmask, which colours it contains: shape (codes, colours)
+        codes = np.arange(1 << len(self.names))
+        self._code_members = (codes[:, None] >> np.arange(len(self.names))) & 1
+
+    def label(self, hsv):
+        """Return the colour bitmask of every pixel in an HSV image"""
+        h, s, v = cv2.split(hsv)
+        boxes = cv2.LUT(h, self.channel_luts[0])
+        cv2.bitwise_and(boxes, cv2.LUT(s, self.channel_luts[1]), dst=boxes)
+        cv2.bitwise_and(boxes, cv2.LUT(v, self.channel_luts[2]), dst=boxes)
+        return cv2.LUT(boxes, self.box_to_color)
+
+    def ratios(self, hsv):
+        """Fraction of pixels inside each colour's ranges, keyed in color_ranges order"""
+        total_pixels = hsv.shape[0] * hsv.shape[1]
+        if total_pixels == 0:
+            return {}
+        code_count = len(self._code_members)
+        counts = cv2.calcHist([self.label(hsv)], [0], None, [code_count], [0, code_count])
+        per_color = counts.ravel().astype(np.int64) @ self._code_members
+        return {name: per_color[i] / total_pixels for i, name in enumerate(self.names)}
+
+    def ratios_bgr(self, bgr):
+        """Same as ratios() for a BGR image (only the given pixels are converted)"""
+        return self.ratios(cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV))
+
+
+def center_roi(height, width):
+    """(y1, y2, x1, x2) of the square centre region CameraInput samples"""
+    center_size = min(height, width) // 3
+    center_y = height // 2
+    center_x = width // 2
+
+    y1 = max(0, center_y - center_size // 2)
+    y2 = min(height, center_y + center_size // 2)
+    x1 = max(0, center_x - center_size // 2)
+    x2 = min(width, center_x + center_size // 2)
+    return y1, y2, x1, x2
@@ -4,6 +4,9 @@ import cv2
 import numpy as np
 import pygame
 import time
+from camera_preview import CameraPreview
+from camera_service import get_camera_service
+from color_classifier import HSVColorClassifier, center_roi
 
 class CameraInput:
     """Handle camera color detection input for the Stroop Effect game"""
@@ -47,20 +50,18 @@ class CameraInput:
                 'bgr_color': (255, 20, 147)
             }
         }
+        # Lookup table built from color_ranges (rebuild it if the ranges change)
+        self.classifier = HSVColorClassifier(self.color_ranges)
+        self.preview = CameraPreview()
     
-    def initialize_camera(self, camera_index=0):
-        """Initialize the camera"""
+    def initialize_camera(self):
+        """Subscribe to the shared camera capture service"""
         try:
-            self.cap = cv2.VideoCapture(camera_index)
-            if not self.cap.isOpened():
-                print(f"Warning: Could not open camera {camera_index}")
+            self.cap = get_camera_service().subscribe()
+            if self.cap is None or not self.cap.isOpened():
+                print("Warning: Could not open camera")
                 return False
             
-            # Set camera properties for better performance
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
-            
             # Test camera
             ret, frame = self.cap.read()
             if not ret:
@@ -86,38 +87,16 @@ class CameraInput:
         if frame is None:
             return None
         
-        # Convert to HSV
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        # Crop the center region first so only those pixels are converted
         height, width, _ = frame.shape
-        
-        # Define center region for color detection (larger area)
-        center_size = min(height, width) // 3
-        center_y = height // 2
-        center_x = width // 2
-        
-        y1 = max(0, center_y - center_size // 2)
-        y2 = min(height, center_y + center_size // 2)
-        x1 = max(0, center_x - center_size // 2)
-        x2 = min(width, center_x + center_size // 2)
-        
-        center_region = hsv[y1:y2, x1:x2]
+        y1, y2, x1, x2 = center_roi(height, width)
+        center_region = frame[y1:y2, x1:x2]
         
         if center_region.size == 0:
             return None
         
-        total_pixels = center_region.shape[0] * center_region.shape[1]
-        
-        # Calculate color ratios
-        color_ratios = {}
-        for color_name, color_info in self.color_ranges.items():
-            total_mask = np.zeros(center_region.shape[:2], dtype=np.uint8)
-            
-            # Combine all HSV ranges for this color
-            for hsv_range in color_info['hsv_ranges']:
-                mask = cv2.inRange(center_region, hsv_range[0], hsv_range[1])
-                total_mask = cv2.bitwise_or(total_mask, mask)
-            
-            color_ratios[color_name] = np.sum(total_mask > 0) / total_pixels
+        # Share of ROI pixels inside each color's HSV ranges (one LUT pass)
+        color_ratios = self.classifier.ratios_bgr(center_region)
         
         # Find the dominant color
         max_ratio = max(color_ratios.values())
@@ -129,7 +108,7 @@ class CameraInput:
 
     def show_camera_feed(self, frame, detected_color=None):
         """
-        Display camera feed with detection overlay
+        Hand the camera feed and detection overlay to the in-game preview
         
         Args:
             frame: OpenCV frame
@@ -139,49 +118,20 @@ class CameraInput:
             return
         
         height, width, _ = frame.shape
-        overlay = frame.copy()
-        
-        # Draw detection rectangle
-        center_size = min(height, width) // 3
-        center_y = height // 2
-        center_x = width // 2
-        
-        y1 = max(0, center_y - center_size // 2)
-        y2 = min(height, center_y + center_size // 2)
-        x1 = max(0, center_x - center_size // 2)
-        x2 = min(width, center_x + center_size // 2)
+        y1, y2, x1, x2 = center_roi(height, width)
         
         rect_color = (255, 255, 255)  # Default white
         label = "No Color"
         
         if detected_color and detected_color in self.color_ranges:
-            rect_color = self.color_ranges[detected_color]['bgr_color']
+            blue, green, red = self.color_ranges[detected_color]['bgr_color']
+            rect_color = (red, green, blue)
             label = detected_color.capitalize()
         
-        # Draw rectangle
-        cv2.rectangle(overlay, (x1, y1), (x2, y2), rect_color, 3)
-        
-        # Add detection label with background
-        label_text = f"Detected: {label}"
-        label_size = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
-        
-        # Draw background for text
-        cv2.rectangle(overlay, (10, 10), (label_size[0] + 20, label_size[1] + 20), (0, 0, 0), -1)
-        cv2.putText(overlay, label_text, (15, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, rect_color, 2)
-        
-        # Show instructions
-        instructions = [
-            "Show colored object in center box",
-            "Keep object steady for detection",
-            "Press 'q' to quit or ESC to cancel"
-        ]
-        
-        for i, instruction in enumerate(instructions):
-            y_pos = height - 80 + i * 25
-            cv2.rectangle(overlay, (10, y_pos - 5), (len(instruction) * 10 + 10, y_pos + 20), (0, 0, 0), -1)
-            cv2.putText(overlay, instruction, (15, y_pos + 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        
-        cv2.imshow("Camera - Color Detection", overlay)
+        self.preview.update(frame, {
+            'box': ((x1 / width, y1 / height, x2 / width, y2 / height), rect_color),
+            'lines': [(f"Detected: {label}", rect_color)]
+        })
 
 
     
@@ -207,7 +157,8 @@ class CameraInput:
             fonts: Font dictionary
             
         Returns:
-            dict: {'success': bool, 'color_index': int or None, 'message': str}
+            dict: {'success': bool, 'color_index': int or None, 'message': str,
+                   'response_ns': timestamp of the first frame showing the color}
         """
         if not self.camera_initialized:
             if not self.initialize_camera():
@@ -225,6 +176,7 @@ class CameraInput:
         timeout = 15.0  # 15 seconds timeout
         last_stable_detection = None
         stable_count = 0
+        stable_start_ns = None  # Frame timestamp when the current detection began
         required_stable_frames = 8  # Require 8 consecutive detections for stability
         
         # Create a mapping of game colors to detection colors
@@ -239,7 +191,6 @@ class CameraInput:
         while True:
             current_time = time.time()
             if current_time - start_time > timeout:
-                cv2.destroyAllWindows()
                 return {
                     'success': False,
                     'color_index': None,
@@ -249,7 +200,6 @@ class CameraInput:
             # Check for pygame events
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    cv2.destroyAllWindows()
                     return {
                         'success': False,
                         'color_index': None,
@@ -257,7 +207,6 @@ class CameraInput:
                     }
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
-                        cv2.destroyAllWindows()
                         return {
                             'success': False,
                             'color_index': None,
@@ -265,7 +214,7 @@ class CameraInput:
                         }
             
             # Read camera frame
-            ret, frame = self.cap.read()
+            ret, frame, frame_ns = self.cap.read_with_time()
             if not ret:
                 continue
             
@@ -281,6 +230,7 @@ class CameraInput:
             else:
                 stable_count = 0
                 last_stable_detection = detected_color
+                stable_start_ns = frame_ns
             
             # Show camera feed
             self.show_camera_feed(frame, detected_color)
@@ -289,31 +239,26 @@ class CameraInput:
             if stable_count >= required_stable_frames and detected_color:
                 if detected_color.lower() in color_mapping:
                     color_index = color_mapping[detected_color.lower()]
-                    cv2.destroyAllWindows()
                     return {
                         'success': True,
                         'color_index': color_index,
-                        'message': 'success'
+                        'message': 'success',
+                        'response_ns': stable_start_ns
                     }
             
             # Update timeout display on pygame screen
             remaining_time = timeout - (current_time - start_time)
             if remaining_time <= 5:  # Show countdown in last 5 seconds
                 self._show_timeout_warning(remaining_time, screen, ui_text, fonts)
+                self.preview.draw(screen)
                 pygame.display.flip()
+            else:
+                # Only the preview changed; push just its area
+                preview_rect = self.preview.draw(screen)
+                if preview_rect is not None:
+                    pygame.display.update(preview_rect)
             
-            # Check for 'q' key press to quit
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q') or key == 27:  # 'q' or ESC key
-                cv2.destroyAllWindows()
-                return {
-                    'success': False,
-                    'color_index': None,
-                    'message': 'quit'
-                }
-            
-            # Limit frame rate
-            time.sleep(0.033)  # ~30 FPS
+            # No sleep needed: read_with_time() waits for the next camera frame
     
     def _show_camera_instructions(self, screen, ui_text, fonts):
         """Show camera instructions on pygame screen"""
@@ -328,7 +273,7 @@ class CameraInput:
             "• Position colored object in center of camera view",
             "• Keep object steady for detection",
             "• Available colors: Red, Green, Blue, Yellow, Pink",
-            "• Press 'q' in camera window or ESC to quit"
+            "• Press ESC to quit"
         ]
         
         y_offset = screen.get_height() - 190
@@ -384,7 +329,8 @@ class CameraInput:
         """Clean up camera resources"""
         if self.cap is not None:
             self.cap.release()
-        cv2.destroyAllWindows()
+            self.cap = None
+        self.preview.clear()
         self.camera_initialized = False
     
     def test_camera(self):
@@ -400,10 +346,14 @@ class CameraInput:
             print(f"  - {color_name.capitalize()}")
         
         print("\nShow different colored objects to the camera to test detection")
-        print("Press 'q' to quit test")
+        print("Press 'q' or ESC to quit test")
         
+        pygame.init()
+        screen = pygame.display.set_mode(self.preview.size)
+        pygame.display.set_caption("Camera - Color Detection")
         try:
-            while True:
+            running = True
+            while running:
                 ret, frame = self.cap.read()
                 if not ret:
                     print("Error reading from camera")
@@ -412,13 +362,16 @@ class CameraInput:
                 frame = cv2.flip(frame, 1)
                 detected_color = self.detect_color(frame)
                 self.show_camera_feed(frame, detected_color)
+                self.preview.draw(screen, (0, 0))
+                pygame.display.flip()
                 
                 if detected_color:
                     print(f"Detected: {detected_color}")
                 
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q') or key == 27:
-                    break
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT or (
+                            event.type == pygame.KEYDOWN and event.key in (pygame.K_q, pygame.K_ESCAPE)):
+                        running = False
                     
         except KeyboardInterrupt:
             print("\nTest interrupted by user")
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+import re
+import unicodedata
+
+# Extra spellings a recognizer may return for each colour word, keyed by the
+# word as it appears in LANGUAGES[...]['colors']
+COLOR_ALIASES = {
+    'red': ['read', 'redd', 'rad'],
+    'green': ['greene', 'grean'],
+    'blue': ['blew', 'bloo', 'blu'],
+    'yellow': ['yello', 'yelo', 'yelow', 'jello'],
+    'pink': ['pinc', 'pinke'],
+    'लाल': ['laal', 'lal', 'lall'],
+    'हरा': ['hara', 'haraa', 'hera', 'हारा', 'हरे', 'हरी'],
+    'नीला': ['neela', 'nila', 'neila', 'nela', 'नीले', 'नीली'],
+    'पीला': ['peela', 'pila', 'peila', 'पीले', 'पीली'],
+    'गुलाबी': ['gulabi', 'gulaabi', 'gulabee', 'gulab', 'गुलाब']
+}
+
+# Scores for the different kinds of evidence
+EXACT_CONFIDENCE = 1.0
+EDIT_CONFIDENCE = 0.85  # one_edit_away() from a spelling of at least MIN_EDIT_LENGTH letters
+PHONETIC_CONFIDENCE = 0.8  # same phonetic_key() as a transliteration
+# Matches scoring below this are rejected rather than counted as an answer
+MIN_CONFIDENCE = 0.75
+
+# Shortest spelling matched within one edit; shorter words are too close to
+# everyday words ('bed'/'red', 'link'/'pink', 'peel'/'peela' are all one edit)
+MIN_EDIT_LENGTH = 5
+# Shortest phonetic key matched
+MIN_PHONETIC_KEY = 3
+
+SPLIT_PATTERN = re.compile(r"[\s,.!?;:\"'()\-।]+")
+LATIN_VOWELS = set('aeiouy')
+# Runs of one vowel group or one repeated consonant, for phonetic_key()
+VOWEL_RUN_PATTERN = re.compile(r"[aeiouy]+|([b-df-hj-np-tv-xz])\1*")
+VOWEL_SOUNDS = {'aa': 'a', 'ee': 'i', 'ei': 'i', 'ie': 'i', 'ii': 'i', 'ey': 'i', 'y': 'i',
+                'oo': 'u', 'ou': 'u', 'uu': 'u', 'ai': 'e', 'ay': 'e'}
+# Vowels for one_edit_away: Latin vowels and Devanagari vowel signs
+VOWELS = set('aeiouy') | {chr(c) for c in range(0x093E, 0x094D)}
+
+
+def normalize(text):
+    """Lower-case, NFC-normalised text with punctuation turned into single spaces"""
+    text = unicodedata.normalize('NFC', text).lower()
+    return ' '.join(token for token in SPLIT_PATTERN.split(text) if token)
+
+
+def phonetic_key(word):
+    """
+    Spelling-insensitive key for a Latin transliteration
+
+    Vowel runs are reduced to one vowel sound ('ee'/'i'/'ei' -> 'i',
+    'aa' -> 'a', 'oo' -> 'u'), doubled consonants collapsed and a non-initial
+    'h' dropped, so 'neelaa'/'nila' and 'gulaabee'/'gulabi' share a key while
+    the colour words keep distinct keys ('lal', 'hara', 'nila', 'pila').
+    """
+    key = []
+    for match in VOWEL_RUN_PATTERN.finditer(word):
+        run = match.group(0)
+        if run[0] in LATIN_VOWELS:
+            if len(run) > 2 and len(set(run)) == 1:
+                run = run[:2]  # 'eee' sounds like 'ee'
+            sound = VOWEL_SOUNDS.get(run, run[0])
+        elif run[0] == 'h' and key:
+            continue
+        else:
+            sound = run[0]
+        if not key or key[-1] != sound:
+            key.append(sound)
+    return ''.join(key)
+
+
+def one_edit_away(token, word):
+    """
+    True if token is word with one letter inserted, or one vowel swapped for another
+
+    Recognizers stretch and re-vowel words ('greeen', 'yellou') far more
+    often than they swap consonants, and a consonant swap turns a colour into
+    another word ('grean' -> 'great').
+    """
+    if len(token) == len(word) + 1:
+        i = next((i for i, (a, b) in enumerate(zip(token, word)) if a != b), len(word))
+        return token[i + 1:] == word[i:]
+    if len(token) == len(word):
+        diffs = [(a, b) for a, b in zip(token, word) if a != b]
+        return len(diffs) == 1 and diffs[0][0] in VOWELS and diffs[0][1] in VOWELS
+    return False
+
+
+class ColorMatcher:
+    """
+    Maps recognised speech to a colour index, built once per colour list
+
+    Lookups go from the cheapest to the most permissive evidence: exact
+    words and phrases from a token index, then one_edit_away() from a long
+    enough spelling with the same first letter, then the phonetic key of Latin transliterations of
+    non-Latin colour words. Keys shared by two colours are left out so a
+    fuzzy match never has to guess between colours, and matches below
+    min_confidence are rejected.
+    """
+
+    def __init__(self, colors, aliases=None, min_confidence=MIN_CONFIDENCE):
+        """
+        Args:
+            colors: LANGUAGES[...]['colors'] list; element [0] is the colour word
+                and an optional list at element [2] holds alternatives
+            aliases: {colour word: [spellings]} (defaults to COLOR_ALIASES)
+            min_confidence: Lowest confidence returned as a match
+        """
+        aliases = COLOR_ALIASES if aliases is None else aliases
+        self.min_confidence = min_confidence
+        self.names = []
+        self.phrases = {}
+        words_by_color = []
+        transliterations = []
+
+        for index, color_data in enumerate(colors):
+            name = color_data[0] if isinstance(color_data, (list, tuple)) else str(color_data)
+            self.names.append(name)
+            spellings = [name] + list(aliases.get(name, []))
+            if isinstance(color_data, (list, tuple)) and len(color_data) > 2 and isinstance(color_data[2], list):
+                spellings.extend(color_data[2])
+            words = set()
+            latin_name = _is_latin(normalize(name))
+            for spelling in spellings:
+                spelling = normalize(spelling)
+                if ' ' in spelling:
+                    # Multi-word spellings only match as a whole phrase
+                    self.phrases.setdefault(spelling, index)
+                elif spelling:
+                    words.add(spelling)
+                    if not latin_name and _is_latin(spelling):
+                        transliterations.append((spelling, index))
+            words_by_color.append(words)
+
+        # Single-word index; a word claimed by two colours is dropped
+        self.tokens = _unambiguous((word, index) for index, words in enumerate(words_by_color) for word in words)
+        self.fuzzy_words = [(word, index) for word, index in self.tokens.items() if len(word) >= MIN_EDIT_LENGTH]
+        self.phonetic = _unambiguous((phonetic_key(word), index) for word, index in transliterations
+                                     if len(phonetic_key(word)) >= MIN_PHONETIC_KEY)
+
+    def match(self, text):
+        """
+        Best colour for a transcript
+
+        Returns:
+            tuple: (colour index, confidence min_confidence..1) or (None, 0.0)
+        """
+        text = normalize(text)
+        if not text:
+            return None, 0.0
+
+        # Multi-word aliases
+        for phrase, index in self.phrases.items():
+            if f' {phrase} ' in f' {text} ':
+                return index, EXACT_CONFIDENCE
+
+        best_index, best_confidence = None, 0.0
+        for token in text.split():
+            index, confidence = self._match_token(token)
+            if confidence > best_confidence:
+                best_index, best_confidence = index, confidence
+                if confidence == EXACT_CONFIDENCE:
+                    break
+        if best_confidence < self.min_confidence:
+            return None, 0.0
+        return best_index, best_confidence
+
+    def _match_token(self, token):
+        index = self.tokens.get(token)
+        if index is not None:
+            return index, EXACT_CONFIDENCE
+
+        if len(token) >= MIN_EDIT_LENGTH:
+            # Truncations ('peel', 'bloo') are too ambiguous to count
+            matches = {index for word, index in self.fuzzy_words
+                       if token[0] == word[0] and one_edit_away(token, word)}
+            if len(matches) == 1:
+                return matches.pop(), EDIT_CONFIDENCE
+
+        if _is_latin(token):
+            index = self.phonetic.get(phonetic_key(token))
+            if index is not None:
+                return index, PHONETIC_CONFIDENCE
+        return None, 0.0
+
+    def match_nbest(self, candidates):
+        """
+        Best colour over a recognizer's n-best list
+
+        Args:
+            candidates: Transcripts best-first, as strings or as dicts with
+                'transcript' and optional 'confidence' (recognize_google show_all format)
+
+        Returns:
+            tuple: (colour index, match confidence, transcript) of the
+                candidate with the best match confidence x recognizer
+                confidence, or (None, 0.0, None)
+        """
+        best = (None, 0.0, None)
+        best_score = 0.0
+        for rank, candidate in enumerate(candidates):
+            if isinstance(candidate, dict):
+                transcript = candidate.get('transcript', '')
+                prior = candidate.get('confidence', 0.9 ** rank)
+            else:
+                transcript, prior = candidate, 0.9 ** rank
+            index, confidence = self.match(transcript)
+            if index is not None and confidence * prior > best_score:
+                best, best_score = (index, confidence, transcript), confidence * prior
+        return best
+
+
+def _is_latin(word):
+    return all('a' <= ch <= 'z' for ch in word)
+
+
+def _unambiguous(pairs):
+    """Build key -> index from (key, index) pairs, dropping keys claimed by more than one index"""
+    owners = {}
+    for key, index in pairs:
+        owners.setdefault(key, set()).add(index)
+    return {key: next(iter(indices)) for key, indices in owners.items() if len(indices) == 1}
+
+
+_matchers = {}
+
+
+def get_color_matcher(colors):
+    """Matcher for a colour list, compiled on first use and cached"""
+    key = tuple(color_data[0] if isinstance(color_data, (list, tuple)) else str(color_data) for color_data in colors)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = _matchers[key] = ColorMatcher(colors)
+    return matcher
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+import queue
+import sqlite3
+import threading
+import time
+
+
+class _Query:
+    """A read request answered by the writer thread after pending writes"""
+
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.params = params
+        self.rows = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class _Flush:
+    def __init__(self):
+        self.error = None
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class DatabaseWriter:
+    """Owns one long-lived SQLite connection and commits queued writes in batches off the UI thread"""
+
+    def __init__(self, path, batch_size=256, batch_interval=0.25):
+        """
+        Args:
+            path: SQLite database file
+            batch_size: Maximum number of queued operations per transaction
+            batch_interval: Seconds to keep collecting operations before committing
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._open_error = None  # why the last connection attempt failed
+
+        # Counters for diagnostics
+        self.transactions = 0
+        self.operations = 0
+        self.errors = 0
+
+    def start(self):
+        """Start the writer thread (safe to call more than once, not after close())"""
+        with self._lock:
+            self._start_locked()
+
+    def execute(self, sql, params=()):
+        """Queue a single write statement"""
+        self._put(('many', sql, [tuple(params)]))
+
+    def executemany(self, sql, rows):
+        """Queue a write statement for many parameter rows"""
+        rows = [tuple(row) for row in rows]
+        if rows:
+            self._put(('many', sql, rows))
+
+    def call(self, fn, *args):
+        """Queue fn(cursor, *args) to run inside the writer's transaction"""
+        self._put(('call', fn, args))
+
+    def query(self, sql, params=(), timeout=10.0):
+        """Run a read on the writer connection after all queued writes and return its rows"""
+        request = _Query(sql, tuple(params))
+        self._put(request)
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"Database query timed out after {timeout}s")
+        if request.error:
+            raise request.error
+        return request.rows
+
+    def flush(self, timeout=10.0):
+        """Block until everything queued so far is committed"""
+        if not self._thread or not self._thread.is_alive():
+            return self._queue.empty() and self._open_error is None
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout) and marker.error is None
+
+    def close(self, timeout=10.0):
+        """Commit pending writes, then stop the thread and close the connection"""
+        with self._lock:
+            self._closed = True
+        if not self._thread or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        print(f"[DB] Writer closed: {self.stats()}")
+
+    def stats(self):
+        return {
+            'transactions': self.transactions,
+            'operations': self.operations,
+            'errors': self.errors,
+            'pending': self._queue.qsize()
+        }
+
+    def _put(self, item):
+        # Checked under the lock so nothing is queued behind the stop marker
+        with self._lock:
+            self._start_locked()
+            self._queue.put(item)
+
+    def _start_locked(self):
+        if self._closed:
+            raise RuntimeError("Database writer is closed")
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.path)
+        except sqlite3.Error as e:
+            print(f"[DB] Could not open {self.path}: {e}")
+            self._fail_queued(e)
+            return
+        self._open_error = None
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error as e:
+            print(f"[DB] Could not enable WAL mode: {e}")
+
+        running = True
+        while running:
+            item = self._queue.get()
+            batch = [item]
+
+            # Collect more work for the same transaction
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size and _is_write(batch[-1]):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            writes = [op for op in batch if _is_write(op)]
+            retry = self._commit(conn, writes)
+            if retry:
+                # The commit failed (e.g. the database was locked); try once more
+                # after a pause instead of losing the batch's trials
+                time.sleep(self.batch_interval)
+                retry = self._commit(conn, retry)
+                if retry:
+                    self.errors += len(retry)
+                    print(f"[DB] Dropped {len(retry)} operations after a failed retry")
+
+            for op in batch:
+                if isinstance(op, _Query):
+                    try:
+                        op.rows = conn.execute(op.sql, op.params).fetchall()
+                    except sqlite3.Error as e:
+                        op.error = e
+                    op.done.set()
+                elif isinstance(op, _Flush):
+                    op.done.set()
+                elif op is _STOP:
+                    running = False
+
+        conn.close()
+
+    def _fail_queued(self, error):
+        """Answer everything queued with error when there is no connection to run it on"""
+        with self._lock:
+            self._open_error = error
+            while True:
+                try:
+                    op = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(op, (_Query, _Flush)):
+                    op.error = error
+                    op.done.set()
+                elif _is_write(op):
+                    self.errors += 1
+            # The next queued operation starts a new thread, which tries to connect again
+            self._thread = None
+
+    def _commit(self, conn, writes):
+        """
+        Run writes in one transaction, each under its own savepoint
+
+        Returns:
+            list: Operations to retry if the commit itself failed (those that
+                did not fail on their own), otherwise an empty list
+        """
+        failed = set()
+        if not writes:
+            return []
+        try:
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN")
+                for op in writes:
+                    # One savepoint per operation: a failing write is rolled
+                    # back on its own and the rest of the batch still commits
+                    cursor.execute("SAVEPOINT op")
+                    try:
+                        if op[0] == 'many':
+                            cursor.executemany(op[1], op[2])
+                        else:
+                            op[1](cursor, *op[2])
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO op")
+                        failed.add(id(op))
+                        self.errors += 1
+                        print(f"[DB] Operation failed and was dropped: {e}")
+                    cursor.execute("RELEASE op")
+        except sqlite3.Error as e:
+            # The transaction is rolled back; the caller retries the good operations
+            print(f"[DB] Batch of {len(writes)} operations failed: {e}")
+            return [op for op in writes if id(op) not in failed]
+        self.transactions += 1
+        self.operations += len(writes) - len(failed)
+        return []
+
+
+def _is_write(item):
+    return isinstance(item, tuple)
@@ -1,7 +1,20 @@
+import os
 import pygame
 import threading
 import time
 import sys
+from camera_preview import CameraPreview
+from camera_service import get_camera_service
+from timing import now_ns, NS_PER_MS, NS_PER_SECOND
+from gesture_filter import GESTURE_FILTER_CONFIG, OneEuroFilter, GestureStateMachine, TraceRecorder
+from hand_landmarks import EMPTY_LANDMARKS, landmarks_to_array, count_extended_fingers
+
+# 'process' runs MediaPipe in a worker process (hand_worker.py), 'thread' in
+# the detection thread; process mode falls back to thread if the worker fails
+INFERENCE_MODE = os.environ.get('STROOP_GESTURE_INFERENCE', 'process').lower()
+
+# Set to an .npz path to record the raw landmark trace of a session
+RECORD_PATH = os.environ.get('STROOP_GESTURE_RECORD')
 
 # Try to import computer vision libraries
 try:
@@ -13,6 +26,7 @@ except ImportError:
 
 try:
     import mediapipe as mp
+    from hand_worker import HandLandmarkWorker
     MP_AVAILABLE = True
 except ImportError:
     MP_AVAILABLE = False
@@ -21,7 +35,12 @@ except ImportError:
 class GestureInput:
     """Handle finger gesture input for the Stroop Effect game"""
     
-    def __init__(self):
+    def __init__(self, filter_config=None):
+        """
+        Args:
+            filter_config: Overrides for GESTURE_FILTER_CONFIG (smoothing and
+                confirmation thresholds)
+        """
         # Check if required libraries are available
         if not CV2_AVAILABLE or not MP_AVAILABLE:
             self.available = False
@@ -31,13 +50,20 @@ class GestureInput:
         try:
             # MediaPipe setup
             self.mp_hands = mp.solutions.hands
-            self.hands = self.mp_hands.Hands(
-                static_image_mode=False,
-                max_num_hands=1,
-                min_detection_confidence=0.5,  # Lowered for better detection
-                min_tracking_confidence=0.3    # Lowered for better tracking
-            )
-            self.mp_drawing = mp.solutions.drawing_utils
+            self.preview = CameraPreview()
+            self.hands = None
+            self.worker = None
+            if INFERENCE_MODE == 'process':
+                self.worker = HandLandmarkWorker(
+                    min_detection_confidence=0.5,  # Lowered for better detection
+                    min_tracking_confidence=0.3    # Lowered for better tracking
+                )
+                if not self.worker.start():
+                    print("[HANDS] Falling back to in-process inference")
+                    self.worker = None
+            if self.worker is None:
+                self.hands = self._create_hands()
+            self.inference_mode = 'process' if self.worker is not None else 'thread'
             
             # Gesture detection variables
             self.current_finger_count = 0
@@ -47,14 +73,24 @@ class GestureInput:
             self.cap = None
             self.camera_index = 0
             
-            # Gesture stability settings
-            self.stable_count = 0
-            self.stable_frames = 0
-            self.required_stable_frames = 10  # Reduced for faster response
+            # Gesture smoothing and confirmation settings
+            self.filter_config = dict(GESTURE_FILTER_CONFIG, **(filter_config or {}))
+            self.landmark_filter = None
+            if self.filter_config['min_cutoff'] is not None:
+                self.landmark_filter = OneEuroFilter(self.filter_config['min_cutoff'], self.filter_config['beta'])
+            self.state_machine = GestureStateMachine(
+                stay_probability=self.filter_config['stay_probability'],
+                observation_accuracy=self.filter_config['observation_accuracy'],
+                confirm_threshold=self.filter_config['confirm_threshold']
+            )
+            self.current_gesture_ns = 0  # Frame timestamp where the current gesture began
+            self.gesture_latencies_ms = []  # Frame capture to confirmed gesture, per gesture change
+            self.recorder = TraceRecorder(RECORD_PATH) if RECORD_PATH else None
+            self.frame_aspect = 4 / 3  # Width / height of the frames landmarks are normalised to
             
             # Input timeout settings
             self.timeout_duration = 15.0  # Increased timeout
-            self.gesture_hold_time = 1.5  # Reduced hold time
+            self.gesture_hold_time = 0.0  # Extra hold after confirmation (0 = confirm on the posterior alone)
             
             # Last valid gesture tracking
             self.last_valid_gesture = None
@@ -75,7 +111,24 @@ class GestureInput:
     def is_available(self):
         """Check if gesture input is available"""
         return hasattr(self, 'available') and self.available
-    
+
+    def _create_hands(self):
+        return self.mp_hands.Hands(
+            static_image_mode=False,
+            max_num_hands=1,
+            min_detection_confidence=0.5,  # Lowered for better detection
+            min_tracking_confidence=0.3    # Lowered for better tracking
+        )
+
+    def _fall_back_to_thread(self):
+        """Switch to in-process inference after the landmark worker has died"""
+        print("[HANDS] Landmark worker stopped, falling back to in-process inference")
+        worker, self.worker = self.worker, None
+        worker.stop()
+        if self.hands is None:
+            self.hands = self._create_hands()
+        self.inference_mode = 'thread'
+
     def start_camera(self):
         """Start the camera and gesture detection thread"""
         if not self.is_available():
@@ -89,65 +142,19 @@ class GestureInput:
         print("Starting camera...")
         
         try:
-            # Try different camera indices with more thorough testing
-            camera_found = False
-            for camera_index in [0, 1, 2, -1]:  # Added -1 as fallback
-                print(f"Testing camera index {camera_index}...")
-                try:
-                    test_cap = cv2.VideoCapture(camera_index)
-                    
-                    # Set camera properties before testing
-                    test_cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                    test_cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                    test_cap.set(cv2.CAP_PROP_FPS, 30)
-                    test_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                    
-                    # Wait a moment for camera to initialize
-                    time.sleep(0.5)
-                    
-                    if test_cap.isOpened():
-                        # Try to read multiple frames to ensure camera is working
-                        successful_reads = 0
-                        for _ in range(5):
-                            ret, frame = test_cap.read()
-                            if ret and frame is not None and frame.size > 0:
-                                successful_reads += 1
-                            time.sleep(0.1)
-                        
-                        if successful_reads >= 3:
-                            print(f"Camera {camera_index} is working properly ({successful_reads}/5 frames read)")
-                            test_cap.release()
-                            self.camera_index = camera_index
-                            camera_found = True
-                            break
-                        else:
-                            print(f"Camera {camera_index} opened but unstable ({successful_reads}/5 frames read)")
-                    else:
-                        print(f"Camera {camera_index} failed to open")
-                    
-                    test_cap.release()
-                    
-                except Exception as e:
-                    print(f"Error testing camera {camera_index}: {e}")
-                    try:
-                        test_cap.release()
-                    except:
-                        pass
-                    continue
-            
-            if not camera_found:
+            # The shared capture service probes and opens the device once per session
+            if not get_camera_service().start():
                 print("ERROR: No working camera found!")
                 print("Please check:")
                 print("1. Camera is connected and not used by another application")
                 print("2. Camera permissions are granted")
                 print("3. Camera drivers are installed")
                 return False
+            self.camera_index = get_camera_service().camera_index
             
             # Reset gesture state
+            self._reset_gesture_state()
             with self.gesture_lock:
-                self.current_finger_count = 0
-                self.stable_count = 0
-                self.stable_frames = 0
                 self.last_valid_gesture = None
                 self.last_gesture_time = 0
                 self.gesture_confirmed = False
@@ -192,40 +199,63 @@ class GestureInput:
             self.cap.release()
             self.cap = None
         
-        try:
-            cv2.destroyAllWindows()
-        except:
-            pass
-        
+        self.preview.clear()
         self.camera_initialized = False
         print("Camera stopped")
     
     def _count_fingers(self, landmarks):
-        """Count extended fingers based on hand landmarks"""
-        if not landmarks:
-            return 0
-        
-        # Landmark indices for finger tips and reference points
-        finger_tips = [4, 8, 12, 16, 20]  # Thumb, Index, Middle, Ring, Pinky
-        finger_pips = [3, 6, 10, 14, 18]  # Reference points
-        
-        fingers_up = 0
-        
-        try:
-            # Check thumb (different logic - compare x coordinates)
-            if landmarks[finger_tips[0]].x > landmarks[finger_pips[0]].x:
-                fingers_up += 1
-            
-            # Check other fingers (compare y coordinates - tip should be above pip)
-            for i in range(1, 5):
-                if landmarks[finger_tips[i]].y < landmarks[finger_pips[i]].y:
-                    fingers_up += 1
-                    
-        except (IndexError, AttributeError) as e:
-            print(f"Error counting fingers: {e}")
+        """Count extended fingers from a (21, 3) landmark array (joint angles, either hand)"""
+        return int(count_extended_fingers(landmarks, self.frame_aspect))
+    
+    def _smooth_and_count(self, landmarks, frame_ns):
+        """
+        Smooth (if configured) one frame's (21, 3) landmarks (None when no hand) and count fingers
+        """
+        if self.recorder is not None:
+            self.recorder.add(frame_ns, landmarks)
+        if self.landmark_filter is None:
+            return 0 if landmarks is None else self._count_fingers(landmarks)
+        if landmarks is None:
+            self.landmark_filter.reset()
             return 0
-        
-        return fingers_up
+        return self._count_fingers(self.landmark_filter.filter(landmarks, frame_ns / NS_PER_SECOND))
+    
+    def _update_stability(self, finger_count, frame_ns):
+        """Feed one frame's finger count to the confirmation state machine"""
+        with self.gesture_lock:
+            if not self.state_machine.update(finger_count, frame_ns):
+                return
+            finger_count = self.state_machine.confirmed
+            self.current_finger_count = finger_count
+            self.current_gesture_ns = self.state_machine.confirmed_ns
+            self.gesture_latencies_ms.append((now_ns() - self.current_gesture_ns) / NS_PER_MS)
+        if finger_count > 0:
+            print(f"GESTURE DETECTED: {finger_count} fingers")  # Fixed message
+    
+    def _reset_gesture_state(self):
+        """Forget the confirmed gesture so the next one must be shown afresh"""
+        with self.gesture_lock:
+            self.current_finger_count = 0
+            self.state_machine.reset()
+            if self.landmark_filter is not None:
+                self.landmark_filter.reset()
+    
+    def get_gesture_confidence(self):
+        """(leading finger count, posterior) of the gesture being shown"""
+        with self.gesture_lock:
+            return self.state_machine.confidence()
+    
+    def stats(self):
+        """Inference rate and latency figures for the session"""
+        latencies = self.gesture_latencies_ms
+        stats = {
+            'mode': self.inference_mode,
+            'gestures': len(latencies),
+            'mean_gesture_latency_ms': round(sum(latencies) / len(latencies), 1) if latencies else None
+        }
+        if self.worker is not None:
+            stats.update(self.worker.stats())
+        return stats
     
     def _detect_gesture(self):
         """Background thread for gesture detection"""
@@ -235,31 +265,14 @@ class GestureInput:
         print("Starting gesture detection thread...")
         
         try:
-            # Initialize camera in the thread
-            self.cap = cv2.VideoCapture(self.camera_index)
-            
-            # Set camera properties
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
-            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            # Subscribe to the shared camera (already warmed up by the service)
+            self.cap = get_camera_service().subscribe()
             
-            # Additional camera settings for better performance
-            self.cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.25)
-            
-            if not self.cap.isOpened():
+            if self.cap is None or not self.cap.isOpened():
                 print("ERROR: Could not open camera in detection thread")
                 self.camera_active = False
                 return
             
-            # Wait for camera to stabilize
-            print("Camera warming up...")
-            for _ in range(10):
-                ret, frame = self.cap.read()
-                if ret:
-                    break
-                time.sleep(0.1)
-            
             print("Camera ready for gesture detection!")
             self.camera_initialized = True
             
@@ -271,10 +284,12 @@ class GestureInput:
         consecutive_failures = 0
         max_failures = 20
         frame_count = 0
+        finger_count = 0
+        latest_landmarks = EMPTY_LANDMARKS
         
         while self.camera_active:
             try:
-                ret, frame = self.cap.read()
+                ret, frame, frame_ns = self.cap.read_with_time()
                 if not ret:
                     consecutive_failures += 1
                     print(f"Failed to read frame (attempt {consecutive_failures})")
@@ -290,70 +305,51 @@ class GestureInput:
                 # Flip frame horizontally for mirror effect
                 frame = cv2.flip(frame, 1)
                 
-                # Convert BGR to RGB for MediaPipe
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.hands.process(rgb_frame)
+                if self.worker is not None and not self.worker.is_running():
+                    self._fall_back_to_thread()
                 
-                finger_count = 0
+                # Landmarks are normalised per axis to the frame inference ran on
+                height, width = self.worker.frame_shape[:2] if self.worker is not None else frame.shape[:2]
+                self.frame_aspect = width / height
+                if self.recorder is not None:
+                    self.recorder.aspect = self.frame_aspect
                 
-                if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        finger_count = self._count_fingers(hand_landmarks.landmark)
-                        
-                        # Draw hand landmarks
-                        self.mp_drawing.draw_landmarks(
-                            frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS
-                        )
-                        break
-                
-                # Gesture stability logic
-                if finger_count == self.stable_count:
-                    self.stable_frames += 1
+                if self.worker is not None:
+                    # Hand the frame to the worker and act on whatever results are back;
+                    # the preview shows the newest landmarks over the current frame
+                    self.worker.submit(frame, frame_ns)
+                    for result in self.worker.results():
+                        finger_count = self._smooth_and_count(
+                            result.landmarks[0] if len(result.landmarks) else None, result.frame_ns)
+                        self._update_stability(finger_count, result.frame_ns)
+                        latest_landmarks = result.landmarks
                 else:
-                    self.stable_count = finger_count
-                    self.stable_frames = 0
-                
-                # Update current gesture only if stable
-                if self.stable_frames >= self.required_stable_frames:
-                    with self.gesture_lock:
-                        old_count = self.current_finger_count
-                        self.current_finger_count = finger_count
-                        if old_count != finger_count and finger_count > 0:
-                            print(f"GESTURE DETECTED: {finger_count} fingers")  # Fixed message
-                
-                # Display information on frame
-                cv2.putText(frame, f"Fingers: {finger_count}", (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.putText(frame, f"Stable: {self.stable_frames}/{self.required_stable_frames}", (10, 70), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-                cv2.putText(frame, f"Current: {self.current_finger_count}", (10, 110), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                cv2.putText(frame, "Show 1-5 fingers to select color", (10, 150),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                cv2.putText(frame, "Hold gesture for confirmation", (10, 180),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                cv2.putText(frame, "Press 'q' to close camera", (10, 210),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                    # Convert BGR to RGB for MediaPipe
+                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    results = self.hands.process(rgb_frame)
+                    
+                    latest_landmarks = landmarks_to_array(results.multi_hand_landmarks)
+                    landmarks = latest_landmarks[0] if len(latest_landmarks) else None
+                    
+                    finger_count = self._smooth_and_count(landmarks, frame_ns)
+                    self._update_stability(finger_count, frame_ns)
                 
-                # Show the frame
-                cv2.imshow("Gesture Control - Stroop Game", frame)
-                
-                # Check for quit key
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    print("User pressed 'q' to quit camera")
-                    self.camera_active = False
-                    break
-                elif key == ord('r'):
-                    print("Resetting gesture detection...")
-                    with self.gesture_lock:
-                        self.current_finger_count = 0
-                        self.stable_count = 0
-                        self.stable_frames = 0
+                # Hand the frame and what to draw over it to the in-game preview
+                leading, confidence = self.get_gesture_confidence()
+                self.preview.update(frame, {
+                    'landmarks': latest_landmarks[0] if len(latest_landmarks) else None,
+                    'lines': [
+                        (f"Fingers: {finger_count}", (0, 255, 0)),
+                        (f"Confidence: {leading} {confidence:.2f}/{self.state_machine.confirm_threshold}", (0, 255, 255)),
+                        (f"Current: {self.current_finger_count}", (255, 255, 0))
+                    ]
+                })
                 
                 # Debug output every 30 frames
                 if frame_count % 30 == 0:
-                    print(f"Frame {frame_count}: Fingers={finger_count}, Stable={self.stable_frames}, Current={self.current_finger_count}")
+                    print(f"Frame {frame_count}: Fingers={finger_count}, Confidence={confidence:.2f}, Current={self.current_finger_count}")
+                    if self.worker is not None:
+                        print(f"[HANDS] {self.worker.stats()}")
                     
             except Exception as e:
                 print(f"Error in gesture detection loop: {e}")
@@ -369,24 +365,24 @@ class GestureInput:
             self.cap.release()
             self.cap = None
         
-        try:
-            cv2.destroyAllWindows()
-        except:
-            pass
-        
         self.camera_active = False
         self.camera_initialized = False
         print("Gesture detection thread ended")
     
     def get_current_gesture(self):
         """Get current stable gesture (1-5 fingers = index 0-4)"""
+        gesture, _ = self.get_current_gesture_with_time()
+        return gesture
+    
+    def get_current_gesture_with_time(self):
+        """Get current stable gesture and the timestamp of the frame it first appeared in"""
         if not self.is_available() or not self.camera_active:
-            return None
+            return None, None
         
         with self.gesture_lock:
             if 1 <= self.current_finger_count <= 5:
-                return self.current_finger_count - 1
-        return None
+                return self.current_finger_count - 1, self.current_gesture_ns
+        return None, None
     
     def get_input(self, colors, screen, ui_text, fonts):
         """
@@ -399,7 +395,8 @@ class GestureInput:
             fonts: Font dictionary
             
         Returns:
-            dict: {'success': bool, 'color_index': int or None, 'message': str}
+            dict: {'success': bool, 'color_index': int or None, 'message': str,
+                   'response_ns': timestamp of the first frame showing the gesture}
         """
         if not self.is_available():
             return {
@@ -430,14 +427,15 @@ class GestureInput:
             print("Warning: Camera not fully initialized, proceeding anyway...")
         
         # Reset gesture state
+        self._reset_gesture_state()
         with self.gesture_lock:
             self.gesture_confirmed = False
             self.gesture_start_time = 0
-            self.current_finger_count = 0
         
         start_time = time.time()
         current_gesture = None
         gesture_hold_start = 0
+        gesture_onset_ns = None
         
         # Show initial instructions
         self._show_gesture_instructions(screen, ui_text, fonts, colors)
@@ -464,29 +462,33 @@ class GestureInput:
                             'color_index': None,
                             'message': 'quit'
                         }
+                    elif event.key == pygame.K_r:
+                        print("Resetting gesture detection...")
+                        self._reset_gesture_state()
             
             # Get current gesture
-            detected_gesture = self.get_current_gesture()
+            detected_gesture, detected_ns = self.get_current_gesture_with_time()
             
             if detected_gesture is not None and 0 <= detected_gesture < len(colors):
                 if current_gesture != detected_gesture:
                     # New gesture detected
                     current_gesture = detected_gesture
                     gesture_hold_start = time.time()
+                    gesture_onset_ns = detected_ns
                     color_name = colors[detected_gesture][0]
                     print(f"Gesture detected: {detected_gesture + 1} fingers ({color_name})")
-                else:
-                    # Same gesture, check if held long enough
-                    hold_duration = time.time() - gesture_hold_start
-                    if hold_duration >= self.gesture_hold_time:
-                        color_name = colors[detected_gesture][0]
-                        print(f"Gesture confirmed: {detected_gesture + 1} fingers ({color_name})")
-                        # Don't stop camera here - let the main game handle it
-                        return {
-                            'success': True,
-                            'color_index': detected_gesture,
-                            'message': f'Selected {color_name}'
-                        }
+                # Check if held long enough (immediately when no extra hold is configured)
+                hold_duration = time.time() - gesture_hold_start
+                if hold_duration >= self.gesture_hold_time:
+                    color_name = colors[detected_gesture][0]
+                    print(f"Gesture confirmed: {detected_gesture + 1} fingers ({color_name})")
+                    # Don't stop camera here - let the main game handle it
+                    return {
+                        'success': True,
+                        'color_index': detected_gesture,
+                        'message': f'Selected {color_name}',
+                        'response_ns': gesture_onset_ns
+                    }
             else:
                 # No valid gesture
                 if current_gesture is not None:
@@ -496,12 +498,18 @@ class GestureInput:
             
             # Update display
             self._show_gesture_instructions(screen, ui_text, fonts, colors)
+            self.preview.draw(screen, (screen.get_width() - 60 - self.preview.size[0], 160))
             
-            # Show current gesture status
+            # Show current gesture status: posterior towards the threshold, then the hold
             if current_gesture is not None:
                 hold_duration = time.time() - gesture_hold_start
-                progress = min(hold_duration / self.gesture_hold_time, 1.0)
+                progress = min(hold_duration / self.gesture_hold_time, 1.0) if self.gesture_hold_time > 0 else 1.0
                 self._show_gesture_progress(screen, current_gesture, progress, colors, fonts)
+            else:
+                leading, confidence = self.get_gesture_confidence()
+                if leading is not None and 1 <= leading <= len(colors):
+                    progress = min(confidence / self.state_machine.confirm_threshold, 1.0)
+                    self._show_gesture_progress(screen, leading - 1, progress, colors, fonts)
             
             # Show timeout warning
             remaining_time = self.timeout_duration - (time.time() - start_time)
@@ -544,8 +552,8 @@ class GestureInput:
 
          instructions.extend([
             "",
-            f"Hold gesture for {self.gesture_hold_time} seconds to confirm",
-            "Camera window shows live feed",
+            "Hold the gesture steady to confirm",
+            "Camera preview shows live feed (R: reset)",
             "Press ESC to quit"
         ])
 
@@ -642,7 +650,12 @@ class GestureInput:
         print("Cleaning up gesture input...")
         if self.is_available():
             self.stop_camera()
-            if hasattr(self, 'hands'):
+            print(f"[HANDS] Gesture stats: {self.stats()}")
+            if self.recorder is not None:
+                self.recorder.save()
+            if self.worker is not None:
+                self.worker.stop()
+            if self.hands is not None:
                 self.hands.close()
     
     def test_input(self):
@@ -660,15 +673,15 @@ class GestureInput:
         print("3 fingers = Color 3")
         print("4 fingers = Color 4")
         print("5 fingers = Color 5")
-        print(f"Hold gesture for {self.gesture_hold_time} seconds to confirm")
+        print("Hold the gesture steady to confirm")
         print("ESC key: Quit")
-        print("Camera window: Press 'q' to quit camera")
+        print("Detected gestures are printed to the console")
         
         # Test camera initialization
         try:
             if self.start_camera():
                 print("Camera initialized successfully!")
-                print("You should see a camera window. Test your gestures there.")
+                print("Show gestures to the camera and watch the console.")
                 
                 # Keep camera running for testing
                 input("Press Enter to stop the test...")
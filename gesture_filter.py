@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Landmark smoothing and gesture confirmation.
+
+Raw MediaPipe landmarks jitter from frame to frame, so a finger near the
+threshold flickers between extended and folded. Each frame's finger count
+(optionally from One-Euro smoothed landmarks) is fed to a small
+hidden-Markov state machine that keeps a posterior over counts 0-5 and
+confirms a gesture as soon as one count's posterior passes a threshold. A
+single noisy frame only dents the posterior instead of restarting a run of
+identical frames.
+
+benchmarks/gesture_filter_bench.py measures latency against false accepts
+for these settings on recorded or synthetic landmark traces.
+"""
+import math
+
+import numpy as np
+
+# Defaults for GestureInput; every key can be overridden through
+# GestureInput(filter_config={...})
+GESTURE_FILTER_CONFIG = {
+    'min_cutoff': None,  # Hz, One-Euro smoothing when the hand is still; None = no smoothing
+    'beta': 0.5,  # cutoff increase per unit/s of landmark speed
+    'stay_probability': 0.9,  # prior that the count does not change between frames
+    'observation_accuracy': 0.8,  # chance a single frame's count is correct
+    'confirm_threshold': 0.99  # posterior needed to confirm a count
+}
+
+NUM_COUNTS = 6  # 0-5 fingers
+
+
+class OneEuroFilter:
+    """
+    One-Euro low-pass filter over a whole landmark array at once
+
+    The cutoff frequency rises with the speed of the signal, so slow jitter
+    is smoothed heavily while deliberate movement passes with little lag.
+    """
+
+    def __init__(self, min_cutoff=1.5, beta=0.5, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._dx = None
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, x, t):
+        """
+        Args:
+            x: Landmark array of any shape (e.g. (21, 3))
+            t: Timestamp in seconds
+
+        Returns:
+            np.ndarray: Smoothed array of the same shape
+        """
+        x = np.asarray(x, dtype=np.float32)
+        if self._x is None or t <= self._t:
+            self._x, self._dx, self._t = x, np.zeros_like(x), t
+            return x
+
+        dt = t - self._t
+        dx = (x - self._x) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx = self._dx + a_d * (dx - self._dx)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        tau = 1.0 / (2 * np.pi * cutoff)
+        a = 1.0 / (1.0 + tau / dt)
+        self._x = self._x + a * (x - self._x)
+        self._t = t
+        return self._x
+
+
+class GestureStateMachine:
+    """
+    Forward-filtered posterior over finger counts with a confirm threshold
+
+    Each frame mixes the posterior towards uniform (the chance the user
+    changed gesture) and multiplies in the likelihood of the observed count.
+    A count is confirmed once its posterior reaches confirm_threshold; its
+    onset is the frame where it first became the most likely count.
+    """
+
+    def __init__(self, stay_probability=0.9, observation_accuracy=0.8, confirm_threshold=0.95,
+                 num_counts=NUM_COUNTS):
+        self.stay_probability = stay_probability
+        self.observation_accuracy = observation_accuracy
+        self.confirm_threshold = confirm_threshold
+        self.num_counts = num_counts
+        miss = (1.0 - observation_accuracy) / (num_counts - 1)
+        self._likelihood = np.full((num_counts, num_counts), miss)
+        np.fill_diagonal(self._likelihood, observation_accuracy)
+        self.reset()
+
+    def reset(self):
+        self.posterior = np.full(self.num_counts, 1.0 / self.num_counts)
+        self.leading = None
+        self.leading_ns = None
+        self.confirmed = None
+        self.confirmed_ns = None
+
+    def update(self, count, frame_ns):
+        """
+        Feed one frame's finger count
+
+        Returns:
+            bool: True if this frame confirmed a new count
+        """
+        prior = self.stay_probability * self.posterior + (1.0 - self.stay_probability) / self.num_counts
+        posterior = prior * self._likelihood[min(max(count, 0), self.num_counts - 1)]
+        self.posterior = posterior / posterior.sum()
+
+        leading = int(self.posterior.argmax())
+        if leading != self.leading:
+            self.leading, self.leading_ns = leading, frame_ns
+        if leading != self.confirmed and self.posterior[leading] >= self.confirm_threshold:
+            self.confirmed, self.confirmed_ns = leading, self.leading_ns
+            return True
+        return False
+
+    def confidence(self):
+        """(leading count, its posterior)"""
+        if self.leading is None:
+            return None, 0.0
+        return self.leading, float(self.posterior[self.leading])
+
+
+def save_trace(path, frame_ns, landmarks, labels=None, aspect=1.0):
+    """
+    Save a landmark trace for offline evaluation
+
+    Args:
+        path: .npz file to write
+        frame_ns: (T,) frame timestamps
+        landmarks: (T, 21, 3) float32, NaN for frames without a hand
+        labels: Optional (T,) true finger count per frame (-1 = unknown)
+        aspect: Width / height of the frames the landmarks were normalised to
+    """
+    arrays = {'frame_ns': np.asarray(frame_ns, dtype=np.int64),
+              'landmarks': np.asarray(landmarks, dtype=np.float32),
+              'aspect': np.float32(aspect)}
+    if labels is not None:
+        arrays['labels'] = np.asarray(labels, dtype=np.int8)
+    np.savez_compressed(path, **arrays)
+
+
+def load_trace(path):
+    """
+    Returns:
+        tuple: (frame_ns, landmarks, labels or None, aspect) as written by save_trace
+    """
+    with np.load(path) as data:
+        labels = data['labels'] if 'labels' in data.files else None
+        aspect = float(data['aspect']) if 'aspect' in data.files else 1.0
+        return data['frame_ns'], data['landmarks'], labels, aspect
+
+
+class TraceRecorder:
+    """Collects (frame_ns, landmarks) pairs from the detection loop"""
+
+    def __init__(self, path):
+        self.path = path
+        self.aspect = 1.0
+        self.frame_ns = []
+        self.landmarks = []
+
+    def add(self, frame_ns, landmarks):
+        """landmarks: (21, 3) array, or None when no hand was found"""
+        self.frame_ns.append(frame_ns)
+        self.landmarks.append(np.full((21, 3), np.nan, dtype=np.float32) if landmarks is None else landmarks)
+
+    def save(self):
+        if not self.frame_ns:
+            return
+        save_trace(self.path, self.frame_ns, np.stack(self.landmarks), aspect=self.aspect)
+        print(f"[HANDS] Saved {len(self.frame_ns)} landmark frames to {self.path}")
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Finger counting on MediaPipe hand landmarks as NumPy arrays.
+
+Landmarks are converted once into an (N, 21, 3) array (N detected hands) and
+every finger of every hand is tested with array operations. A finger counts
+as extended when it is nearly straight, measured as the angle between its
+first bone and the line from that bone's end to the fingertip, so the test
+does not depend on which way the hand points or whether it is a left or
+right hand. The long tip line keeps the angle steady under landmark jitter,
+where angles between the short outer bones are not.
+
+Run directly to count fingers over recorded traces:
+    python hand_landmarks.py trace.npz [trace.npz ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+FINGER_NAMES = ['thumb', 'index', 'middle', 'ring', 'pinky']
+
+# Four landmarks along each finger: (cmc, mcp, ip, tip) for the thumb,
+# (mcp, pip, dip, tip) for the others
+FINGER_CHAINS = np.array([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16], [17, 18, 19, 20]])
+THUMB_MCP, THUMB_TIP, PINKY_MCP = 2, 4, 17
+
+# Bones drawn between landmarks (same pairs as mediapipe's HAND_CONNECTIONS)
+HAND_CONNECTIONS = [(0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8), (5, 9), (9, 10), (10, 11),
+                    (11, 12), (9, 13), (13, 14), (14, 15), (15, 16), (13, 17), (0, 17), (17, 18), (18, 19), (19, 20)]
+
+# Bend (degrees) above which a finger is folded: thumb, then the other four
+BEND_LIMITS = np.array([60.0, 70.0, 70.0, 70.0, 70.0])
+# A straight thumb tucked across the palm is not extended: its tip must be
+# further from the pinky knuckle than the thumb's own knuckle is
+THUMB_REACH = 1.0
+
+EMPTY_LANDMARKS = np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32)
+
+
+def landmarks_to_array(multi_hand_landmarks):
+    """
+    Convert MediaPipe results.multi_hand_landmarks into one array
+
+    Returns:
+        np.ndarray: (N, 21, 3) float32 normalised x, y, z (N = 0 when no hands)
+    """
+    if not multi_hand_landmarks:
+        return EMPTY_LANDMARKS
+    return np.array([[(p.x, p.y, p.z) for p in hand.landmark] for hand in multi_hand_landmarks],
+                    dtype=np.float32)
+
+
+def _isotropic(landmarks, aspect):
+    """Undo MediaPipe's per-axis normalisation (x by width, y by height)"""
+    points = np.asarray(landmarks, dtype=np.float32)
+    if aspect != 1.0:
+        points = points * np.array([aspect, 1.0, 1.0], dtype=np.float32)
+    return points
+
+
+def finger_bend(landmarks, aspect=1.0):
+    """
+    Bend of each finger in degrees
+
+    Args:
+        landmarks: (..., 21, 3) landmark array
+        aspect: Frame width / height the landmarks were normalised with
+
+    Returns:
+        np.ndarray: (..., 5) angle between the first bone (mcp-pip; cmc-mcp for
+            the thumb) and the line from its far end to the tip, for thumb,
+            index, middle, ring and pinky; NaN where a landmark is NaN
+    """
+    chains = _isotropic(landmarks, aspect)[..., FINGER_CHAINS, :]  # (..., 5, 4, 3)
+    bone = chains[..., 1, :] - chains[..., 0, :]
+    reach = chains[..., 3, :] - chains[..., 1, :]
+    norms = np.linalg.norm(bone, axis=-1) * np.linalg.norm(reach, axis=-1)
+    cosines = (bone * reach).sum(axis=-1) / np.maximum(norms, 1e-9)
+    return np.degrees(np.arccos(np.clip(cosines, -1.0, 1.0)))
+
+
+def fingers_extended(landmarks, aspect=1.0):
+    """
+    Which fingers are extended
+
+    Returns:
+        np.ndarray: (..., 5) bool in FINGER_NAMES order; hands containing NaN
+            (no detection) come out all False
+    """
+    points = _isotropic(landmarks, aspect)
+    extended = finger_bend(points) < BEND_LIMITS
+    reach = np.linalg.norm(points[..., THUMB_TIP, :] - points[..., PINKY_MCP, :], axis=-1)
+    knuckle = np.linalg.norm(points[..., THUMB_MCP, :] - points[..., PINKY_MCP, :], axis=-1)
+    extended[..., 0] &= reach > THUMB_REACH * knuckle
+    return extended
+
+
+def count_extended_fingers(landmarks, aspect=1.0):
+    """
+    Number of extended fingers per hand
+
+    Args:
+        landmarks: (N, 21, 3) array (or (21, 3) for a single hand)
+        aspect: Frame width / height
+
+    Returns:
+        np.ndarray: (N,) int counts (a 0-d array for a single hand)
+    """
+    return fingers_extended(landmarks, aspect).sum(axis=-1)
+
+
+def legacy_finger_count(landmarks):
+    """
+    The original rule, vectorised: thumb tip right of its ip joint, other tips
+    above their pip joints. Only correct for an upright, mirrored right hand.
+    """
+    landmarks = np.asarray(landmarks)
+    count = (landmarks[..., 4, 0] > landmarks[..., 3, 0]).astype(int)
+    return count + (landmarks[..., [8, 12, 16, 20], 1] < landmarks[..., [6, 10, 14, 18], 1]).sum(axis=-1)
+
+
+def evaluate_traces(paths):
+    """
+    Count fingers over every frame of recorded traces in one pass per file
+
+    Args:
+        paths: .npz traces written by gesture_filter.save_trace
+
+    Returns:
+        dict: {path: {'frames', 'hand_frames', 'histogram', 'legacy_agreement', 'count_ms',
+               and for labelled traces 'label_accuracy', 'legacy_label_accuracy'}}
+    """
+    from gesture_filter import load_trace
+
+    report = {}
+    for path in paths:
+        frame_ns, landmarks, labels, aspect = load_trace(path)
+        has_hand = ~np.isnan(landmarks).any(axis=(1, 2))
+
+        started = time.perf_counter()
+        counts = count_extended_fingers(landmarks, aspect)
+        count_ms = (time.perf_counter() - started) * 1000
+        legacy = legacy_finger_count(landmarks)
+
+        result = {
+            'frames': len(landmarks),
+            'hand_frames': int(has_hand.sum()),
+            'histogram': np.bincount(counts[has_hand], minlength=6).tolist(),
+            'legacy_agreement': round(float((counts == legacy)[has_hand].mean()), 3) if has_hand.any() else None,
+            'count_ms': round(count_ms, 2)
+        }
+        if labels is not None:
+            known = has_hand & (labels >= 0)
+            result['label_accuracy'] = round(float((counts == labels)[known].mean()), 3) if known.any() else None
+            result['legacy_label_accuracy'] = round(float((legacy == labels)[known].mean()), 3) if known.any() else None
+        report[path] = result
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python hand_landmarks.py trace.npz [trace.npz ...]")
+        sys.exit(1)
+    for path, result in evaluate_traces(sys.argv[1:]).items():
+        print(f"{path}: {result}")
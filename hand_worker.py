@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Hand-landmark inference in a separate process.
+
+The game process copies each camera frame into a shared-memory slot and sends
+only (slot, sequence, frame_ns) over a local connection; the worker runs
+MediaPipe Hands on that slot and sends back a compact (hands, 21, 3) float32
+landmark array. The worker is started as its own interpreter
+(python hand_worker.py ...) rather than through multiprocessing, because the
+game's main module does its setup at import time and must not be re-imported
+in the child.
+"""
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from hand_landmarks import landmarks_to_array
+from timing import now_ns, NS_PER_MS
+
+
+class LandmarkResult:
+    """Landmarks for one frame, as returned by the worker"""
+
+    def __init__(self, sequence, frame_ns, landmarks, handedness, inference_time, received_ns):
+        self.sequence = sequence
+        self.frame_ns = frame_ns
+        self.landmarks = landmarks  # (hands, 21, 3) normalised x, y, z
+        self.handedness = handedness  # 'Left'/'Right' per hand
+        self.inference_time = inference_time
+        self.received_ns = received_ns
+
+    def latency_ms(self):
+        """Frame capture to result arrival in the game process"""
+        return (self.received_ns - self.frame_ns) / NS_PER_MS
+
+
+class HandLandmarkWorker:
+    """Game-side handle on the landmark worker process"""
+
+    def __init__(self, frame_shape=(480, 640, 3), slots=2, max_num_hands=1,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.3):
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.options = {
+            'max_num_hands': max_num_hands,
+            'min_detection_confidence': min_detection_confidence,
+            'min_tracking_confidence': min_tracking_confidence
+        }
+        self._shm = None
+        self._frames = None
+        self._process = None
+        self._conn = None
+        self._free_slots = deque(range(slots))
+        self._sequence = 0
+
+        # Diagnostics
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.results_received = 0
+        self._result_times = deque(maxlen=60)
+        self._latencies_ms = deque(maxlen=60)
+        self._inference_times = deque(maxlen=60)
+
+    def start(self, timeout=60.0):
+        """Launch the worker and wait until its model is loaded"""
+        if self._process is not None:
+            return True
+        frame_bytes = int(np.prod(self.frame_shape))
+        try:
+            self._shm = SharedMemory(create=True, size=frame_bytes * self.slots)
+            self._frames = np.ndarray((self.slots,) + self.frame_shape, dtype=np.uint8, buffer=self._shm.buf)
+
+            authkey = secrets.token_bytes(16)
+            listener = Listener(('127.0.0.1', 0), authkey=authkey)
+            env = dict(os.environ, STROOP_HAND_WORKER_KEY=authkey.hex())
+            self._process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), str(listener.address[1]), self._shm.name,
+                 'x'.join(str(n) for n in self.frame_shape), str(self.slots),
+                 str(self.options['max_num_hands']), str(self.options['min_detection_confidence']),
+                 str(self.options['min_tracking_confidence'])],
+                env=env)
+
+            # Listener.accept() has no timeout; accept on a helper thread
+            accepted = []
+            acceptor = threading.Thread(target=lambda: accepted.append(listener.accept()), daemon=True)
+            acceptor.start()
+            acceptor.join(timeout)
+            listener.close()
+            if not accepted:
+                raise TimeoutError("hand worker did not connect")
+            self._conn = accepted[0]
+
+            if not self._conn.poll(timeout):
+                raise TimeoutError("hand worker did not load its model")
+            message = self._conn.recv()
+            if message[0] != 'ready':
+                raise RuntimeError(message[1])
+        except Exception as e:
+            print(f"[HANDS] Could not start landmark worker: {e}")
+            self.stop()
+            return False
+
+        print(f"[HANDS] Landmark worker running (pid {self._process.pid}, model loaded in {message[1]:.2f}s)")
+        return True
+
+    def is_running(self):
+        """True while the process is alive and its connection is open"""
+        return self._conn is not None and self._process is not None and self._process.poll() is None
+
+    def submit(self, frame, frame_ns):
+        """
+        Queue a BGR frame for inference without blocking
+
+        Returns:
+            bool: False if every slot is busy and the frame was dropped, or
+                the worker is gone (see is_running())
+        """
+        if self._conn is None:
+            return False
+        if not self._free_slots:
+            self.frames_dropped += 1
+            return False
+        if frame.shape != self.frame_shape:
+            import cv2
+            frame = cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]))
+        slot = self._free_slots.popleft()
+        self._frames[slot][...] = frame
+        self._sequence += 1
+        try:
+            self._conn.send((slot, self._sequence, frame_ns))
+        except (OSError, EOFError):
+            print("[HANDS] Landmark worker connection closed")
+            self._free_slots.append(slot)
+            self._conn = None
+            return False
+        self.frames_sent += 1
+        return True
+
+    def results(self):
+        """Return every result that has arrived, oldest first, without blocking"""
+        results = []
+        try:
+            while self._conn is not None and self._conn.poll():
+                slot, sequence, frame_ns, landmarks, handedness, inference_time = self._conn.recv()
+                self._free_slots.append(slot)
+                result = LandmarkResult(sequence, frame_ns, landmarks, handedness, inference_time, now_ns())
+                self.results_received += 1
+                self._result_times.append(result.received_ns)
+                self._latencies_ms.append(result.latency_ms())
+                self._inference_times.append(inference_time)
+                results.append(result)
+        except (OSError, EOFError):
+            print("[HANDS] Landmark worker connection closed")
+            self._conn = None
+        return results
+
+    def inference_fps(self):
+        """Results per second over the last few dozen frames"""
+        if len(self._result_times) < 2:
+            return 0.0
+        span = (self._result_times[-1] - self._result_times[0]) / 1e9
+        return (len(self._result_times) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        return {
+            'inference_fps': round(self.inference_fps(), 1),
+            'mean_inference_ms': round(1000 * sum(self._inference_times) / len(self._inference_times), 1)
+            if self._inference_times else None,
+            'mean_latency_ms': round(sum(self._latencies_ms) / len(self._latencies_ms), 1)
+            if self._latencies_ms else None,
+            'frames_sent': self.frames_sent,
+            'frames_dropped': self.frames_dropped,
+            'results': self.results_received
+        }
+
+    def stop(self):
+        """Stop the worker process and free the shared memory"""
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except (OSError, EOFError):
+                pass
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=3.0)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+        self._frames = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        self._free_slots = deque(range(self.slots))
+
+
+def _worker_main(argv):
+    port, shm_name, shape, slots, max_num_hands, min_detection, min_tracking = argv
+    conn = Client(('127.0.0.1', int(port)), authkey=bytes.fromhex(os.environ['STROOP_HAND_WORKER_KEY']))
+    shape = tuple(int(n) for n in shape.split('x'))
+
+    try:
+        started = time.perf_counter()
+        import cv2
+        import mediapipe as mp
+        hands = mp.solutions.hands.Hands(
+            static_image_mode=False,
+            max_num_hands=int(max_num_hands),
+            min_detection_confidence=float(min_detection),
+            min_tracking_confidence=float(min_tracking)
+        )
+        shm = SharedMemory(name=shm_name)
+        # The game owns the block; keep this process's tracker from unlinking it on exit
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        frames = np.ndarray((int(slots),) + shape, dtype=np.uint8, buffer=shm.buf)
+    except Exception as e:
+        conn.send(('error', str(e)))
+        conn.close()
+        return
+    conn.send(('ready', time.perf_counter() - started))
+
+    try:
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            slot, sequence, frame_ns = request
+            started = time.perf_counter()
+            results = hands.process(cv2.cvtColor(frames[slot], cv2.COLOR_BGR2RGB))
+            landmarks = landmarks_to_array(results.multi_hand_landmarks)
+            handedness = [hand.classification[0].label for hand in results.multi_handedness or []]
+            conn.send((slot, sequence, frame_ns, landmarks, handedness, time.perf_counter() - started))
+    except (EOFError, OSError):
+        pass
+    finally:
+        hands.close()
+        del frames
+        shm.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    _worker_main(sys.argv[1:])
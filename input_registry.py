@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class HandlerRegistry:
+    """
+    Input handlers keyed by input method, constructed on first use
+
+    Some constructors are slow (microphone calibration, MediaPipe graph,
+    decoding the QR reference images), so nothing is built at import time.
+    prewarm() builds likely handlers on a small thread pool while the menu is
+    shown; get() waits for a pending prewarm instead of building twice.
+    """
+
+    def __init__(self, max_workers=2):
+        self._factories = {}
+        self._handlers = {}
+        self._failed = set()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._pool = None
+
+        # Seconds each handler took to construct
+        self.init_times = {}
+
+    def register(self, method, factory):
+        """Register a zero-argument factory (usually the handler class)"""
+        self._factories[method] = factory
+
+    def __contains__(self, method):
+        return method in self._factories and method not in self._failed
+
+    def is_ready(self, method):
+        """True if the handler is already constructed"""
+        return method in self._handlers
+
+    def get(self, method):
+        """Return the handler for method, constructing it if needed (None if it failed)"""
+        if method not in self._factories:
+            return None
+
+        with self._lock:
+            handler = self._handlers.get(method)
+            if handler is not None or method in self._failed:
+                return handler
+            pending = self._pending.get(method)
+            owner = pending is None
+            if owner:
+                pending = self._pending[method] = Future()
+
+        if owner:
+            self._build(method, pending)
+        return pending.result()
+
+    def prewarm(self, methods):
+        """Construct handlers in the background; returns immediately"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix="handler-init")
+            for method in methods:
+                if (method not in self._factories or method in self._handlers
+                        or method in self._failed or method in self._pending):
+                    continue
+                pending = self._pending[method] = Future()
+                job = self._pool.submit(self._build, method, pending)
+                # Wake anyone waiting in get() if shutdown() cancels the job
+                job.add_done_callback(lambda job, pending=pending: job.cancelled() and pending.set_result(None))
+
+    def _build(self, method, pending):
+        started = time.perf_counter()
+        try:
+            handler = self._factories[method]()
+        except Exception as e:
+            print(f"[INPUT] Failed to initialise {method} input: {e}")
+            handler = None
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if handler is None:
+                self._failed.add(method)
+            else:
+                self._handlers[method] = handler
+                self.init_times[method] = elapsed
+                print(f"[INPUT] {method} input ready in {elapsed:.2f}s")
+            self._pending.pop(method, None)
+        pending.set_result(handler)
+
+    def values(self):
+        """Handlers constructed so far"""
+        with self._lock:
+            return list(self._handlers.values())
+
+    def shutdown(self):
+        """
+        Stop the prewarm pool: queued builds are cancelled and builds already
+        running are waited for, so values() afterwards lists every handler
+        that needs cleanup()
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        return {
+            'ready': sorted(self._handlers),
+            'failed': sorted(self._failed),
+            'init_times': {method: round(seconds, 3) for method, seconds in self.init_times.items()}
+        }
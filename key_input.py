@@ -1,5 +1,6 @@
 import pygame
 import time
+from timing import event_time_ns
 
 class KeyInput:
     """Handle keyboard input for the Stroop Effect game"""
@@ -37,7 +38,8 @@ class KeyInput:
             fonts: Font dictionary
             
         Returns:
-            dict: {'success': bool, 'color_index': int or None, 'message': str}
+            dict: {'success': bool, 'color_index': int or None, 'message': str,
+                   'response_ns': perf_counter_ns of the key press (on success)}
         """
         # Show keyboard mapping
         self._show_keyboard_help(colors, screen, ui_text, fonts)
@@ -78,7 +80,8 @@ class KeyInput:
                             return {
                                 'success': True,
                                 'color_index': color_index,
-                                'message': 'success'
+                                'message': 'success',
+                                'response_ns': event_time_ns(event)
                             }
                     
                     # Check number key mappings
@@ -88,7 +91,8 @@ class KeyInput:
                             return {
                                 'success': True,
                                 'color_index': color_index,
-                                'message': 'success'
+                                'message': 'success',
+                                'response_ns': event_time_ns(event)
                             }
             
             # Update timeout display
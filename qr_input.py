@@ -2,40 +2,32 @@ import cv2
 import pygame
 import time
 import os
+from camera_preview import CameraPreview
+from camera_service import get_camera_service
+from qr_registry import QRRegistry
+from qr_scanner import QRScanner
 
 class QRInput:
     """Handle QR code input for the Stroop Effect game"""
     
     def __init__(self):
         self.detector = cv2.QRCodeDetector()
+        self.scanner = QRScanner(self.detector)
         self.cap = None
+        self.preview = CameraPreview()
         
         # QR codes mapping - what each QR code contains
+        self.registry = QRRegistry()
         self.qr_codes = {}
+        self._color_list = None
+        self._payload_indices = {}
         self._load_qr_codes()
 
     def _load_qr_codes(self):
-        """Load QR codes from the qrs directory"""
-        qr_dir = "qrs"
-        for color_name in ["red", "green", "blue", "yellow", "pink"]:
-            path = os.path.join(qr_dir, f"qr_{color_name}.jpg")
-            if os.path.exists(path):
-                img = cv2.imread(path)
-                if img is not None:
-                    val, _, _ = self.detector.detectAndDecode(img)
-                    val = val.strip().lower()
-                    print(f"[CHECK] Decoded QR for '{color_name}': '{val}'")
-
-                    if val:
-                        self.qr_codes[val] = color_name
-                        print(f"✔ Loaded QR code for '{color_name}' as '{val}'")
-                    else:
-                        print(f"[ERROR] Could not decode QR from: {path}")
-                else:
-                    print(f"[ERROR] Failed to read: {path}")
-            else:
-                print(f"[ERROR] QR file not found: {path}")
-        print(f"[INFO] Total QR codes loaded: {len(self.qr_codes)} → {self.qr_codes}")
+        """Load the payload of each QR code in qrs from the precomputed registry"""
+        self.qr_codes = self.registry.load(self.detector)
+        print(f"[INFO] Total QR codes loaded: {len(self.qr_codes)} → {self.qr_codes} "
+              f"({self.registry.decoded} decoded, {self.registry.load_time * 1e6:.0f} µs)")
 
     def get_input(self, colors, screen, ui_text, fonts, timeout=10):
         """
@@ -49,7 +41,8 @@ class QRInput:
             timeout: Timeout in seconds
             
         Returns:
-            Dictionary with success, color_index, and message
+            Dictionary with success, color_index, message and, on success,
+            response_ns (timestamp of the frame the QR code was read from)
         """
         if not self._init_camera():
             return {
@@ -62,6 +55,7 @@ class QRInput:
 
         start_time = time.time()
         detected_qr = None
+        self.scanner.reset()
 
         while (time.time() - start_time) < timeout:
             elapsed = time.time() - start_time
@@ -75,30 +69,29 @@ class QRInput:
                     return {'success': False, 'color_index': None, 'message': 'quit'}
 
             # Read from camera
-            ret, frame = self.cap.read()
+            ret, frame, frame_ns = self.cap.read_with_time()
             if not ret:
                 print("[ERROR] Couldn't read from camera")
                 continue
 
-            # Detect QR code
-            val, points, _ = self.detector.detectAndDecode(frame)
+            # Detect QR code (downscaled search, tracked between frames)
+            val, points = self.scanner.scan(frame)
+            self._update_preview(frame, points)
             if val:
                 detected_qr = val.strip().lower()
                 print(f"[DEBUG] Detected QR: '{detected_qr}'")
                 
                 # Check if this QR code is valid
                 if detected_qr in self.qr_codes:
-                    detected_color = self.qr_codes[detected_qr]
-                    print(f"[MATCH] QR matched to color: '{detected_color}'")
-                    
-                    # Find the color index in the colors list
-                    color_index = self._find_color_index(detected_color, colors)
+                    color_index = self._find_color_index(detected_qr, colors)
+                    print(f"[MATCH] QR matched to color: '{self.qr_codes[detected_qr]}'")
                     
                     self._cleanup_camera()
                     return {
                         'success': True,
                         'color_index': color_index,
-                        'message': 'success'
+                        'message': 'success',
+                        'response_ns': frame_ns
                     }
                 else:
                     print(f"[WARNING] QR '{detected_qr}' not in known QR codes")
@@ -107,8 +100,8 @@ class QRInput:
             # Update UI
             self._show_camera_instructions(screen, ui_text, fonts)
             self._show_timeout_warning(remaining, screen, ui_text, fonts)
+            self.preview.draw(screen)
             pygame.display.update()
-            pygame.time.wait(50)
 
         self._cleanup_camera()
 
@@ -119,46 +112,34 @@ class QRInput:
             'message': 'timeout'
         }
 
-    def _find_color_index(self, detected_color, colors):
+    def _find_color_index(self, payload, colors):
         """
-        Find the index of the detected color in the colors list
+        Find the index of a QR payload's color in the colors list
         
         Args:
-            detected_color: Color name from QR code (e.g., 'red')
-            colors: List of tuples [(color_name, color_rgb), ...]
+            payload: Decoded QR payload (e.g., 'red')
+            colors: List of tuples [(color_name, color_rgb), ...], English or Hindi
             
         Returns:
             Index of the color in the list, or -1 if not found
         """
-        for i, (color_name, color_rgb) in enumerate(colors):
-            # Handle both English and Hindi color names
-            if color_name.lower() == detected_color.lower():
-                print(f"[DEBUG] Found color '{detected_color}' at index {i}")
-                return i
-            
-            # Handle Hindi to English mapping
-            hindi_to_english = {
-                'लाल': 'red',
-                'हरा': 'green', 
-                'नीला': 'blue',
-                'पीला': 'yellow',
-                'गुलाबी': 'pink'
-            }
-            
-            if color_name in hindi_to_english and hindi_to_english[color_name] == detected_color.lower():
-                print(f"[DEBUG] Found Hindi color '{color_name}' mapped to '{detected_color}' at index {i}")
-                return i
-        
-        print(f"[ERROR] Color '{detected_color}' not found in colors list")
-        return -1
+        # One dict lookup per detection; rebuilt only when the colour list changes
+        if colors is not self._color_list:
+            self._color_list = colors
+            self._payload_indices = self.registry.color_indices(colors)
+        index = self._payload_indices.get(payload, -1)
+        if index < 0:
+            print(f"[ERROR] QR '{payload}' has no color in colors list")
+        return index
 
     def _init_camera(self):
-        """Initialize camera"""
+        """Subscribe to the shared camera capture service"""
         if self.cap and self.cap.isOpened():
             return True
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        self.cap = get_camera_service().subscribe()
+        if self.cap is None or not self.cap.isOpened():
             print("[ERROR] Cannot open camera")
+            self.cap = None
             return False
         print("[INFO] Camera opened successfully")
         return True
@@ -168,7 +149,16 @@ class QRInput:
         if self.cap:
             self.cap.release()
             self.cap = None
-        cv2.destroyAllWindows()
+        self.preview.clear()
+
+    def _update_preview(self, frame, points):
+        """Show the frame in the in-game preview, outlining a detected QR code"""
+        overlay = None
+        if points is not None and len(points):
+            height, width = frame.shape[:2]
+            outline = [(x / width, y / height) for x, y in points.reshape(-1, 2)]
+            overlay = {'polygon': (outline, (0, 200, 0))}
+        self.preview.update(frame, overlay)
 
     def _show_camera_instructions(self, screen, ui_text, fonts):
         """Show camera instructions on screen"""
@@ -228,13 +218,9 @@ class QRInput:
         return True
 
     def is_camera_available(self):
-        """Check if camera is available"""
+        """Check if camera is available (does not start the shared camera)"""
         try:
-            cap = cv2.VideoCapture(0)
-            if cap.isOpened():
-                cap.release()
-                return True
-            return False
+            return get_camera_service().is_available()
         except:
             return False
 
@@ -245,4 +231,5 @@ class QRInput:
     def cleanup(self):
         """Clean up resources"""
         self._cleanup_camera()
+        print(f"[QR] Scanner stats: {self.scanner.stats()}")
         print("[INFO] QRInput cleaned up.")
\ No newline at end of file
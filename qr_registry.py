@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Persisted QR payload -> colour registry.
+
+The payload printed in each reference image in qrs/ only has to be decoded
+once. The registry file keeps, per colour, the image's SHA-256 and the
+decoded payload; loading it costs one JSON read and five small-file hashes.
+An image is decoded again (and the file rewritten) only when its hash no
+longer matches, e.g. after a QR code was reprinted.
+
+Rebuild the registry explicitly with:
+    python qr_registry.py [--force]
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+QR_DIR = "qrs"
+REGISTRY_PATH = os.environ.get('STROOP_QR_REGISTRY', os.path.join(QR_DIR, 'registry.json'))
+REGISTRY_VERSION = 1
+
+# Canonical (English) colour of each reference image, in game colour order
+QR_COLORS = ["red", "green", "blue", "yellow", "pink"]
+
+HINDI_TO_ENGLISH = {
+    'लाल': 'red',
+    'हरा': 'green',
+    'नीला': 'blue',
+    'पीला': 'yellow',
+    'गुलाबी': 'pink'
+}
+
+
+def canonical_color(name):
+    """English colour name for an English or Hindi colour word"""
+    name = name.strip().lower()
+    return HINDI_TO_ENGLISH.get(name, name)
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _decode_image(path, detector=None):
+    """Payload of the QR code in an image file ('' if unreadable)"""
+    import cv2
+
+    img = cv2.imread(path)
+    if img is None:
+        print(f"[ERROR] Failed to read: {path}")
+        return ''
+    val, _, _ = (detector or cv2.QRCodeDetector()).detectAndDecode(img)
+    return val.strip().lower()
+
+
+class QRRegistry:
+    """Payload -> canonical colour name, backed by the registry file"""
+
+    def __init__(self, qr_dir=QR_DIR, path=REGISTRY_PATH):
+        self.qr_dir = qr_dir
+        self.path = path
+        self.entries = {}    # colour -> {'file', 'sha256', 'payload'}
+        self.payloads = {}   # payload -> colour
+        self.decoded = 0     # images decoded by the last load()
+        self.load_time = 0.0
+
+    def load(self, detector=None, force=False):
+        """
+        Read the registry file and refresh entries whose image changed
+
+        Args:
+            detector: cv2.QRCodeDetector to reuse for images that need decoding
+            force: Decode every image even if its hash matches
+
+        Returns:
+            dict: payload -> canonical colour name
+        """
+        started = time.perf_counter()
+        stored = {} if force else self._read()
+        self.entries = {}
+        self.decoded = 0
+        for color_name in QR_COLORS:
+            filename = f"qr_{color_name}.jpg"
+            path = os.path.join(self.qr_dir, filename)
+            if not os.path.exists(path):
+                print(f"[ERROR] QR file not found: {path}")
+                continue
+            digest = file_hash(path)
+            entry = stored.get(color_name)
+            if not entry or entry.get('sha256') != digest or not entry.get('payload'):
+                payload = _decode_image(path, detector)
+                self.decoded += 1
+                if not payload:
+                    print(f"[ERROR] Could not decode QR from: {path}")
+                    continue
+                print(f"[QR] Decoded '{filename}' as '{payload}'")
+                entry = {'file': filename, 'sha256': digest, 'payload': payload}
+            self.entries[color_name] = entry
+
+        if self.decoded:
+            self._write()
+        self.payloads = {}
+        for color_name, entry in self.entries.items():
+            other = self.payloads.setdefault(entry['payload'], color_name)
+            if other != color_name:
+                print(f"[WARNING] '{entry['file']}' has the same payload as qr_{other}.jpg; ignoring it")
+        self.load_time = time.perf_counter() - started
+        return self.payloads
+
+    def color_indices(self, colors):
+        """
+        Payload -> index into a colour list, for O(1) lookups per detection
+
+        Args:
+            colors: List of tuples [(color_name, color_rgb), ...] in either language
+
+        Returns:
+            dict: payload -> index (payloads whose colour is not in the list are left out)
+        """
+        positions = {canonical_color(name): i for i, (name, _) in enumerate(colors)}
+        return {payload: positions[color_name] for payload, color_name in self.payloads.items()
+                if color_name in positions}
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != REGISTRY_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def _write(self):
+        data = {'version': REGISTRY_VERSION, 'entries': self.entries}
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.write('\n')
+        except OSError as e:
+            print(f"[WARNING] Could not save QR registry {self.path}: {e}")
+
+
+if __name__ == "__main__":
+    registry = QRRegistry()
+    payloads = registry.load(force='--force' in sys.argv[1:])
+    print(f"{registry.path}: {payloads} ({registry.decoded} decoded, {registry.load_time * 1000:.2f} ms)")
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+QR detection on downscaled grayscale frames with ROI tracking.
+
+Locating a code is the expensive part and does not need full resolution,
+so the scanner finds the quad on a downscaled grayscale frame and decodes
+only that quad's neighbourhood at full resolution. Full-frame searches use
+cv2.QRCodeDetectorAruco where OpenCV provides it: the classic
+QRCodeDetector upsamples small inputs and costs about the same at any
+scale, while the ArUco-based one gets cheaper with the image. It misses
+more codes, though, so inside the small tracked box the classic detector
+is used.
+
+Once a code has been seen, the following frames search only an expanded
+box around its last position; every full_search_interval frames, or as
+soon as the code is lost, the whole frame is searched again.
+"""
+import time
+
+import cv2
+import numpy as np
+
+ARUCO_LOCATOR_AVAILABLE = hasattr(cv2, 'QRCodeDetectorAruco')
+
+
+class QRScanner:
+    """Stateful QR reader for a stream of camera frames"""
+
+    def __init__(self, detector=None, scale=0.5, roi_margin=0.3, full_search_interval=15):
+        """
+        Args:
+            detector: cv2.QRCodeDetector for decoding and tracked-box searches
+                (a new one by default)
+            scale: Downscale factor for full-frame searches
+            roi_margin: How far the tracked box is grown on each side, as a
+                fraction of the code's size
+            full_search_interval: Frames between forced full-frame searches
+        """
+        self.detector = detector or cv2.QRCodeDetector()
+        self.locator = cv2.QRCodeDetectorAruco() if ARUCO_LOCATOR_AVAILABLE else self.detector
+        self.scale = scale
+        self.roi_margin = roi_margin
+        self.full_search_interval = full_search_interval
+        self.reset()
+
+        # Diagnostics
+        self.frames = 0
+        self.hits = 0
+        self.full_searches = 0
+        self.tracked_searches = 0
+        self.total_time = 0.0
+
+    def reset(self):
+        """Drop the tracked code, e.g. between trials"""
+        self.roi = None  # (x1, y1, x2, y2) in full-resolution pixels
+        self.frames_since_full = 0
+
+    def scan(self, frame):
+        """
+        Look for a QR code in one frame
+
+        Args:
+            frame: BGR or grayscale frame
+
+        Returns:
+            tuple: (payload str, or '' if nothing decoded; (4, 2) corner array
+                in frame pixels, or None if no code was located)
+        """
+        started = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        self.frames += 1
+
+        payload, quad = '', None
+        if self.roi is not None and self.frames_since_full < self.full_search_interval:
+            self.tracked_searches += 1
+            self.frames_since_full += 1
+            payload, quad = self._scan_roi(gray, self.roi)
+        if quad is None:
+            self.full_searches += 1
+            self.frames_since_full = 0
+            payload, quad = self._scan_full(gray)
+
+        self.roi = self._grow(quad, gray.shape) if quad is not None else None
+        if payload:
+            self.hits += 1
+        self.total_time += time.perf_counter() - started
+        return payload, quad
+
+    def _scan_full(self, gray):
+        """Locate on a downscaled copy, then decode around the quad at full resolution"""
+        small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        found, points = self.locator.detect(small)
+        if not found or points is None:
+            return '', None
+        quad = points.reshape(4, 2) / self.scale
+        return self._scan_roi(gray, self._grow(quad, gray.shape), quad)
+
+    def _scan_roi(self, gray, roi, quad=None):
+        """
+        Decode inside roi at full resolution; locate the code there first
+        unless a full-resolution quad estimate is given
+        """
+        x1, y1, x2, y2 = roi
+        crop = gray[y1:y2, x1:x2]
+        if quad is None:
+            found, points = self.detector.detect(crop)
+            if not found or points is None:
+                return '', None
+            local = points.reshape(4, 2)
+        else:
+            local = (quad - (x1, y1)).astype(np.float32)
+        payload, _ = self.detector.decode(crop, local.reshape(1, 4, 2))[:2]
+        if not payload and quad is not None:
+            # Corners from the downscaled frame can be a little off; relocate at full resolution
+            found, points = self.detector.detect(crop)
+            if found and points is not None:
+                local = points.reshape(4, 2)
+                payload = self.detector.decode(crop, local.reshape(1, 4, 2))[0]
+        return payload or '', local + (x1, y1)
+
+    def _grow(self, quad, shape):
+        """Bounding box of quad grown by roi_margin on every side, clipped to the frame"""
+        height, width = shape[:2]
+        x_min, y_min = quad.min(axis=0)
+        x_max, y_max = quad.max(axis=0)
+        pad = self.roi_margin * max(x_max - x_min, y_max - y_min)
+        return (max(0, int(x_min - pad)), max(0, int(y_min - pad)),
+                min(width, int(np.ceil(x_max + pad))), min(height, int(np.ceil(y_max + pad))))
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'hits': self.hits,
+            'full_searches': self.full_searches,
+            'tracked_searches': self.tracked_searches,
+            'mean_scan_ms': round(1000 * self.total_time / self.frames, 2) if self.frames else None
+        }
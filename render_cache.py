@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import math
+import re
+from collections import OrderedDict
+
+import pygame
+
+try:
+    import numpy as np
+    import pygame.surfarray
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Split mixed text into Latin (English font) and non-Latin (Hindi font) runs
+SEGMENT_PATTERN = re.compile(r'[A-Za-z0-9]+|[^A-Za-z0-9]+')
+LATIN_PATTERN = re.compile(r'[A-Za-z0-9]')
+
+
+class TextSurfaceCache:
+    """Bounded LRU cache of pre-composited text surfaces"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached surface for key, or None on a miss"""
+        surface = self._surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self._surfaces.move_to_end(key)
+        self.hits += 1
+        return surface
+
+    def put(self, key, surface):
+        """Store a surface, evicting the least recently used entries"""
+        self._surfaces[key] = surface
+        self._surfaces.move_to_end(key)
+        while len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached surface (e.g. after the fonts change)"""
+        self._surfaces.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+def compose_text_surface(text, english_font, hindi_font, color):
+    """Render mixed English/Hindi text into a single SRCALPHA surface"""
+    rendered_segments = []
+    for segment in SEGMENT_PATTERN.findall(text):
+        if LATIN_PATTERN.match(segment):
+            surf = english_font.render(segment, True, color)
+        else:
+            surf = hindi_font.render(segment, True, color)
+        rendered_segments.append(surf)
+
+    if not rendered_segments:
+        # Empty string: keep the line height so layouts do not jump
+        return pygame.Surface((0, english_font.get_height()), pygame.SRCALPHA)
+
+    # Combine all segments horizontally
+    total_width = sum(s.get_width() for s in rendered_segments)
+    max_height = max(s.get_height() for s in rendered_segments)
+    final_surface = pygame.Surface((total_width, max_height), pygame.SRCALPHA)
+
+    x_offset = 0
+    for seg in rendered_segments:
+        final_surface.blit(seg, (x_offset, 0))
+        x_offset += seg.get_width()
+
+    return final_surface
+
+
+class GradientCache:
+    """Bakes gradient rectangles once and hands back the cached surfaces"""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._layers = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, start_color, end_color, size, vertical=True):
+        """Return a surface of the given size filled with the gradient"""
+        key = (tuple(start_color[:3]), tuple(end_color[:3]), tuple(size), vertical)
+        layer = self._layers.get(key)
+        if layer is not None:
+            self._layers.move_to_end(key)
+            self.hits += 1
+            return layer
+
+        self.misses += 1
+        layer = bake_gradient(key[0], key[1], key[2], vertical)
+        self._layers[key] = layer
+        while len(self._layers) > self.max_entries:
+            self._layers.popitem(last=False)
+        return layer
+
+    def blit(self, surface, start_color, end_color, rect, vertical=True):
+        """Blit the cached gradient for rect onto surface"""
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        surface.blit(self.get(start_color, end_color, rect.size, vertical), rect.topleft)
+
+    def clear(self):
+        self._layers.clear()
+
+
+def bake_gradient(start_color, end_color, size, vertical=True):
+    """Render a linear gradient into a new surface"""
+    width, height = size
+    layer = pygame.Surface((width, height))
+    steps = height if vertical else width
+
+    if NUMPY_AVAILABLE:
+        # Same ratios and int() truncation as the per-line version
+        ratio = np.arange(steps, dtype=np.float64) / steps
+        start = np.array(start_color, dtype=np.float64)
+        end = np.array(end_color, dtype=np.float64)
+        ramp = (start * (1 - ratio)[:, None] + end * ratio[:, None]).astype(np.uint8)
+        if vertical:
+            pixels = np.broadcast_to(ramp[None, :, :], (width, height, 3))
+        else:
+            pixels = np.broadcast_to(ramp[:, None, :], (width, height, 3))
+        pygame.surfarray.blit_array(layer, np.ascontiguousarray(pixels))
+        return layer
+
+    for i in range(steps):
+        ratio = i / steps
+        color = tuple(int(s * (1 - ratio) + e * ratio) for s, e in zip(start_color, end_color))
+        if vertical:
+            pygame.draw.line(layer, color, (0, i), (width, i))
+        else:
+            pygame.draw.line(layer, color, (i, 0), (i, height))
+    return layer
+
+
+class ParticleField:
+    """Precomputed trajectories for the floating background particles"""
+
+    def __init__(self, width, height, color, count=20, steps=628):
+        self.count = count
+        self.steps = steps
+        self.step_size = 2 * math.pi / steps
+
+        # One row per time step, one column per particle: (x, y, radius)
+        self.table = []
+        for step in range(steps):
+            t = step * self.step_size
+            row = []
+            for i in range(count):
+                x = (160 + i * 48 + math.sin(t + i) * 24) % width
+                y = (160 + i * 48 + math.cos(t + i) * 24) % height
+                size = 3 + math.sin(t + i * 0.3) * 2
+                row.append((int(x), int(y), int(size)))
+            self.table.append(row)
+
+        # Pre-rendered dot sprites, one per radius
+        self.sprites = {}
+        for radius in range(1, 6):
+            sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
+            self.sprites[radius] = sprite
+
+    def positions(self, time_offset):
+        """Return the (x, y, radius) list for an animation time"""
+        index = int(round(time_offset / self.step_size)) % self.steps
+        return self.table[index]
+
+    def draw(self, surface, time_offset):
+        """Blit every particle at its position for time_offset"""
+        sprites = self.sprites
+        surface.blits([(sprites[r], (x - r, y - r)) for x, y, r in self.positions(time_offset)],
+                      doreturn=False)
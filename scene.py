@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import pygame
+
+
+class Widget:
+    """A retained screen element that redraws itself only when its state changes"""
+
+    def __init__(self, name, rect, draw_fn, visible=True, **state):
+        """
+        Args:
+            name: Key used to look the widget up in its scene
+            rect: Screen area the widget may paint into (include shadows/borders)
+            draw_fn: Callable draw_fn(surface, rect, state) doing the actual drawing
+            visible: Whether the widget is drawn at all
+            **state: Initial state passed to draw_fn
+        """
+        self.name = name
+        self.rect = pygame.Rect(rect)
+        self.draw_fn = draw_fn
+        self.visible = visible
+        self.state = dict(state)
+        self.dirty = True
+
+    def set(self, **state):
+        """Update state; the widget is marked dirty only if something changed"""
+        for key, value in state.items():
+            if self.state.get(key, object()) != value:
+                self.state.update(state)
+                self.dirty = True
+                return
+
+    def show(self):
+        if not self.visible:
+            self.visible = True
+            self.dirty = True
+
+    def hide(self):
+        if self.visible:
+            self.visible = False
+            self.dirty = True
+
+    def draw(self, surface):
+        if self.visible:
+            self.draw_fn(surface, self.rect, self.state)
+
+
+class Scene:
+    """Retained-mode screen: a cached background plus widgets in z-order"""
+
+    def __init__(self, size, draw_background):
+        """
+        Args:
+            size: (width, height) of the screen
+            draw_background: Callable draw_background(surface) painting the backdrop
+        """
+        self.draw_background = draw_background
+        self.background = pygame.Surface(size)
+        self.widgets = []
+        self._by_name = {}
+        self._full_redraw = True
+        self._damage = []
+
+        # Per-render counters so callers can see what each frame cost
+        self.frames = 0
+        self.full_redraws = 0
+        self.pixels_pushed = 0
+
+    def add(self, widget):
+        """Add a widget on top of the existing ones"""
+        self.widgets.append(widget)
+        self._by_name[widget.name] = widget
+        return widget
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def invalidate(self, rect=None):
+        """Mark an area (or the whole screen) as overwritten by someone else"""
+        if rect is None:
+            self._full_redraw = True
+        else:
+            self._damage.append(pygame.Rect(rect))
+
+    def refresh_background(self):
+        """Repaint the cached backdrop (e.g. to advance its animation)"""
+        self.draw_background(self.background)
+        self._full_redraw = True
+
+    def render(self, surface):
+        """
+        Draw what changed and push it to the display
+
+        Returns:
+            list: Screen rects that were updated
+        """
+        self.frames += 1
+
+        if self._full_redraw:
+            self.draw_background(self.background)
+            surface.blit(self.background, (0, 0))
+            for widget in self.widgets:
+                widget.draw(surface)
+                widget.dirty = False
+            self._full_redraw = False
+            self._damage = []
+            self.full_redraws += 1
+            self.pixels_pushed += surface.get_width() * surface.get_height()
+            pygame.display.flip()
+            return [surface.get_rect()]
+
+        rects = self._damage
+        self._damage = []
+        for widget in self.widgets:
+            if widget.dirty:
+                rects.append(widget.rect.copy())
+                widget.dirty = False
+        if not rects:
+            return []
+
+        rects = _merge_rects(rects)
+        clip = surface.get_clip()
+        for area in rects:
+            surface.set_clip(area)
+            surface.blit(self.background, area, area)
+            for widget in self.widgets:
+                if widget.visible and widget.rect.colliderect(area):
+                    widget.draw(surface)
+            self.pixels_pushed += area.width * area.height
+        surface.set_clip(clip)
+
+        pygame.display.update(rects)
+        return rects
+
+    def stats(self):
+        """Return render counters"""
+        return {
+            'frames': self.frames,
+            'full_redraws': self.full_redraws,
+            'pixels_pushed': self.pixels_pushed
+        }
+
+
+def _merge_rects(rects):
+    """Union overlapping rects so no area is drawn twice"""
+    merged = []
+    for rect in rects:
+        for i, other in enumerate(merged):
+            if rect.colliderect(other):
+                merged[i] = other.union(rect)
+                break
+        else:
+            merged.append(rect)
+    return merged
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import speech_recognition as sr
+
+try:
+    from vosk import Model, KaldiRecognizer, SetLogLevel
+    SetLogLevel(-1)
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+# Locales tried in order by the online backend
+GOOGLE_LOCALES = {
+    'english': ['en-US', 'en-IN', 'en-GB'],
+    'hindi': ['hi-IN', 'en-IN', 'hi', 'en-US']
+}
+
+# Offline models, overridable per machine
+VOSK_MODEL_PATHS = {
+    'english': os.environ.get('STROOP_VOSK_MODEL_EN', os.path.join('models', 'vosk-model-small-en-us-0.15')),
+    'hindi': os.environ.get('STROOP_VOSK_MODEL_HI', os.path.join('models', 'vosk-model-small-hi-0.22'))
+}
+
+VOSK_SAMPLE_RATE = 16000
+
+# A colour match at least this confident ends the search at once (exact words
+# and phrases); weaker matches wait for the other locales and backends
+EARLY_ACCEPT_CONFIDENCE = 0.95
+
+# Upper edges (ms) of the per-locale latency histogram buckets
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 4000)
+
+
+def colour_vocabulary(colors):
+    """Colour words (plus any listed alternatives) from a LANGUAGES[...]['colors'] list"""
+    words = []
+    for color_data in colors:
+        if isinstance(color_data, (list, tuple)):
+            words.append(color_data[0])
+            if len(color_data) > 2 and isinstance(color_data[2], list):
+                words.extend(color_data[2])
+        else:
+            words.append(str(color_data))
+    return [word.lower() for word in words]
+
+
+def vocabulary_language(words):
+    """'hindi' if any colour word is in Devanagari, else 'english'"""
+    for word in words:
+        if any('ऀ' <= ch <= 'ॿ' for ch in word):
+            return 'hindi'
+    return 'english'
+
+
+class SpeechBackend:
+    """Base class: turns an AudioData clip into text, timing every call"""
+
+    name = 'base'
+
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.total_latency = 0.0
+        self.last_latency = None
+
+    def is_available(self, language):
+        return True
+
+    def warm_up(self, language, vocabulary=None):
+        """Load whatever the first recognition would otherwise have to load"""
+
+    def transcribe(self, audio, language, vocabulary, matcher=None):
+        """
+        Return the recognised text; raise sr.UnknownValueError if nothing matched
+
+        matcher is an optional color_matcher.ColorMatcher; backends that
+        produce several candidates use it to pick one that maps to a colour.
+        """
+        raise NotImplementedError
+
+    def recognize(self, audio, language, vocabulary, matcher=None):
+        """transcribe() with latency bookkeeping"""
+        started = time.perf_counter()
+        try:
+            text = self.transcribe(audio, language, vocabulary, matcher)
+            self.successes += 1
+            return text
+        finally:
+            self.last_latency = time.perf_counter() - started
+            self.total_latency += self.last_latency
+            self.calls += 1
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'successes': self.successes,
+            'mean_latency_ms': round(self.total_latency / self.calls * 1000, 1) if self.calls else None,
+            'last_latency_ms': round(self.last_latency * 1000, 1) if self.last_latency is not None else None
+        }
+
+
+class LocaleHistogram:
+    """Per-locale latency histogram and colour-match counts"""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._locales = {}
+        self._lock = threading.Lock()
+
+    def record(self, locale, latency, outcome):
+        """
+        Args:
+            locale: Recognizer locale, e.g. 'hi-IN'
+            latency: Seconds the request took
+            outcome: 'match', 'no_match' (text but no colour), 'unknown' or 'error'
+        """
+        latency_ms = latency * 1000
+        bucket = next((i for i, edge in enumerate(self.buckets_ms) if latency_ms <= edge), len(self.buckets_ms))
+        with self._lock:
+            entry = self._locales.setdefault(locale, {
+                'counts': [0] * (len(self.buckets_ms) + 1),
+                'outcomes': {'match': 0, 'no_match': 0, 'unknown': 0, 'error': 0},
+                'total_ms': 0.0
+            })
+            entry['counts'][bucket] += 1
+            entry['outcomes'][outcome] += 1
+            entry['total_ms'] += latency_ms
+
+    def stats(self):
+        labels = [f"<={edge}ms" for edge in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        with self._lock:
+            report = {}
+            for locale, entry in self._locales.items():
+                calls = sum(entry['counts'])
+                report[locale] = {
+                    'calls': calls,
+                    'mean_ms': round(entry['total_ms'] / calls, 1),
+                    'match_rate': round(entry['outcomes']['match'] / calls, 3),
+                    'outcomes': dict(entry['outcomes']),
+                    'histogram': dict(zip(labels, entry['counts']))
+                }
+            return report
+
+
+class GoogleBackend(SpeechBackend):
+    """
+    Online Google Web Speech API, all locales of a language queried at once
+
+    Each locale is a separate request on a bounded thread pool, and the
+    matcher scores its whole n-best list in one match_nbest() call. The first
+    locale with a match of at least EARLY_ACCEPT_CONFIDENCE wins; requests
+    that have not started are then cancelled and late ones are left to
+    finish in the background (they still feed the histogram). Weaker matches
+    wait for every locale and the most confident one wins, ties going to
+    the higher-priority locale. Without a colour match the text from the
+    highest-priority locale is returned.
+    """
+
+    name = 'google'
+
+    def __init__(self, recognizer, max_workers=4):
+        super().__init__()
+        self.recognizer = recognizer
+        self.histogram = LocaleHistogram()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speech-locale")
+
+    def _recognize_locale(self, audio, locale, matcher):
+        started = time.perf_counter()
+        try:
+            # n-best list: a lower-ranked alternative may be the colour word
+            result = self.recognizer.recognize_google(audio, language=locale, show_all=True)
+            alternatives = [alt for alt in result.get('alternative', []) if alt.get('transcript')] if result else []
+            if not alternatives:
+                raise sr.UnknownValueError()
+        except sr.UnknownValueError:
+            self.histogram.record(locale, time.perf_counter() - started, 'unknown')
+            raise
+        except Exception:
+            self.histogram.record(locale, time.perf_counter() - started, 'error')
+            raise
+        text = alternatives[0]['transcript']
+        confidence = 1.0 if matcher is None else 0.0
+        if matcher is not None:
+            index, match_confidence, transcript = matcher.match_nbest(alternatives)
+            if index is not None:
+                text, confidence = transcript, match_confidence
+        self.histogram.record(locale, time.perf_counter() - started, 'match' if confidence else 'no_match')
+        return text, confidence
+
+    def transcribe(self, audio, language, vocabulary, matcher=None):
+        locales = GOOGLE_LOCALES.get(language, GOOGLE_LOCALES['english'])
+        futures = {self._executor.submit(self._recognize_locale, audio, locale, matcher): locale
+                   for locale in locales}
+        unmatched = {}
+        matched = {}
+        request_error = None
+        try:
+            for future in as_completed(futures):
+                locale = futures[future]
+                try:
+                    text, confidence = future.result()
+                except sr.UnknownValueError:
+                    print(f"  Google ({locale}): Could not understand audio")
+                    continue
+                except sr.RequestError as e:
+                    print(f"  Google ({locale}): Request failed - {e}")
+                    request_error = e
+                    continue
+                if confidence >= EARLY_ACCEPT_CONFIDENCE:
+                    print(f"  Google ({locale}) won: '{text}'")
+                    return text
+                if confidence:
+                    matched[locale] = (confidence, text)
+                else:
+                    unmatched[locale] = text
+        finally:
+            for future in futures:
+                future.cancel()
+
+        if matched:
+            # Most confident match; on a tie the locale listed first
+            locale = max(locales, key=lambda locale: matched.get(locale, (0.0,))[0])
+            print(f"  Google ({locale}) best match: '{matched[locale][1]}' ({matched[locale][0]:.2f})")
+            return matched[locale][1]
+        for locale in locales:
+            if locale in unmatched:
+                return unmatched[locale]
+        if request_error is not None:
+            raise request_error
+        raise sr.UnknownValueError()
+
+    def stats(self):
+        report = super().stats()
+        report['locales'] = self.histogram.stats()
+        return report
+
+
+class StandInRecognizer:
+    """
+    Offline stand-in for sr.Recognizer.recognize_google, for tests and benchmarks
+
+    responses maps a locale to (text, latency seconds); text None means the
+    locale does not understand the clip, and locales not listed raise a
+    RequestError as if the service were unreachable. text may also be a list
+    of n-best transcripts, best first.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def recognize_google(self, audio_data, key=None, language='en-US', show_all=False):
+        if language not in self.responses:
+            raise sr.RequestError(f"no stand-in response for {language}")
+        text, latency = self.responses[language]
+        time.sleep(latency)
+        alternatives = text if isinstance(text, list) else [text] if text is not None else []
+        if show_all:
+            # Same shape as the Web Speech API: [] when nothing was understood
+            return {'alternative': [{'transcript': t} for t in alternatives], 'final': True} if alternatives else []
+        if not alternatives:
+            raise sr.UnknownValueError()
+        return alternatives[0]
+
+
+class VoskBackend(SpeechBackend):
+    """
+    Offline Kaldi recognition restricted to the colour words
+
+    Models are loaded once and kept in memory; each (language, vocabulary)
+    pair keeps its own grammar-constrained recognizer that is reset between
+    clips, so a recognition costs only the decoding itself.
+    """
+
+    name = 'vosk'
+
+    def __init__(self, model_paths=None):
+        super().__init__()
+        self.model_paths = dict(model_paths or VOSK_MODEL_PATHS)
+        self._models = {}
+        self._recognizers = {}
+        self._lock = threading.Lock()
+
+    def is_available(self, language):
+        return VOSK_AVAILABLE and os.path.isdir(self.model_paths.get(language, ''))
+
+    def _model(self, language):
+        model = self._models.get(language)
+        if model is None:
+            started = time.perf_counter()
+            model = Model(self.model_paths[language])
+            self._models[language] = model
+            print(f"[SPEECH] Loaded {language} Vosk model in {time.perf_counter() - started:.2f}s")
+        return model
+
+    def _recognizer(self, language, vocabulary):
+        key = (language, tuple(vocabulary))
+        recognizer = self._recognizers.get(key)
+        if recognizer is None:
+            # "[unk]" absorbs anything outside the grammar instead of forcing a colour
+            grammar = json.dumps(list(vocabulary) + ['[unk]'], ensure_ascii=False)
+            recognizer = KaldiRecognizer(self._model(language), VOSK_SAMPLE_RATE, grammar)
+            self._recognizers[key] = recognizer
+        return recognizer
+
+    def warm_up(self, language, vocabulary=None):
+        if self.is_available(language):
+            with self._lock:
+                if vocabulary is None:
+                    self._model(language)
+                else:
+                    self._recognizer(language, vocabulary)
+
+    def transcribe(self, audio, language, vocabulary, matcher=None):
+        pcm = audio.get_raw_data(convert_rate=VOSK_SAMPLE_RATE, convert_width=2)
+        if not isinstance(pcm, bytes):
+            # In-memory clips may hold a memoryview; the Vosk C API wants bytes
+            pcm = bytes(pcm)
+        with self._lock:
+            recognizer = self._recognizer(language, vocabulary)
+            recognizer.AcceptWaveform(pcm)
+            text = json.loads(recognizer.FinalResult()).get('text', '')
+            recognizer.Reset()
+
+        words = [word for word in text.split() if word != '[unk]']
+        if not words:
+            raise sr.UnknownValueError()
+        return ' '.join(words)
+
+
+class SpeechRecognizerChain:
+    """Runs the configured backends in order until one returns text"""
+
+    def __init__(self, backends):
+        self.backends = backends
+
+    def preload(self, languages=('english', 'hindi')):
+        """Load models up front (e.g. while the handler is being prewarmed)"""
+        for language in languages:
+            for backend in self.backends:
+                if backend.is_available(language):
+                    backend.warm_up(language)
+
+    def warm_up(self, colors):
+        """Prepare the grammar for this colour list before the trial starts"""
+        vocabulary = colour_vocabulary(colors)
+        language = vocabulary_language(vocabulary)
+        for backend in self.backends:
+            if backend.is_available(language):
+                backend.warm_up(language, vocabulary)
+
+    def recognize(self, audio, colors, language=None, matcher=None):
+        """
+        Recognise a clip against the colour words in colors
+
+        Args:
+            audio: speech_recognition AudioData
+            colors: LANGUAGES[...]['colors'] list of the current game
+            language: 'english' or 'hindi' (inferred from the colour words if None)
+            matcher: Optional color_matcher.ColorMatcher. Unless a backend's
+                text matches a colour with at least EARLY_ACCEPT_CONFIDENCE,
+                the next backend is tried too and the most confident match
+                wins; text matching no colour is only returned if no backend
+                does better.
+
+        Returns:
+            tuple: (text, backend name) or (None, error message)
+        """
+        vocabulary = colour_vocabulary(colors)
+        language = language or vocabulary_language(vocabulary)
+        error = "No speech recognizer available"
+        fallback = None
+        best = None  # (confidence, text, backend name)
+        for backend in self.backends:
+            if not backend.is_available(language):
+                continue
+            print(f"Trying {backend.name} recognition ({language})...")
+            try:
+                text = backend.recognize(audio, language, vocabulary, matcher)
+                print(f"[SPEECH] {backend.name} recognised '{text}' in {backend.last_latency * 1000:.0f} ms")
+                if matcher is None:
+                    return text, backend.name
+                index, confidence = matcher.match(text)
+                if index is None:
+                    fallback = fallback or (text, backend.name)
+                    continue
+                if confidence >= EARLY_ACCEPT_CONFIDENCE:
+                    return text, backend.name
+                if best is None or confidence > best[0]:
+                    best = (confidence, text, backend.name)
+            except sr.UnknownValueError as e:
+                print(f"[SPEECH] {backend.name}: no match after {backend.last_latency * 1000:.0f} ms")
+                error = str(e) or "Could not understand speech"
+            except Exception as e:
+                print(f"[SPEECH] {backend.name} error: {e}")
+                error = f"Recognition error: {e}"
+        if best is not None:
+            return best[1], best[2]
+        return fallback or (None, error)
+
+    def stats(self):
+        return {backend.name: backend.stats() for backend in self.backends}
+
+
+def build_recognizer_chain(recognizer, preference=None):
+    """
+    Backends in the order selected by STROOP_SPEECH_BACKEND
+
+    'vosk' (offline only), 'google' (online only) or 'auto' (offline first,
+    Google as fallback).
+    """
+    preference = (preference or os.environ.get('STROOP_SPEECH_BACKEND', 'auto')).lower()
+    if preference == 'vosk':
+        backends = [VoskBackend()]
+    elif preference == 'google':
+        backends = [GoogleBackend(recognizer)]
+    else:
+        backends = [VoskBackend(), GoogleBackend(recognizer)]
+    return SpeechRecognizerChain(backends)
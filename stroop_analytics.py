@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorised Stroop analytics over the trials table.
+
+load_trials() reads the whole per-trial log with one query into NumPy
+arrays (strings become integer codes). stroop_tables() then computes, for
+any groupings (per participant, per method and language, ...), without a
+Python loop over groups or trials:
+
+- accuracy, and mean, median and trimmed-mean correct RT per condition;
+- the interference (Stroop) effect: incongruent minus congruent mean
+  correct RT;
+- inverse efficiency scores (mean correct RT / accuracy) and their
+  interference;
+- bootstrap percentile confidence intervals for the interference,
+  resampling trials within each participant, method, language and
+  condition (one resampling pass serves every grouping).
+
+RTs outside [min_rt, max_rt] (anticipations, timeouts) and error trials
+are left out of the RT measures but count towards accuracy.
+
+Run directly for a report:
+    python stroop_analytics.py [stroop_efficiency.db] [participant | method,language]
+"""
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+ANALYTICS_CONFIG = {
+    'min_rt': 0.2,  # seconds; faster responses are anticipations
+    'max_rt': 10.0,  # seconds; the input handlers time out at 10 s
+    'trim': 0.1,  # fraction cut from each end for the trimmed mean
+    'bootstrap': 1000,  # resamples for the interference CI; 0 = no CI
+    'confidence': 0.95,
+    'seed': 0
+}
+
+TRIAL_QUERY = "SELECT participant, method, language, congruent, correct, latency FROM trials"
+CATEGORICAL = ('participant', 'method', 'language')
+
+# Resampled values held in memory at once by the bootstrap
+BOOTSTRAP_CHUNK_VALUES = 500_000
+
+
+def _encode(column):
+    """Integer codes for a column of strings, and the sorted labels they index"""
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in column), dtype=np.int64,
+                        count=len(column))
+    labels = np.array([str(value) for value in index], dtype=str)
+    order = np.argsort(labels, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank[codes], labels[order]
+
+
+def trials_from_rows(rows):
+    """
+    Column arrays from rows shaped like TRIAL_QUERY's result
+
+    Returns:
+        dict: For each CATEGORICAL column an int code array plus its sorted
+            labels under '<column>_labels'; 'congruent' and 'correct' as
+            bool, 'latency' as float64 (NaN where missing)
+    """
+    columns = list(zip(*rows)) if rows else [()] * 6
+    trials = {}
+    for name, column in zip(CATEGORICAL, columns[:3]):
+        trials[name], trials[name + '_labels'] = _encode(column)
+    trials['congruent'] = np.array(columns[3], dtype=bool)
+    trials['correct'] = np.array(columns[4], dtype=bool)
+    trials['latency'] = np.array(columns[5], dtype=np.float64)
+    return trials
+
+
+def load_trials(source='stroop_efficiency.db', where='', params=()):
+    """
+    Load the trials table in one query
+
+    Args:
+        source: Database path, sqlite3 connection, or db_writer.DatabaseWriter
+        where: Optional SQL condition, e.g. "language = ?"
+        params: Parameters for where
+
+    Returns:
+        dict: See trials_from_rows()
+    """
+    sql = TRIAL_QUERY + (f" WHERE {where}" if where else "")
+    if hasattr(source, 'query'):
+        rows = source.query(sql, params)
+    elif isinstance(source, sqlite3.Connection):
+        rows = source.execute(sql, params).fetchall()
+    else:
+        conn = sqlite3.connect(source)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+    return trials_from_rows(rows)
+
+
+def _groups(trials, by):
+    """Group index per trial and the label tuple of each group"""
+    if not by:
+        return np.zeros(len(trials['latency']), dtype=np.int64), [()]
+    # One mixed-radix integer per trial, so a 1-D unique finds the groups
+    combined = np.zeros(len(trials['latency']), dtype=np.int64)
+    for name in by:
+        combined = combined * len(trials[name + '_labels']) + trials[name]
+    unique, inverse = np.unique(combined, return_inverse=True)
+    codes = []
+    for name in reversed(by):
+        radix = len(trials[name + '_labels'])
+        codes.append(trials[name + '_labels'][unique % radix])
+        unique = unique // radix
+    keys = [tuple(str(label) for label in row) for row in zip(*reversed(codes))]
+    return inverse.reshape(-1), keys
+
+
+def _sorted_by_group(values, groups, num_groups):
+    """
+    Finite values sorted by (group, value), with each group's start and size
+
+    Sorts the single key group * span + value (span exceeds the value range)
+    instead of a two-key lexsort, which is several times slower; values come
+    back to within float rounding.
+    """
+    sizes = np.bincount(groups, minlength=num_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    if not len(values):
+        return values.astype(np.float64), starts, sizes
+    low = values.min()
+    span = values.max() - low + 1.0
+    keys = np.sort(groups * span + (values - low))
+    ordered = keys - np.repeat(np.arange(num_groups) * span, sizes) + low
+    return ordered, starts, sizes
+
+
+def grouped_median(values, groups, num_groups):
+    """Median of values per group (NaN for empty groups)"""
+    ordered, starts, sizes = _sorted_by_group(values, groups, num_groups)
+    result = np.full(num_groups, np.nan)
+    present = sizes > 0
+    low = starts[present] + (sizes[present] - 1) // 2
+    high = starts[present] + sizes[present] // 2
+    result[present] = (ordered[low] + ordered[high]) / 2
+    return result
+
+
+def grouped_trimmed_mean(values, groups, num_groups, trim):
+    """Mean per group after cutting floor(trim * n) values from each end (NaN for empty groups)"""
+    ordered, starts, sizes = _sorted_by_group(values, groups, num_groups)
+    cut = np.floor(trim * sizes).astype(np.int64)
+    kept = sizes - 2 * cut
+    cumulative = np.concatenate(([0.0], np.cumsum(ordered)))
+    sums = cumulative[starts + sizes - cut] - cumulative[starts + cut]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(kept > 0, sums / np.maximum(kept, 1), np.nan)
+
+
+def bootstrap_interference(values, strata, cell_maps, resamples, confidence, rng):
+    """
+    Percentile CIs of the incongruent - congruent mean for several groupings
+
+    Each replicate resamples the values of every stratum (participant,
+    method, language and condition) with replacement at its own size, in
+    chunks of (replicates, values) matrices summed per stratum with
+    np.add.reduceat. Every grouping then adds up the stratum sums of its
+    cells, so one resampling pass serves all of them.
+
+    Args:
+        values: Correct RTs
+        strata: Stratum index of each value
+        cell_maps: For each grouping, (cell of each stratum, number of
+            groups), a cell being group * 2 + incongruent
+        resamples: Bootstrap replicates
+        confidence: CI level
+        rng: numpy Generator
+
+    Returns:
+        list: (low, high) arrays per grouping, NaN where a group lacks
+            either condition
+    """
+    results = [(np.full(num_groups, np.nan), np.full(num_groups, np.nan)) for _, num_groups in cell_maps]
+    if not resamples or not len(values):
+        return results
+
+    ordered, starts, sizes = _sorted_by_group(values, strata, int(strata.max()) + 1)
+    present = sizes > 0
+    starts, sizes = starts[present], sizes[present]
+    ordered = ordered.astype(np.float32)
+    offsets = np.repeat(starts, sizes).astype(np.int32)
+    spans = np.repeat(sizes, sizes)
+    last = (spans - 1).astype(np.int32)
+    spans = spans.astype(np.float32)
+
+    groupings = []
+    for stratum_cells, num_groups in cell_maps:
+        cells = stratum_cells[present]
+        order = np.argsort(cells, kind='stable')
+        cell_ids, first = np.unique(cells[order], return_index=True)
+        cell_sizes = np.bincount(cells, weights=sizes, minlength=2 * num_groups)[cell_ids]
+        groupings.append((order, first, cell_ids, cell_sizes, num_groups, []))
+
+    chunk = max(1, BOOTSTRAP_CHUNK_VALUES // len(values))
+    for done in range(0, resamples, chunk):
+        count = min(chunk, resamples - done)
+        draws = rng.random((count, len(values)), dtype=np.float32)
+        draws *= spans
+        picks = draws.astype(np.int32)
+        np.minimum(picks, last, out=picks)  # float32 rounding can reach the span itself
+        picks += offsets
+        sums = np.add.reduceat(ordered.take(picks), starts, axis=1, dtype=np.float64)
+        for order, first, cell_ids, cell_sizes, num_groups, differences in groupings:
+            means = np.full((count, 2 * num_groups), np.nan)
+            means[:, cell_ids] = np.add.reduceat(sums[:, order], first, axis=1) / cell_sizes
+            differences.append(means[:, 1::2] - means[:, 0::2])
+
+    tail = (1 - confidence) / 2 * 100
+    for (low, high), (_, _, cell_ids, _, num_groups, differences) in zip(results, groupings):
+        differences = np.concatenate(differences)
+        has_cell = np.zeros(2 * num_groups, dtype=bool)
+        has_cell[cell_ids] = True
+        both = has_cell[0::2] & has_cell[1::2]
+        if both.any():
+            low[both], high[both] = np.percentile(differences[:, both], [tail, 100 - tail], axis=0)
+    return results
+
+
+def _point_measures(trials, by, usable, config):
+    """Everything in a stroop_table() except the CI, plus each usable RT's cell"""
+    groups, keys = _groups(trials, by)
+    num_groups = len(keys)
+    latency = trials['latency']
+    cells = groups * 2 + ~trials['congruent']
+
+    # Accuracy over every trial
+    cell_trials = np.bincount(cells, minlength=2 * num_groups)
+    cell_correct = np.bincount(cells, weights=trials['correct'], minlength=2 * num_groups)
+    group_trials = cell_trials[0::2] + cell_trials[1::2]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cell_accuracy = cell_correct / cell_trials
+        accuracy = (cell_correct[0::2] + cell_correct[1::2]) / group_trials
+
+    # RT measures over correct responses within the valid range
+    rt = latency[usable]
+    rt_cells = cells[usable]
+    rt_groups = groups[usable]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cell_mean = (np.bincount(rt_cells, weights=rt, minlength=2 * num_groups)
+                     / np.bincount(rt_cells, minlength=2 * num_groups))
+        cell_ies = cell_mean / cell_accuracy
+    cell_median = grouped_median(rt, rt_cells, 2 * num_groups)
+
+    table = {
+        'keys': keys,
+        'by': tuple(by),
+        'trials': group_trials,
+        'accuracy': accuracy,
+        'accuracy_congruent': cell_accuracy[0::2],
+        'accuracy_incongruent': cell_accuracy[1::2],
+        'rt_congruent': cell_mean[0::2],
+        'rt_incongruent': cell_mean[1::2],
+        'median_rt': grouped_median(rt, rt_groups, num_groups),
+        'trimmed_rt': grouped_trimmed_mean(rt, rt_groups, num_groups, config['trim']),
+        'median_congruent': cell_median[0::2],
+        'median_incongruent': cell_median[1::2],
+        'interference': cell_mean[1::2] - cell_mean[0::2],
+        'median_interference': cell_median[1::2] - cell_median[0::2],
+        'ies_congruent': cell_ies[0::2],
+        'ies_incongruent': cell_ies[1::2],
+        'ies_interference': cell_ies[1::2] - cell_ies[0::2]
+    }
+    return table, rt_cells
+
+
+def stroop_tables(trials, groupings=(('participant',), ('method', 'language')), config=None):
+    """
+    Per-group Stroop measures for several groupings at once
+
+    Args:
+        trials: Arrays from load_trials()
+        groupings: Tuples of CATEGORICAL column names to group by (an empty
+            tuple gives one overall row)
+        config: Overrides for ANALYTICS_CONFIG
+
+    Returns:
+        dict: Grouping tuple -> table. A table holds 'by', 'keys' (label
+            tuples, one per group) and per-group arrays: 'trials',
+            'accuracy', 'accuracy_congruent', 'accuracy_incongruent',
+            'rt_congruent', 'rt_incongruent' (mean correct RT), 'median_rt',
+            'trimmed_rt', 'median_congruent', 'median_incongruent',
+            'interference', 'median_interference', 'ies_congruent',
+            'ies_incongruent', 'ies_interference', 'ci_low', 'ci_high'
+    """
+    config = dict(ANALYTICS_CONFIG, **(config or {}))
+    latency = trials['latency']
+    with np.errstate(invalid='ignore'):
+        usable = trials['correct'] & (latency >= config['min_rt']) & (latency <= config['max_rt'])
+
+    strata, _ = _groups(trials, CATEGORICAL)
+    strata = (strata * 2 + ~trials['congruent'])[usable]
+    num_strata = int(strata.max()) + 1 if len(strata) else 0
+
+    tables = {}
+    cell_maps = []
+    for by in groupings:
+        table, rt_cells = _point_measures(trials, tuple(by), usable, config)
+        stratum_cells = np.zeros(num_strata, dtype=np.int64)
+        stratum_cells[strata] = rt_cells  # every grouping is constant within a stratum
+        tables[tuple(by)] = table
+        cell_maps.append((stratum_cells, len(table['keys'])))
+
+    intervals = bootstrap_interference(latency[usable], strata, cell_maps, config['bootstrap'],
+                                       config['confidence'], np.random.default_rng(config['seed']))
+    for table, (low, high) in zip(tables.values(), intervals):
+        table['ci_low'] = low
+        table['ci_high'] = high
+    return tables
+
+
+def stroop_table(trials, by=('participant',), config=None):
+    """Per-group Stroop measures for one grouping (see stroop_tables())"""
+    return stroop_tables(trials, (tuple(by),), config)[tuple(by)]
+
+
+def table_rows(table):
+    """One dict per group, for printing or CSV export"""
+    columns = [name for name in table if name not in ('keys', 'by')]
+    return [dict(zip(table['by'], key), **{name: table[name][i].item() for name in columns})
+            for i, key in enumerate(table['keys'])]
+
+
+def print_table(table):
+    """Print a stroop_table() with RTs in ms"""
+    by = table['by']
+    header = ' '.join(f"{name:<14}" for name in by)
+    print(f"{header} {'trials':>7} {'acc %':>6} {'cong ms':>8} {'incong ms':>9} {'effect ms':>9} "
+          f"{'95% CI':>17} {'IES effect':>10}")
+    for row in table_rows(table):
+        labels = ' '.join(f"{row[name]:<14}" for name in by)
+        ms = {name: row[name] * 1000 for name in ('rt_congruent', 'rt_incongruent', 'interference',
+                                                   'ci_low', 'ci_high', 'ies_interference')}
+        print(f"{labels} {row['trials']:7d} {row['accuracy'] * 100:6.1f} {ms['rt_congruent']:8.0f} "
+              f"{ms['rt_incongruent']:9.0f} {ms['interference']:+9.0f} "
+              f"[{ms['ci_low']:+6.0f}, {ms['ci_high']:+6.0f}] {ms['ies_interference']:+10.0f}")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else 'stroop_efficiency.db'
+    by = tuple(sys.argv[2].split(',')) if len(sys.argv) > 2 else ('participant',)
+    started = time.perf_counter()
+    try:
+        trials = load_trials(path)
+    except sqlite3.OperationalError as e:
+        print(f"[ANALYTICS] Cannot read trials from {path}: {e}")
+        sys.exit(1)
+    loaded = time.perf_counter()
+    table = stroop_table(trials, by)
+    done = time.perf_counter()
+    print(f"{len(trials['latency'])} trials, {len(table['keys'])} groups "
+          f"(load {(loaded - started) * 1000:.0f} ms, analysis {(done - loaded) * 1000:.0f} ms)")
+    print_table(table)
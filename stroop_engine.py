@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+Headless Stroop session engine.
+
+StroopSession owns everything about a game that does not need a display:
+trial generation, answer evaluation, reaction-time measurement, the
+per-trial records written to the trials table and the session summary.
+Showing a trial and collecting an answer are delegated to two adapters:
+
+    renderer.start(session)                  -> False to abort
+    renderer.show_trial(session, trial)      -> onset timestamp (ns) of the
+                                                frame that first showed it
+    renderer.show_feedback(session, record)  -> False to abort
+    input_adapter.get_response(session, trial) -> handler result dict
+        ({'success', 'color_index', 'message'[, 'response_ns']})
+
+The pygame game is one frontend (see MainFile.play_game). NullRenderer and
+SimulatedInput run sessions without a display, at the speed of the Python
+loop, for load tests and batch analysis:
+    python benchmarks/engine_bench.py
+"""
+import json
+import os
+import random
+import time
+import uuid
+
+from running_stats import RunningStats
+from timing import TrialTimer, NS_PER_SECOND
+from trial_sequence import generate_sequence
+
+METHODS = ['voice', 'click', 'key', 'gesture', 'camera', 'qr']
+LANGUAGES = ['english', 'hindi']
+
+# Keys of a trial record, in trials table column order
+TRIAL_COLUMNS = ('session_id', 'participant', 'method', 'language', 'trial_number',
+                 'word_index', 'ink_index', 'congruent', 'answer_index', 'correct',
+                 'onset_ns', 'response_ns', 'latency', 'ts')
+
+# The trials table and its indexes (created by MainFile.init_db)
+TRIALS_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS trials (
+           id INTEGER PRIMARY KEY AUTOINCREMENT,
+           session_id TEXT NOT NULL,
+           participant TEXT NOT NULL,
+           method TEXT NOT NULL,
+           language TEXT NOT NULL,
+           trial_number INTEGER NOT NULL,
+           word_index INTEGER NOT NULL,
+           ink_index INTEGER NOT NULL,
+           congruent INTEGER NOT NULL,
+           answer_index INTEGER,
+           correct INTEGER NOT NULL,
+           onset_ns INTEGER,
+           response_ns INTEGER,
+           latency REAL,
+           ts REAL NOT NULL
+       )''',
+    '''CREATE INDEX IF NOT EXISTS idx_trials_participant
+       ON trials (participant, method, language, ts)''',
+    '''CREATE INDEX IF NOT EXISTS idx_trials_session
+       ON trials (session_id)'''
+)
+
+SESSION_CONFIG = {
+    'total_questions': 5,  # trials per game
+    'congruent_ratio': None,  # fraction of trials where word == ink; None = 0.5, at least one of each kind
+    'countdown_ms': 1500,  # 3-2-1 countdown before the first trial; 0 = none
+    'ready_ms': 500,  # "Get ready" animation after the word appears, before input starts
+    'feedback_ms': 2500,  # correct/wrong screen after each answer; 0 = no feedback
+    'iti_ms': 0  # fixation cross between trials
+}
+
+# Named settings selected with STROOP_SESSION_MODE
+SESSION_PRESETS = {
+    'game': {},
+    'research': {'total_questions': 200, 'ready_ms': 0, 'feedback_ms': 0, 'iti_ms': 500}
+}
+
+# Environment variable overriding each SESSION_CONFIG entry
+SESSION_ENV = {
+    'total_questions': 'STROOP_SESSION_LENGTH',
+    'congruent_ratio': 'STROOP_CONGRUENT_RATIO',
+    'countdown_ms': 'STROOP_COUNTDOWN_MS',
+    'ready_ms': 'STROOP_READY_MS',
+    'feedback_ms': 'STROOP_FEEDBACK_MS',
+    'iti_ms': 'STROOP_ITI_MS'
+}
+
+
+def session_config_from_env(environ=None):
+    """
+    SESSION_CONFIG with the STROOP_SESSION_MODE preset and per-setting
+    environment overrides applied
+
+    Returns:
+        dict: Session settings
+    """
+    environ = os.environ if environ is None else environ
+    mode = environ.get('STROOP_SESSION_MODE', 'game').lower()
+    if mode not in SESSION_PRESETS:
+        print(f"[SESSION] Unknown session mode '{mode}', using 'game'")
+        mode = 'game'
+    config = dict(SESSION_CONFIG, **SESSION_PRESETS[mode])
+    for key, name in SESSION_ENV.items():
+        value = environ.get(name)
+        if value is None:
+            continue
+        try:
+            # congruent_ratio (None by default) is the other float setting
+            is_float = SESSION_CONFIG[key] is None or isinstance(SESSION_CONFIG[key], float)
+            config[key] = float(value) if is_float else int(float(value))
+        except ValueError:
+            print(f"[SESSION] Ignoring {name}={value!r}")
+    return config
+
+
+# Reaction-time accumulators kept per (language, method): all trials, incongruent, congruent
+ACCUMULATORS = ('times', 'stroop_conflicts', 'non_conflicts')
+
+
+def stroop_effect(conflicts, non_conflicts):
+    """Mean incongruent minus mean congruent reaction time of two RunningStats (None if either is empty)"""
+    if not conflicts.count or not non_conflicts.count:
+        return None
+    return conflicts.mean - non_conflicts.mean
+
+
+def efficiency(score, avg_time):
+    """Correct answers per second of average reaction time"""
+    return score / avg_time if avg_time > 0 else 0
+
+
+def new_accumulators():
+    return {name: RunningStats() for name in ACCUMULATORS}
+
+
+def add_records(accumulators, records):
+    """Add trial records' reaction times to a dict of ACCUMULATORS"""
+    for record in records:
+        latency = record['latency']
+        accumulators['times'].add(latency)
+        accumulators['non_conflicts' if record['congruent'] else 'stroop_conflicts'].add(latency)
+    return accumulators
+
+
+def accumulators_to_json(accumulators):
+    return json.dumps({name: accumulators[name].to_dict() for name in ACCUMULATORS})
+
+
+def accumulators_from_json(text):
+    data = json.loads(text)
+    return {name: RunningStats.from_dict(data[name]) if name in data else RunningStats() for name in ACCUMULATORS}
+
+
+def new_game_stats(languages=LANGUAGES, methods=METHODS):
+    """
+    Empty per-(language, method) stats, as kept in MainFile.game_stats
+
+    'score', 'total', 'avg_time' and 'median_time' describe the last
+    session; the ACCUMULATORS cover every session played, in constant memory.
+    """
+    return {
+        lang: {
+            method: dict(new_accumulators(), score=0, total=0, avg_time=None, median_time=None, played=False)
+            for method in methods
+        }
+        for lang in languages
+    }
+
+
+def record_session(game_stats, session):
+    """Add a finished session's results to game_stats"""
+    stats = game_stats[session.language][session.method]
+    add_records(stats, session.records)
+    summary = session.summary()
+    stats['score'] = session.score
+    stats['total'] = session.total_questions
+    stats['avg_time'] = summary['avg_time']
+    stats['median_time'] = summary['median_time']
+    stats['played'] = True
+    return stats
+
+
+class StroopSession:
+    """One game: a fixed number of trials for one method and language"""
+
+    def __init__(self, colors, method, language, participant='anonymous', total_questions=5,
+                 renderer=None, input_adapter=None, seed=None, session_id=None,
+                 congruent_ratio=None, on_record=None):
+        """
+        Args:
+            colors: List of tuples [(color_name, color_rgb), ...]
+            method: Input method name
+            language: Language name
+            participant: Participant id stored with every trial
+            total_questions: Number of trials
+            renderer: Display adapter (NullRenderer by default)
+            input_adapter: Answer source (required to run())
+            seed: Seed for trial generation (random by default)
+            session_id: Id stored with every trial (a new uuid by default)
+            congruent_ratio: Fraction of congruent (word == ink) trials (None
+                for the default, with at least one trial of each kind)
+            on_record: Optional on_record(record) called as each trial is
+                recorded, e.g. to write it out before the session ends
+        """
+        self.colors = colors
+        self.method = method
+        self.language = language
+        self.participant = participant
+        self.total_questions = total_questions
+        self.renderer = renderer or NullRenderer()
+        self.input_adapter = input_adapter
+        self.rng = random.Random(seed)
+        # The whole block is counterbalanced up front
+        self.sequence = generate_sequence(len(colors), total_questions, congruent_ratio, self.rng)
+        self.session_id = session_id or uuid.uuid4().hex
+        self.timer = TrialTimer()
+        self.on_record = on_record
+
+        self.records = []
+        self.score = 0
+        self.aborted = False
+
+    @property
+    def question_count(self):
+        return len(self.records)
+
+    @property
+    def finished(self):
+        return self.aborted or len(self.records) >= self.total_questions
+
+    def next_trial(self):
+        """Word and ink colour for the next trial"""
+        word_index, ink_index = self.sequence[len(self.records)]
+        return {
+            'trial_number': len(self.records) + 1,
+            'word_index': word_index,
+            'ink_index': ink_index,
+            'congruent': word_index == ink_index
+        }
+
+    def record_response(self, trial, onset_ns, result):
+        """
+        Score a handler result and append the trial record
+
+        Args:
+            trial: Dict from next_trial()
+            onset_ns: Timestamp the stimulus was first shown
+            result: Handler result dict
+
+        Returns:
+            dict: Trial record keyed like the trials table
+        """
+        self.timer.mark_onset(onset_ns)
+        self.timer.mark_response(result)
+        answer_index = result.get('color_index') if result['success'] else None
+        is_correct = answer_index is not None and answer_index == trial['ink_index']
+        if is_correct:
+            self.score += 1
+
+        record = {
+            'session_id': self.session_id,
+            'participant': self.participant,
+            'method': self.method,
+            'language': self.language,
+            'trial_number': trial['trial_number'],
+            'word_index': trial['word_index'],
+            'ink_index': trial['ink_index'],
+            'congruent': int(trial['congruent']),
+            'answer_index': answer_index,
+            'correct': int(is_correct),
+            'onset_ns': self.timer.onset_ns,
+            'response_ns': self.timer.response_ns,
+            'latency': self.timer.latency(),
+            'ts': time.time()
+        }
+        self.records.append(record)
+        if self.on_record is not None:
+            self.on_record(record)
+        return record
+
+    def run(self):
+        """
+        Play every trial through the adapters
+
+        Returns:
+            bool: True if the session finished, False if it was quit
+        """
+        if self.renderer.start(self) is False:
+            self.aborted = True
+            return False
+        while not self.finished:
+            trial = self.next_trial()
+            onset_ns = self.renderer.show_trial(self, trial)
+            result = self.input_adapter.get_response(self, trial)
+            if not result['success'] and result['message'] == 'quit':
+                self.aborted = True
+                return False
+            record = self.record_response(trial, onset_ns, result)
+            if self.renderer.show_feedback(self, record) is False:
+                self.aborted = True
+                return False
+        return True
+
+    def response_times(self):
+        return [record['latency'] for record in self.records]
+
+    def summary(self):
+        """Score, accuracy, reaction times, efficiency and Stroop effect of this session"""
+        accumulators = add_records(new_accumulators(), self.records)
+        times = accumulators['times']
+        return {
+            'score': self.score,
+            'total': self.total_questions,
+            'trials': len(self.records),
+            'accuracy': self.score / self.total_questions * 100 if self.total_questions else 0,
+            'avg_time': times.mean,
+            'median_time': times.median,
+            'p90_time': times.p90,
+            'efficiency': efficiency(self.score, times.mean),
+            'stroop_effect': stroop_effect(accumulators['stroop_conflicts'], accumulators['non_conflicts'])
+        }
+
+
+class NullRenderer:
+    """Renderer that draws nothing; the stimulus onset is the current time"""
+
+    def start(self, session):
+        return True
+
+    def show_trial(self, session, trial):
+        return session.timer.mark_onset()
+
+    def show_feedback(self, session, record):
+        return True
+
+
+class SimulatedInput:
+    """
+    Synthetic participant for headless sessions
+
+    Reaction times are ex-Gaussian (normal plus exponential tail), with an
+    extra interference cost and a lower accuracy on incongruent trials.
+    Responses are time-stamped relative to the onset instead of waited for,
+    so sessions run as fast as the loop.
+    """
+
+    def __init__(self, mu=0.55, sigma=0.08, tau=0.15, interference=0.08,
+                 accuracy=0.97, incongruent_accuracy=0.9, seed=None):
+        self.mu = mu
+        self.sigma = sigma
+        self.tau = tau
+        self.interference = interference
+        self.accuracy = accuracy
+        self.incongruent_accuracy = incongruent_accuracy
+        self.rng = random.Random(seed)
+
+    def get_response(self, session, trial):
+        rng = self.rng
+        rt = rng.gauss(self.mu, self.sigma) + rng.expovariate(1 / self.tau)
+        accuracy = self.accuracy
+        if not trial['congruent']:
+            rt += self.interference
+            accuracy = self.incongruent_accuracy
+        if rng.random() < accuracy:
+            answer = trial['ink_index']
+        else:
+            # Errors in a Stroop task mostly name the word
+            answer = trial['word_index'] if not trial['congruent'] else rng.randrange(len(session.colors))
+        return {
+            'success': True,
+            'color_index': answer,
+            'message': 'success',
+            'response_ns': session.timer.onset_ns + int(max(0.15, rt) * NS_PER_SECOND)
+        }
+
+
+def run_simulated_sessions(count, colors, total_questions=5, methods=METHODS, languages=LANGUAGES,
+                           game_stats=None, seed=None):
+    """
+    Play count headless sessions, cycling through methods and languages
+
+    Returns:
+        tuple: (list of finished sessions, game_stats they were recorded into)
+    """
+    rng = random.Random(seed)
+    game_stats = game_stats if game_stats is not None else new_game_stats(languages, methods)
+    participant = SimulatedInput(seed=rng.random())
+    sessions = []
+    for i in range(count):
+        session = StroopSession(colors, methods[i % len(methods)], languages[(i // len(methods)) % len(languages)],
+                                participant=f"sim-{i % 50}", total_questions=total_questions,
+                                input_adapter=participant, seed=rng.random())
+        session.run()
+        record_session(game_stats, session)
+        sessions.append(session)
+    return sessions, game_stats
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+High-resolution trial timing.
+
+All timestamps are time.perf_counter_ns() values, so they are monotonic and
+comparable across modules and threads of the same process. Input handlers put
+the moment the answer was produced in their result dict as 'response_ns'; the
+game stamps the stimulus onset right after the frame showing it is flipped.
+"""
+import time
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_MS = 1_000_000
+
+
+def now_ns():
+    """Current high-resolution timestamp in nanoseconds"""
+    return time.perf_counter_ns()
+
+
+def event_time_ns(event):
+    """
+    Timestamp of a pygame event
+
+    Uses the SDL event timestamp (milliseconds on the pygame.time.get_ticks
+    clock) when the pygame build exposes it, otherwise the time the event was
+    taken off the queue.
+    """
+    stamp = now_ns()
+    sdl_ms = getattr(event, 'timestamp', None)
+    if sdl_ms is None or not PYGAME_AVAILABLE:
+        return stamp
+    age_ms = pygame.time.get_ticks() - sdl_ms
+    if age_ms <= 0:
+        return stamp
+    return stamp - age_ms * NS_PER_MS
+
+
+def audio_duration_ns(audio):
+    """Length of a speech_recognition AudioData clip in nanoseconds"""
+    frames = len(audio.frame_data) // audio.sample_width
+    return frames * NS_PER_SECOND // audio.sample_rate
+
+
+def estimate_speech_onset_ns(capture_end_ns, audio, recognizer):
+    """
+    Estimate when speech started in a clip returned by Recognizer.listen()
+
+    listen() keeps non_speaking_duration of audio before the phrase and stops
+    after pause_threshold of silence, of which non_speaking_duration is kept.
+    """
+    leading = int(recognizer.non_speaking_duration * NS_PER_SECOND)
+    trailing_dropped = int((recognizer.pause_threshold - recognizer.non_speaking_duration) * NS_PER_SECOND)
+    clip_end_ns = capture_end_ns - max(0, trailing_dropped)
+    return clip_end_ns - audio_duration_ns(audio) + leading
+
+
+def ns_to_seconds(ns):
+    return ns / NS_PER_SECOND
+
+
+class TrialTimer:
+    """Stimulus-onset to response latency for a single trial"""
+
+    def __init__(self):
+        self.onset_ns = None
+        self.response_ns = None
+
+    def mark_onset(self, onset_ns=None):
+        """Call right after the frame showing the stimulus is flipped (or pass its timestamp)"""
+        self.onset_ns = now_ns() if onset_ns is None else onset_ns
+        self.response_ns = None
+        return self.onset_ns
+
+    def mark_response(self, result):
+        """
+        Record the response time reported by a handler result
+
+        Handlers that do not report 'response_ns' fall back to the time
+        their get_input() returned.
+        """
+        response_ns = result.get('response_ns') if isinstance(result, dict) else None
+        self.response_ns = response_ns if response_ns is not None else now_ns()
+        return self.response_ns
+
+    def latency_ns(self):
+        if self.onset_ns is None or self.response_ns is None:
+            return None
+        return max(0, self.response_ns - self.onset_ns)
+
+    def latency(self):
+        """Reaction time in seconds (None until onset and response are set)"""
+        latency_ns = self.latency_ns()
+        return None if latency_ns is None else ns_to_seconds(latency_ns)
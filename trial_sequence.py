@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Counterbalanced Stroop trial sequences.
+
+A block is generated up front from a seed:
+- round(length * congruent_ratio) congruent trials; with the default ratio
+  there is at least one of each kind once the block has two trials, so a
+  Stroop effect can always be computed, while an explicit ratio (including
+  0 and 1) is used as given;
+- word/ink pairs dealt in Latin-square groups (each group shows every word
+  and every ink once), so pairs, words and inks appear about equally often
+  (within two or three) in blocks of any length;
+- no immediate repeats: consecutive trials never share the word or the ink.
+
+The congruent/incongruent pattern is shuffled first, then each slot takes a
+random pair of its kind, among those allowed after the previous trial, from
+that kind's current group. Nothing is retried, so a block of several
+hundred trials takes about a millisecond.
+"""
+import random
+
+DEFAULT_CONGRUENT_RATIO = 0.5
+
+
+class _PairCycle:
+    """
+    Pairs of one kind dealt group by group
+
+    Each group holds every word once and every ink once: the congruent pairs
+    form one group, and the incongruent pairs form one group per offset k
+    (word w in ink w + k). A cycle deals every group once in random order.
+    When no pair left in the current group may follow the previous trial,
+    one is borrowed from the next group, so no pair gets far ahead of the
+    others and nothing has to be retried.
+    """
+
+    def __init__(self, groups, rng):
+        self.groups = groups
+        self.rng = rng
+        self.pools = []
+
+    def _extend(self):
+        order = list(self.groups)
+        self.rng.shuffle(order)
+        self.pools.extend(list(group) for group in order)
+
+    def deal(self, allowed):
+        """A random allowed pair (None if no pair of this kind is allowed)"""
+        if not self.pools:
+            self._extend()
+        i = 0
+        extended = False
+        while True:
+            if i == len(self.pools):
+                # A fresh cycle holds every pair, so one extension is enough
+                if extended:
+                    return None
+                self._extend()
+                extended = True
+            candidates = [pair for pair in self.pools[i] if allowed(pair)]
+            if candidates:
+                break
+            i += 1
+        pair = self.rng.choice(candidates)
+        self.pools[i].remove(pair)
+        self.pools = [pool for pool in self.pools if pool]
+        return pair
+
+
+def generate_sequence(num_colors, length, congruent_ratio=None, seed=None):
+    """
+    Precompute a block of trials
+
+    Args:
+        num_colors: Number of colours (words and inks)
+        length: Number of trials
+        congruent_ratio: Fraction of congruent (word == ink) trials; None for
+            DEFAULT_CONGRUENT_RATIO with at least one trial of each kind
+        seed: Seed or random.Random instance
+
+    Returns:
+        list: (word_index, ink_index) tuples
+    """
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+    if congruent_ratio is None:
+        congruent = int(length * DEFAULT_CONGRUENT_RATIO + 0.5)
+        if length >= 2 and num_colors >= 2:
+            congruent = min(max(congruent, 1), length - 1)
+    else:
+        congruent = min(max(int(length * congruent_ratio + 0.5), 0), length)
+    kinds = [True] * congruent + [False] * (length - congruent)
+    rng.shuffle(kinds)
+
+    congruent_groups = [[(w, w) for w in range(num_colors)]]
+    incongruent_groups = [[(w, (w + k) % num_colors) for w in range(num_colors)] for k in range(1, num_colors)]
+    cycles = {True: _PairCycle(congruent_groups, rng), False: _PairCycle(incongruent_groups or congruent_groups, rng)}
+    if num_colors >= 3:
+        def allowed_after(previous, pair):
+            return pair[0] != previous[0] and pair[1] != previous[1]
+    else:
+        # Two colours cannot avoid sharing a word or ink; only avoid the same pair twice
+        def allowed_after(previous, pair):
+            return pair != previous
+
+    sequence = []
+    previous = None
+    for kind in kinds:
+        pair = cycles[kind].deal(lambda pair: previous is None or allowed_after(previous, pair))
+        if pair is None:
+            # Only possible with a single colour
+            pair = cycles[kind].deal(lambda pair: True)
+        sequence.append(pair)
+        previous = pair
+    return sequence
+
+
+def sequence_stats(sequence):
+    """Congruent count, word/ink frequencies and immediate repeats of a sequence"""
+    words, inks = {}, {}
+    for word, ink in sequence:
+        words[word] = words.get(word, 0) + 1
+        inks[ink] = inks.get(ink, 0) + 1
+    return {
+        'trials': len(sequence),
+        'congruent': sum(1 for word, ink in sequence if word == ink),
+        'word_counts': [words[k] for k in sorted(words)],
+        'ink_counts': [inks[k] for k in sorted(inks)],
+        'repeats': sum(1 for a, b in zip(sequence, sequence[1:]) if a[0] == b[0] or a[1] == b[1])
+    }
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import deque
+
+import numpy as np
+import speech_recognition as sr
+
+from timing import now_ns, NS_PER_MS
+
+try:
+    import sounddevice as sd
+    SOUNDDEVICE_AVAILABLE = True
+except ImportError:
+    SOUNDDEVICE_AVAILABLE = False
+
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except ImportError:
+    PYAUDIO_AVAILABLE = False
+
+STREAM_AVAILABLE = SOUNDDEVICE_AVAILABLE or PYAUDIO_AVAILABLE
+
+SAMPLE_WIDTH = 2  # int16
+
+
+class MicrophoneStream:
+    """
+    Continuously running microphone input kept in a ring buffer of short frames
+
+    The stream is opened once; every frame is stamped with the perf_counter_ns
+    time its last sample arrived, so utterances can be cut out of the buffer
+    after the fact, including a pre-roll from before speech was detected.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, buffer_seconds=10):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self._frames = deque(maxlen=buffer_seconds * 1000 // frame_ms)  # (sequence, end_ns, pcm bytes)
+        self._sequence = 0
+        self._new_frame = threading.Condition()
+        self._stream = None
+        self._pyaudio = None
+        self.backend = None
+        self.overflows = 0
+
+    def start(self):
+        """Open the input stream (no-op if already running)"""
+        if self._stream is not None:
+            return True
+        try:
+            if SOUNDDEVICE_AVAILABLE:
+                self._stream = sd.RawInputStream(samplerate=self.sample_rate, blocksize=self.frame_samples,
+                                                 channels=1, dtype='int16', callback=self._sounddevice_callback)
+                self._stream.start()
+                self.backend = 'sounddevice'
+            elif PYAUDIO_AVAILABLE:
+                self._pyaudio = pyaudio.PyAudio()
+                self._stream = self._pyaudio.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate,
+                                                  input=True, frames_per_buffer=self.frame_samples,
+                                                  stream_callback=self._pyaudio_callback)
+                self._stream.start_stream()
+                self.backend = 'pyaudio'
+            else:
+                return False
+        except Exception as e:
+            print(f"[VOICE] Could not open microphone stream: {e}")
+            self.stop()
+            return False
+        print(f"[VOICE] Microphone stream running ({self.backend}, {self.frame_ms} ms frames)")
+        return True
+
+    def _sounddevice_callback(self, indata, frames, time_info, status):
+        if status.input_overflow:
+            self.overflows += 1
+        self.push(bytes(indata))
+
+    def _pyaudio_callback(self, in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.push(in_data)
+        return (None, pyaudio.paContinue)
+
+    def push(self, pcm, end_ns=None):
+        """Append one frame of int16 mono PCM (called from the audio callback)"""
+        with self._new_frame:
+            self._sequence += 1
+            self._frames.append((self._sequence, end_ns or now_ns(), pcm))
+            self._new_frame.notify_all()
+
+    def latest_sequence(self):
+        with self._new_frame:
+            return self._sequence
+
+    def sequence_before(self, timestamp_ns):
+        """
+        Sequence number of the last buffered frame that ended by timestamp_ns
+
+        frames_after() that number starts with the frame covering timestamp_ns
+        (or with the oldest buffered frame if timestamp_ns is older than the buffer).
+        """
+        with self._new_frame:
+            sequence = self._frames[0][0] - 1 if self._frames else self._sequence
+            for frame_sequence, end_ns, _ in self._frames:
+                if end_ns > timestamp_ns:
+                    break
+                sequence = frame_sequence
+            return sequence
+
+    def frames_after(self, sequence, timeout=0.5):
+        """Wait for and return every buffered frame newer than sequence"""
+        with self._new_frame:
+            self._new_frame.wait_for(lambda: self._sequence > sequence, timeout)
+            return [frame for frame in self._frames if frame[0] > sequence]
+
+    def is_running(self):
+        return self._stream is not None
+
+    def stop(self):
+        stream, self._stream = self._stream, None
+        try:
+            if stream is not None:
+                if self.backend == 'pyaudio':
+                    stream.stop_stream()
+                else:
+                    stream.stop()
+                stream.close()
+            if self._pyaudio is not None:
+                self._pyaudio.terminate()
+                self._pyaudio = None
+        except Exception as e:
+            print(f"[VOICE] Error closing microphone stream: {e}")
+
+
+class EnergyEndpointer:
+    """
+    Frame-level voice activity detection with an adaptive noise floor
+
+    A frame is speech when its RMS exceeds threshold_ratio times the running
+    noise floor. The utterance opens after start_ms of consecutive speech and
+    closes after hangover_ms of consecutive silence; pre_roll_ms of audio from
+    before the opening is kept so soft word onsets are not clipped.
+    """
+
+    def __init__(self, frame_ms=20, pre_roll_ms=300, start_ms=60, hangover_ms=100,
+                 max_ms=8000, threshold_ratio=3.0, min_threshold=150.0):
+        self.frame_ms = frame_ms
+        self.pre_roll_frames = max(1, pre_roll_ms // frame_ms)
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.max_frames = max_ms // frame_ms
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+
+        # Survives reset(): the floor keeps adapting across trials
+        self.noise_floor = None
+        self.reset()
+
+    def reset(self):
+        self.in_speech = False
+        self.onset_ns = None
+        self.end_ns = None
+        self.frames = []
+        self._pre_roll = deque(maxlen=self.pre_roll_frames)
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def threshold(self):
+        floor = self.noise_floor if self.noise_floor is not None else self.min_threshold
+        return max(self.min_threshold, floor * self.threshold_ratio)
+
+    def process(self, pcm, end_ns):
+        """
+        Feed one frame
+
+        Returns:
+            str: 'silence', 'start' (speech just detected), 'speech' or
+                'end' (utterance complete in self.frames)
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+        is_speech = rms > self.threshold()
+
+        if not self.in_speech:
+            self._pre_roll.append((end_ns, pcm))
+            if is_speech:
+                self._speech_run += 1
+                if self._speech_run >= self.start_frames:
+                    self.in_speech = True
+                    self._silence_run = 0
+                    # Onset is the start of the first frame of the speech run
+                    first_end_ns = self._pre_roll[-self.start_frames][0]
+                    self.onset_ns = first_end_ns - self.frame_ms * NS_PER_MS
+                    self.frames = [frame for _, frame in self._pre_roll]
+                    return 'start'
+            else:
+                self._speech_run = 0
+                self.noise_floor = rms if self.noise_floor is None else 0.95 * self.noise_floor + 0.05 * rms
+            return 'silence'
+
+        self.frames.append(pcm)
+        if is_speech:
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+        if self._silence_run >= self.hangover_frames or len(self.frames) >= self.max_frames:
+            self.end_ns = end_ns
+            return 'end'
+        return 'speech'
+
+
+def audio_data_from_pcm(pcm, sample_rate, sample_width=SAMPLE_WIDTH):
+    """
+    Wrap captured mono PCM as recognizer input without a WAV file
+
+    Args:
+        pcm: int16 NumPy array (wrapped as a zero-copy memoryview), bytes-like
+            object (used as is) or a list of byte chunks (joined once)
+        sample_rate: Samples per second
+        sample_width: Bytes per sample (taken from the dtype for arrays)
+
+    Returns:
+        speech_recognition.AudioData
+    """
+    if isinstance(pcm, np.ndarray):
+        sample_width = pcm.dtype.itemsize
+        pcm = memoryview(np.ascontiguousarray(pcm)).cast('B')
+    elif isinstance(pcm, (list, tuple)):
+        pcm = b''.join(pcm)
+    return sr.AudioData(pcm, sample_rate, sample_width)
+
+
+class Utterance:
+    """An endpointed clip ready for the recognizer"""
+
+    def __init__(self, audio, onset_ns, end_ns):
+        self.audio = audio
+        self.onset_ns = onset_ns
+        self.end_ns = end_ns
+
+
+def listen_for_utterance(stream, endpointer, timeout=3.0, phrase_time_limit=8.0, on_speech=None,
+                         start_ns=None):
+    """
+    Cut the next utterance out of a running MicrophoneStream
+
+    Args:
+        stream: Started MicrophoneStream
+        endpointer: EnergyEndpointer (its noise floor is reused across calls)
+        timeout: Seconds, from start_ns, to wait for speech to start
+        phrase_time_limit: Longest utterance in seconds
+        on_speech: Optional callback run once when speech is first detected
+        start_ns: Stimulus onset; buffered audio is read from the frame at
+            this time, so speech that began before the call (e.g. during a
+            "Get ready" screen) is kept. Defaults to the time of the call.
+
+    Returns:
+        Utterance, or None if no speech started before the timeout
+    """
+    endpointer.reset()
+    endpointer.max_frames = int(phrase_time_limit * 1000) // endpointer.frame_ms
+    first = stream.latest_sequence() if start_ns is None else stream.sequence_before(start_ns)
+    # Start a little further back so the pre-roll is already filled
+    sequence = max(0, first - endpointer.pre_roll_frames)
+    deadline_ns = (now_ns() if start_ns is None else start_ns) + int(timeout * 1e9)
+
+    while stream.is_running():
+        for sequence, end_ns, pcm in stream.frames_after(sequence):
+            state = endpointer.process(pcm, end_ns)
+            if state == 'start' and on_speech is not None:
+                on_speech()
+            elif state == 'end':
+                audio = audio_data_from_pcm(endpointer.frames, stream.sample_rate)
+                return Utterance(audio, endpointer.onset_ns, endpointer.end_ns)
+        if not endpointer.in_speech and now_ns() > deadline_ns:
+            return None
+    return None